@@ -0,0 +1,271 @@
+import asyncio
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """Deterministic local text embedder.
+
+    Word tokens and character trigrams are hashed into a signed fixed-width
+    vector (the hashing trick) and L2-normalised, so similar wording yields a
+    high inner product without any model download or network call.
+    """
+
+    def __init__(self, dim: int = 128, fields: Tuple[str, ...] = ("work_resume", "hobbies_interests")):
+        self.dim = dim
+        self.fields = fields
+
+    def embed_text(self, text: Optional[str]) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = _TOKEN_PATTERN.findall((text or "").lower())
+        features = list(tokens)
+        for token in tokens:
+            padded = f"#{token}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_profile(self, profile: dict) -> np.ndarray:
+        vector = np.sum([self.embed_text(profile.get(field)) for field in self.fields], axis=0)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).astype(np.float32)
+
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbour index over inner product.
+
+    Vectors are clustered by a k-means coarse quantizer; a search scans only
+    the ``nprobe`` clusters whose centroids best match the query. Until the
+    quantizer is trained the index searches exhaustively. Adding vectors never
+    trains: ``needs_training`` turns true at ``train_threshold`` vectors (and
+    again each time the population quadruples), and fit() can then run off the
+    event loop while searches keep using the current lists.
+    """
+
+    def __init__(self, dim: int, nlist: int = 64, nprobe: int = 16, train_threshold: int = 2048, seed: int = 0):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.seed = seed
+        self.payloads: List[dict] = []
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._trained_size = 0
+        self._replaced: set = set()
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:len(self.payloads)]
+
+    @property
+    def needs_training(self) -> bool:
+        size = len(self.payloads)
+        if self.centroids is None:
+            return size >= max(self.train_threshold, 1)
+        # Re-cluster once the population has grown enough to skew the lists
+        return size >= 4 * self._trained_size
+
+    def add(self, vector: np.ndarray, payload: dict):
+        self.add_many(np.asarray(vector, dtype=np.float32)[None, :], [payload])
+
+    def add_many(self, vectors: np.ndarray, payloads: List[dict]):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(payloads) == 0:
+            return
+        size = len(self.payloads)
+        needed = size + len(payloads)
+        if needed > self._vectors.shape[0]:
+            # Geometric growth
+            capacity = max(needed, 2 * self._vectors.shape[0], 64)
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:size] = self._vectors[:size]
+            self._vectors = grown
+            assignments = np.zeros(capacity, dtype=np.int32)
+            assignments[:size] = self._assignments[:size]
+            self._assignments = assignments
+        self._vectors[size:needed] = vectors
+        self.payloads.extend(payloads)
+
+        if self.centroids is not None:
+            assigned = self._nearest_centroids(vectors, 1)[:, 0]
+            self._assignments[size:needed] = assigned
+            for cluster in np.unique(assigned):
+                new_rows = np.arange(size, needed, dtype=np.int64)[assigned == cluster]
+                self._lists[cluster] = np.concatenate([self._lists[cluster], new_rows])
+
+    def replace(self, row: int, vector: np.ndarray, payload: dict):
+        """Overwrite one stored vector and its payload, moving it to the list of its new nearest centroid."""
+        self._vectors[row] = vector
+        self.payloads[row] = payload
+        # A fit() running over the old vector must not decide where this row goes
+        self._replaced.add(row)
+        if self.centroids is not None:
+            previous, current = self._assignments[row], self._nearest_centroids(self._vectors[row:row + 1], 1)[0, 0]
+            if previous != current:
+                self._assignments[row] = current
+                self._lists[previous] = self._lists[previous][self._lists[previous] != row]
+                self._lists[current] = np.append(self._lists[current], np.int64(row))
+
+    def train(self, iterations: int = 10):
+        """Fit the coarse quantizer with spherical k-means and rebuild the inverted lists."""
+        fitted = self.fit(self.vectors, iterations)
+        if fitted is not None:
+            self.install(*fitted)
+
+    def fit(self, data: np.ndarray, iterations: int = 10) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Spherical k-means over ``data``: returns ``(centroids, assignments)``, or None if it is empty.
+
+        Only reads ``data`` and the settings, so it may run in a worker thread
+        over a view of ``vectors``; rows replace()d meanwhile are reassigned
+        by install().
+        """
+        nlist = min(self.nlist, len(data))
+        if nlist == 0:
+            return None
+        rng = np.random.default_rng(self.seed)
+        centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assigned = np.argmax(data @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = data[assigned == cluster]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[cluster] = centroid / norm if norm else centroid
+        return centroids, np.argmax(data @ centroids.T, axis=1).astype(np.int32)
+
+    def install(self, centroids: np.ndarray, assignments: np.ndarray):
+        """Switch to a quantizer from fit(); vectors added after its snapshot are assigned here."""
+        trained = len(assignments)
+        self.centroids = centroids
+        self._assignments[:trained] = assignments
+        if len(self.payloads) > trained:
+            self._assignments[trained:len(self.payloads)] = self._nearest_centroids(self.vectors[trained:], 1)[:, 0]
+        if self._replaced:
+            rows = np.fromiter(self._replaced, dtype=np.int64, count=len(self._replaced))
+            self._assignments[rows] = self._nearest_centroids(self._vectors[rows], 1)[:, 0]
+            self._replaced.clear()
+        self._rebuild_lists()
+        self._trained_size = trained
+
+    def search(self, query: np.ndarray, k: int = 3, nprobe: Optional[int] = None,
+               exclude_id: Optional[str] = None) -> List[Tuple[float, dict]]:
+        """Approximate top-k by inner product, returned as (score, payload) best first."""
+        size = len(self.payloads)
+        if size == 0 or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        if self.centroids is None:
+            candidates = np.arange(size)
+        else:
+            probes = self._nearest_centroids(query[None, :], nprobe or self.nprobe)[0]
+            candidates = np.concatenate([self._lists[cluster] for cluster in probes])
+        if len(candidates) == 0:
+            return []
+
+        scores = self._vectors[candidates] @ query
+        if exclude_id is not None:
+            scores[[self.payloads[i].get("id") == exclude_id for i in candidates]] = -np.inf
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), self.payloads[candidates[i]]) for i in top if np.isfinite(scores[i])]
+
+    def exact_search(self, query: np.ndarray, k: int = 3) -> List[Tuple[float, dict]]:
+        """Brute-force top-k, used as the recall reference."""
+        scores = self.vectors @ np.asarray(query, dtype=np.float32)
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), self.payloads[i]) for i in top]
+
+    def _nearest_centroids(self, vectors: np.ndarray, count: int) -> np.ndarray:
+        scores = vectors @ self.centroids.T
+        count = min(count, len(self.centroids))
+        if count == len(self.centroids):
+            return np.argsort(-scores, axis=1)
+        return np.argpartition(-scores, count - 1, axis=1)[:, :count]
+
+    def _rebuild_lists(self):
+        assignments = self._assignments[:len(self.payloads)]
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]].astype(np.int64) for i in range(len(self.centroids))]
+
+
+class ProfileIndex:
+    """Embedding-backed similar-profile lookup built on an IVFIndex."""
+
+    def __init__(self, embedder: Optional[HashingEmbedder] = None, index: Optional[IVFIndex] = None, **index_options):
+        self.embedder = embedder or HashingEmbedder()
+        self.index = index or IVFIndex(self.embedder.dim, **index_options)
+        self._rows: Dict[str, int] = {payload.get("id"): row for row, payload in enumerate(self.index.payloads)}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, profile: dict):
+        self.add_many([profile])
+
+    def add_many(self, profiles: Iterable[dict], vectors: Optional[np.ndarray] = None):
+        """Index profiles; one whose id is already indexed replaces the stored vector.
+
+        ``vectors`` are the profiles' embeddings from embed_many() when they
+        were computed elsewhere (e.g. in a worker thread).
+        """
+        profiles = list(profiles)
+        if vectors is None:
+            vectors = self.embed_many(profiles)
+        size = len(self.index)
+        new: List[dict] = []
+        new_vectors: List[np.ndarray] = []
+        for profile, vector in zip(profiles, vectors):
+            row = self._rows.get(profile.get("id"))
+            if row is None:
+                if profile.get("id") is not None:
+                    self._rows[profile["id"]] = size + len(new)
+                new.append(profile)
+                new_vectors.append(vector)
+            elif row >= size:
+                new[row - size], new_vectors[row - size] = profile, vector
+            else:
+                self.index.replace(row, vector, profile)
+        if new:
+            self.index.add_many(np.stack(new_vectors), new)
+
+    def embed_many(self, profiles: List[dict]) -> np.ndarray:
+        """Embeddings for ``profiles``; stateless, so it may run in a worker thread."""
+        vectors = np.zeros((len(profiles), self.embedder.dim), dtype=np.float32)
+        for index, profile in enumerate(profiles):
+            vectors[index] = self.embedder.embed_profile(profile)
+        return vectors
+
+    def search(self, profile: dict, k: int = 3, min_score: float = 0.0) -> List[Tuple[float, dict]]:
+        results = self.index.search(self.embedder.embed_profile(profile), k, exclude_id=profile.get("id"))
+        return [(score, payload) for score, payload in results if score >= min_score]
+
+    def top_k(self, profile: dict, k: int = 3, min_score: float = 0.0) -> List[dict]:
+        return [payload for _, payload in self.search(profile, k, min_score)]
+
+    async def train(self):
+        """Fit the quantizer in a worker thread and swap it in; searches use the current lists meanwhile."""
+        index = self.index
+        fitted = await asyncio.to_thread(index.fit, index.vectors)
+        if fitted is not None:
+            index.install(*fitted)
@@ -0,0 +1,100 @@
+"""Recall-vs-latency benchmark of the IVF profile index against brute-force search.
+
+Usage: python benchmarks/bench_ann.py [--profiles 100000] [--queries 200] [--k 3]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import HashingEmbedder, IVFIndex  # noqa: E402
+from similarity import SimilarityEngine  # noqa: E402
+
+WORDS = (
+    "web development startups product management launches digital marketing social media campaigns "
+    "financial analysis investment firms data science machine learning projects coding gaming reading "
+    "hiking photography cooking yoga traveling blogging chess wine tasting marathon running rock climbing "
+    "board games podcasts design research sales operations consulting teaching nursing law logistics"
+).split()
+GROUPS = ["Tech", "Marketing", "Finance", "Health", "Education", "Operations"]
+
+
+def synthetic_profiles(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "id": str(i),
+            "age": rng.randint(18, 70),
+            "work_group": rng.choice(GROUPS),
+            "work_role": " ".join(rng.sample(WORDS, 2)),
+            "work_resume": " ".join(rng.sample(WORDS, 8)),
+            "hobbies_interests": ", ".join(rng.sample(WORDS, 3)),
+        }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--nlist", type=int, default=256)
+    args = parser.parse_args()
+
+    profiles = list(synthetic_profiles(args.profiles))
+    queries = list(synthetic_profiles(args.queries, seed=1))
+    embedder = HashingEmbedder()
+
+    start = time.perf_counter()
+    vectors = np.stack([embedder.embed_profile(p) for p in profiles])
+    query_vectors = [embedder.embed_profile(q) for q in queries]
+    print(f"embedded {len(profiles)} profiles in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    index = IVFIndex(embedder.dim, nlist=args.nlist)
+    index.add_many(vectors, profiles)
+    index.train()
+    print(f"built IVF index (nlist={args.nlist}) in {time.perf_counter() - start:.2f}s")
+
+    exact_ids, exact_times = [], []
+    for query in query_vectors:
+        start = time.perf_counter()
+        results = index.exact_search(query, args.k)
+        exact_times.append(time.perf_counter() - start)
+        exact_ids.append({payload["id"] for _, payload in results})
+
+    print(f"\n{'method':<22}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p95 ms':>10}")
+    print(f"{'brute force':<22}{1.0:>10.3f}{percentile(exact_times, 50) * 1000:>10.2f}"
+          f"{percentile(exact_times, 95) * 1000:>10.2f}")
+
+    for nprobe in (1, 2, 4, 8, 16, 32):
+        times, recalls = [], []
+        for query, truth in zip(query_vectors, exact_ids):
+            start = time.perf_counter()
+            results = index.search(query, args.k, nprobe=nprobe)
+            times.append(time.perf_counter() - start)
+            recalls.append(len(truth & {payload["id"] for _, payload in results}) / len(truth))
+        print(f"{'ivf nprobe=' + str(nprobe):<22}{statistics.mean(recalls):>10.3f}"
+              f"{percentile(times, 50) * 1000:>10.2f}{percentile(times, 95) * 1000:>10.2f}")
+
+    engine = SimilarityEngine(profiles)
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        engine.top_k(query, args.k)
+        times.append(time.perf_counter() - start)
+    print(f"{'feature scorer':<22}{'-':>10}{percentile(times, 50) * 1000:>10.2f}{percentile(times, 95) * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Fuzz and time the recommendation parser against the legacy find/rfind extraction.
+
+Well-formed model answers are mangled the ways models get JSON wrong (code
+fences and prose, single or smart quotes, unquoted keys, Python literals,
+trailing or missing commas, comments, truncation, random deletions). For each
+kind the script reports how often the expected ids are recovered by the
+legacy extraction and by RecommendationParser, and the median parse time. It
+fails if the parser raises on any input.
+
+Usage: python benchmarks/bench_parser.py [--cases 2000] [--count 3] [--seed 0]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import ExperienceCatalog  # noqa: E402
+from response_parser import IncrementalJSONParser, RecommendationParser  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_prompt import WORDS, synthetic_catalog  # noqa: E402
+
+
+def answer(rng: random.Random, ids):
+    return [{"id": experience_id, "reasoning": " ".join(rng.sample(WORDS, rng.randint(5, 20))).capitalize() + "."}
+            for experience_id in ids]
+
+
+def fenced(rng, text):
+    return rng.choice(["Here are my picks:\n```json\n", "```\n", "Sure! "]) + text + rng.choice(["\n```", "\n```\nHope this helps.", ""])
+
+
+def single_quotes(rng, text):
+    return text.replace('"', "'")
+
+
+def smart_quotes(rng, text):
+    out, opening = [], True
+    for char in text:
+        if char == '"':
+            out.append("“" if opening else "”")
+            opening = not opening
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def unquoted_keys(rng, text):
+    return text.replace('"id":', "id:").replace('"reasoning":', "reasoning:")
+
+
+def trailing_commas(rng, text):
+    return text.replace('"}', '",}').replace("}]", "},]")
+
+
+def missing_commas(rng, text):
+    return text.replace("}, {", "}\n{")
+
+
+def comments(rng, text):
+    return text.replace("[", "[ // ranked\n", 1).replace("}, {", "}, /* next */ {")
+
+
+def python_literals(rng, text):
+    return text.replace('"reasoning"', '"confident": True, "note": None, "reasoning"')
+
+
+def truncated(rng, text):
+    # Cut inside the last object's reasoning, as a max_tokens stop does
+    last = text.rfind('"reasoning"')
+    return text[:rng.randint(last + 15, len(text) - 3)]
+
+
+def deletions(rng, text):
+    chars = list(text)
+    for _ in range(rng.randint(1, 3)):
+        del chars[rng.randrange(len(chars))]
+    return "".join(chars)
+
+
+MUTATIONS = [("clean", lambda rng, text: text), ("fenced", fenced), ("single_quotes", single_quotes),
+             ("smart_quotes", smart_quotes), ("unquoted_keys", unquoted_keys), ("trailing_commas", trailing_commas),
+             ("missing_commas", missing_commas), ("comments", comments), ("python_literals", python_literals),
+             ("truncated", truncated), ("deletions", deletions)]
+
+
+def legacy_parse(text, catalog, count):
+    """The extraction the server used before RecommendationParser."""
+    array_idx, object_idx = text.find("["), text.find("{")
+    if array_idx != -1 and (object_idx == -1 or array_idx < object_idx):
+        start, end = array_idx, text.rfind("]") + 1
+    else:
+        start, end = object_idx, text.rfind("}") + 1
+    if start == -1 or end <= start:
+        return []
+    try:
+        parsed = json.loads(text[start:end])
+    except json.JSONDecodeError:
+        return []
+    if isinstance(parsed, dict):
+        parsed = [parsed]
+    return [rec["id"] for rec in parsed if isinstance(rec, dict) and rec.get("id") in catalog][:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=2000, help="answers per mutation")
+    parser.add_argument("--count", type=int, default=3, help="recommendations per answer")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    catalog = ExperienceCatalog(synthetic_catalog(200))
+    recommendation_parser = RecommendationParser(catalog)
+    rng = random.Random(args.seed)
+    ids = catalog.ids()
+
+    print(f"{'mutation':<17}{'legacy':>8}{'parser':>8}{'partial':>9}{'parse us':>10}{'stream us':>11}")
+    for name, mutate in MUTATIONS:
+        legacy_ok = parser_ok = partial = 0
+        times, stream_times = [], []
+        for _ in range(args.cases):
+            expected = rng.sample(ids, args.count)
+            text = mutate(rng, json.dumps(answer(rng, expected), indent=rng.choice([None, 2])))
+
+            if legacy_parse(text, catalog, args.count) == expected:
+                legacy_ok += 1
+
+            start = time.perf_counter()
+            result = recommendation_parser.parse(text, args.count)
+            times.append(time.perf_counter() - start)
+            got = [rec["id"] for rec in result.recommendations]
+            if got == expected:
+                parser_ok += 1
+            elif got and set(got) <= set(expected):
+                partial += 1
+
+            # The streaming path: the same text in small chunks, then finish()
+            stream_parser = IncrementalJSONParser()
+            start = time.perf_counter()
+            for offset in range(0, len(text), 8):
+                stream_parser.feed(text[offset:offset + 8])
+            stream_parser.finish()
+            stream_times.append(time.perf_counter() - start)
+
+        print(f"{name:<17}{100 * legacy_ok / args.cases:>7.1f}%{100 * parser_ok / args.cases:>7.1f}%"
+              f"{100 * partial / args.cases:>8.1f}%{statistics.median(times) * 1e6:>10.1f}"
+              f"{statistics.median(stream_times) * 1e6:>11.1f}")
+
+    # Arbitrary garbage must never raise
+    for _ in range(args.cases):
+        garbage = "".join(rng.choice('{}[]",:\'\\ abc123\n/*-.') for _ in range(rng.randint(0, 200)))
+        recommendation_parser.parse(garbage, args.count)
+        stream_parser = IncrementalJSONParser()
+        stream_parser.feed(garbage)
+        stream_parser.finish()
+    print(f"\n{args.cases} random inputs parsed without exceptions")
+
+
+if __name__ == "__main__":
+    main()
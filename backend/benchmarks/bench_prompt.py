@@ -0,0 +1,99 @@
+"""Prompt size and build time of the compact prompt builder against the legacy prompt.
+
+Reports estimated input tokens, the max_tokens budget and the tokens saved per
+request for several output counts and input budgets. If tiktoken is installed
+the local estimate is also checked against real BPE counts.
+
+Usage: python benchmarks/bench_prompt.py [--experiences 200] [--candidates 40] [--requests 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import ExperienceCatalog  # noqa: E402
+from prompt_builder import LEGACY_STATIC_TEXT, PromptBuilder, estimate_tokens  # noqa: E402
+
+WORDS = (
+    "learn master build create explore discover craft ancient modern wild urban outdoor art science music "
+    "dance pottery glass wood metal garden bees cheese bread wine birds stars mountains rivers ocean sailing "
+    "climbing running painting drawing writing poetry theatre comedy juggling archery fencing chess puzzles"
+).split()
+CATEGORIES = ["Arts & Crafts", "Dance", "Agriculture", "Performance", "Crafts", "Nature", "Culinary",
+              "Sports", "Wellness", "Animal Training", "Music", "Science"]
+
+
+def synthetic_catalog(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [{
+        "id": f"exp{i + 1}",
+        "title": " ".join(rng.sample(WORDS, 2)).title(),
+        "description": " ".join(rng.sample(WORDS, rng.randint(5, 10))).capitalize(),
+        "category": rng.choice(CATEGORIES),
+    } for i in range(count)]
+
+
+def synthetic_profile(rng: random.Random):
+    return {
+        "id": str(rng.random()),
+        "age": rng.randint(18, 70),
+        "work_group": rng.choice(["Technology", "Marketing", "Finance", "Healthcare"]),
+        "work_role": " ".join(rng.sample(WORDS, 2)),
+        "work_resume": " ".join(rng.sample(WORDS, rng.randint(10, 40))),
+        "hobbies_interests": ", ".join(rng.sample(WORDS, rng.randint(3, 8))),
+    }
+
+
+def check_estimator(texts):
+    try:
+        import tiktoken
+    except ImportError:
+        print("tiktoken not installed; skipping the estimator check")
+        return
+    encoding = tiktoken.get_encoding("cl100k_base")
+    ratios = [estimate_tokens(text) / max(1, len(encoding.encode(text))) for text in texts]
+    print(f"estimate / cl100k tokens: mean {statistics.mean(ratios):.2f}, "
+          f"min {min(ratios):.2f}, max {max(ratios):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--experiences", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=40, help="candidates offered per prompt (PROMPT_MAX_CANDIDATES)")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    catalog = ExperienceCatalog(synthetic_catalog(args.experiences))
+    rng = random.Random(1)
+    profiles = [synthetic_profile(rng) for _ in range(args.requests)]
+
+    print(f"{'count':>6}{'budget':>8}{'input':>8}{'legacy':>8}{'saved':>8}{'max_tok':>9}{'legacy':>8}"
+          f"{'cands':>7}{'build us':>10}")
+    samples = []
+    for count in (1, 3, 5):
+        for budget in (600, 1200, 2400):
+            builder = PromptBuilder(catalog, max_input_tokens=budget)
+            reports, times = [], []
+            for profile in profiles:
+                candidates = catalog.candidates(profile, set(), limit=args.candidates)
+                start = time.perf_counter()
+                plan = builder.build(profile, candidates, count)
+                times.append(time.perf_counter() - start)
+                reports.append(plan.report)
+            samples.append(plan.messages[0]["content"] + plan.messages[1]["content"])
+            mean = {key: statistics.mean(report[key] for report in reports) for key in reports[0]}
+            saved = 100 * mean["input_tokens_saved"] / mean["baseline_input_tokens"]
+            print(f"{count:>6}{budget:>8}{mean['input_tokens']:>8.0f}{mean['baseline_input_tokens']:>8.0f}"
+                  f"{saved:>7.0f}%{mean['max_tokens']:>9.0f}{mean['baseline_max_tokens']:>8.0f}"
+                  f"{mean['candidates']:>7.1f}{statistics.median(times) * 1e6:>10.1f}")
+
+    print()
+    check_estimator(samples + [LEGACY_STATIC_TEXT, catalog.prompt_fragment(catalog.candidates({}, set(), limit=40))])
+
+
+if __name__ == "__main__":
+    main()
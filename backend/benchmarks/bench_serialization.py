@@ -0,0 +1,116 @@
+"""Compare the /api/recommendations response encodings.
+
+Builds a representative payload (the user's profile, similar-profile
+summaries and a batch of recommendations) and times each way of turning it
+into response bytes:
+
+- default: FastAPI's jsonable_encoder followed by JSONResponse (the old path)
+- fast: FastJSONResponse (orjson when installed, compact json otherwise)
+- lean: lean_response with the fields the frontend renders, plus ETag
+- lean+gzip: the same with Accept-Encoding: gzip
+
+It reports the median time per response and the bytes sent for each.
+
+Usage: python benchmarks/bench_serialization.py [--similar 3] [--recommendations 5] [--resume-words 200] [--runs 2000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import serialization  # noqa: E402
+from serialization import FastJSONResponse, lean_response  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_prompt import WORDS  # noqa: E402
+
+LEAN_FIELDS = "recommendations.id,recommendations.title,recommendations.description,recommendations.category," \
+              "recommendations.reasoning,similar_profiles.work_role,similar_profiles.work_group"
+
+
+def text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def profile(rng: random.Random, resume_words: int) -> dict:
+    return {
+        "id": "%032x" % rng.getrandbits(128),
+        "age": rng.randint(20, 60),
+        "work_group": text(rng, 1).title(),
+        "work_role": text(rng, 2).title(),
+        "work_resume": text(rng, resume_words),
+        "hobbies_interests": ", ".join(text(rng, 2) for _ in range(4)),
+    }
+
+
+def payload(rng: random.Random, similar: int, recommendations: int, resume_words: int) -> dict:
+    return {
+        "user_profile": profile(rng, resume_words),
+        "similar_profiles": [{
+            "work_role": text(rng, 2).title(),
+            "work_group": text(rng, 1).title(),
+            "similarity": round(rng.random(), 3),
+        } for _ in range(similar)],
+        "recommendations": [{
+            "id": f"exp{index}",
+            "title": text(rng, 2).title(),
+            "description": text(rng, 12),
+            "category": text(rng, 1).title(),
+            "reasoning": text(rng, 25),
+        } for index in range(recommendations)],
+    }
+
+
+def measure(render, runs: int):
+    timings = []
+    body = b""
+    for _ in range(runs):
+        start = time.perf_counter()
+        body = render()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--similar", type=int, default=3)
+    parser.add_argument("--recommendations", type=int, default=5)
+    parser.add_argument("--resume-words", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = payload(random.Random(args.seed), args.similar, args.recommendations, args.resume_words)
+    plain = {"accept-encoding": ""}
+    gzipped = {"accept-encoding": "gzip"}
+    cases = [
+        ("default", lambda: JSONResponse(jsonable_encoder(data)).body),
+        ("fast", lambda: FastJSONResponse(jsonable_encoder(data)).body),
+        ("fast, no encoder", lambda: FastJSONResponse.render(None, data)),
+        ("lean", lambda: lean_response(data, plain, LEAN_FIELDS).body),
+        ("full+gzip", lambda: lean_response(data, gzipped).body),
+        ("lean+gzip", lambda: lean_response(data, gzipped, LEAN_FIELDS).body),
+    ]
+
+    print(f"encoder: {'orjson' if serialization.orjson is not None else 'json'}, runs: {args.runs}")
+    print(f"{'path':<18}{'median us':>12}{'bytes':>10}{'vs default':>12}")
+    baseline = None
+    for name, render in cases:
+        seconds, size = measure(render, args.runs)
+        baseline = baseline or seconds
+        print(f"{name:<18}{seconds * 1e6:>12.1f}{size:>10}{baseline / seconds:>11.1f}x")
+
+    tag = lean_response(data, plain).headers["etag"]
+    seconds, size = measure(lambda: lean_response(data, {"if-none-match": tag}).body, args.runs)
+    print(f"{'304 (ETag)':<18}{seconds * 1e6:>12.1f}{size:>10}{baseline / seconds:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
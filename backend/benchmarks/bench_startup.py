@@ -0,0 +1,104 @@
+"""Cold-start time of a worker: importing and building the app, running its lifespan, becoming ready.
+
+Each run is a fresh interpreter (as for a new worker under autoscaling) that
+imports ``server``, builds the app with create_app(), enters its lifespan and
+waits for the warm-up to report ready. The script prints the median and worst of each phase and, with
+--imports, the slowest modules imported by ``server``.
+
+Usage: python benchmarks/bench_startup.py [--runs 10] [--imports 15] [--backend memory]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+import server
+imported = time.perf_counter()
+app = server.create_app()
+readiness = app.state.recommender.readiness
+created = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        entered = time.perf_counter()
+        while not readiness["ready"] and not readiness["error"]:
+            await asyncio.sleep(0.001)
+        ready = time.perf_counter()
+    return entered, ready
+
+entered, ready = asyncio.run(main())
+print(json.dumps({"import": imported - started, "create": created - imported, "lifespan": entered - created,
+                  "warm_up": ready - entered, "ready": ready - started, "error": readiness["error"],
+                  "deferred": [m for m in ("motor", "pymongo", "httpx") if m in sys.modules]}))
+"""
+
+
+def child_env(backend: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATA_BACKEND", backend)
+    env.setdefault("LLM_PROVIDER", "fake")
+    env.setdefault("INTERACTION_SPILL_PATH", "")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    return env
+
+
+def run_once(env: dict) -> dict:
+    spawned = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - spawned
+    return result
+
+
+def slowest_imports(env: dict, limit: int):
+    """Modules with the largest cumulative import time under ``server`` (python -X importtime)."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import server"], cwd=BACKEND_DIR, env=env,
+                            check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only direct imports of the app and its first-level dependencies
+        if len(name) - len(name.lstrip()) <= 3:
+            rows.append((int(cumulative) / 1000, name.strip()))
+    for cumulative, name in sorted(rows, reverse=True)[:limit]:
+        print(f"  {cumulative:>8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--imports", type=int, default=15, help="slowest imports to list (0 to skip)")
+    parser.add_argument("--backend", default="memory", help="DATA_BACKEND for the runs unless already set")
+    args = parser.parse_args()
+
+    env = child_env(args.backend)
+    results = [run_once(env) for _ in range(args.runs)]
+    errors = {result["error"] for result in results if result["error"]}
+    if errors:
+        print(f"warm-up failed: {sorted(errors)}")
+
+    print(f"{args.runs} cold starts, DATA_BACKEND={env['DATA_BACKEND']}")
+    print(f"{'phase':<10}{'median ms':>11}{'max ms':>9}")
+    for phase in ("import", "create", "lifespan", "warm_up", "ready", "process"):
+        values = [result[phase] * 1000 for result in results]
+        print(f"{phase:<10}{statistics.median(values):>11.1f}{max(values):>9.1f}")
+    print(f"clients imported by ready time: {', '.join(results[-1]['deferred']) or 'none'}")
+
+    if args.imports:
+        print("\nslowest imports (cumulative):")
+        slowest_imports(env, args.imports)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""In-process load test for the recommender API with a fake LLM and in-memory database.
+
+Builds the app with server.create_app() inside this process (no network, no MongoDB, no OpenAI) and
+drives create-profile -> next-recommendation -> interaction flows from many
+concurrent virtual users, then reports throughput, latency percentiles per
+endpoint and event-loop lag.
+
+Usage:
+    python benchmarks/load_test.py --users 200 --cards 10 --llm-latency-ms 800
+    python benchmarks/load_test.py --save-baseline            # record current numbers
+    python benchmarks/load_test.py --compare                  # fail on regressions
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmarks", "baselines", "load_test.json")
+
+PROFILE = {
+    "age": 28,
+    "work_group": "Technology",
+    "work_role": "Software Engineer",
+    "work_resume": "5 years of full-stack development experience, worked at 2 startups",
+    "hobbies_interests": "coding, reading, hiking, photography",
+}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100)))]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def monitor_loop_lag(samples, stop, interval=0.01):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+async def timed(client, latencies, errors, name, method, url, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        ok = response.status_code == 200
+    except Exception:
+        response, ok = None, False
+    latencies[name].append(time.perf_counter() - start)
+    if not ok:
+        errors[name] += 1
+    return response if ok else None
+
+
+async def user_flow(client, cards, latencies, errors):
+    response = await timed(client, latencies, errors, "create_profile", "POST", "/api/profile", json=PROFILE)
+    if response is None:
+        return
+    user_id = response.json()["user_id"]
+    for i in range(cards):
+        response = await timed(client, latencies, errors, "next_recommendation", "GET",
+                               f"/api/next-recommendation/{user_id}")
+        if response is None or "id" not in response.json():
+            return
+        await timed(client, latencies, errors, "interaction", "POST", "/api/interaction", json={
+            "user_id": user_id,
+            "experience_id": response.json()["id"],
+            "action": "liked" if i % 2 == 0 else "disliked",
+        })
+
+
+async def run(args):
+    import httpx
+    import server
+    from metrics import REQUESTS_DEGRADED, REQUESTS_SHED
+
+    latencies, errors, lag = defaultdict(list), defaultdict(int), []
+    stop = asyncio.Event()
+    app = server.create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest",
+                                     timeout=args.timeout) as client:
+            monitor = asyncio.create_task(monitor_loop_lag(lag, stop))
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def bounded_flow():
+                async with semaphore:
+                    await user_flow(client, args.cards, latencies, errors)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(bounded_flow() for _ in range(args.users)))
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await monitor
+
+    total = sum(len(samples) for samples in latencies.values())
+    return {
+        "revision": git_revision(),
+        "config": {
+            "users": args.users, "concurrency": args.concurrency, "cards": args.cards,
+            "llm_latency_ms": args.llm_latency_ms, "llm_concurrency": args.llm_concurrency,
+            "llm_admission_queue": args.llm_admission_queue,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "endpoints": {
+            name: {
+                "count": len(samples),
+                "errors": errors[name],
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            }
+            for name, samples in sorted(latencies.items())
+        },
+        "admission": {
+            "shed": int(REQUESTS_SHED.total()),
+            "degraded": int(REQUESTS_DEGRADED.total()),
+        },
+        "loop_lag": {
+            "p99_ms": round(percentile(lag, 99) * 1000, 2),
+            "max_ms": round(max(lag, default=0.0) * 1000, 2),
+        },
+    }
+
+
+def print_report(result):
+    print(f"revision {result['revision']}  config {result['config']}")
+    print(f"{result['requests']} requests in {result['elapsed_s']}s -> {result['throughput_rps']} req/s")
+    print(f"\n{'endpoint':<22}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in result["endpoints"].items():
+        print(f"{name:<22}{stats['count']:>8}{stats['errors']:>8}{stats['p50_ms']:>10.2f}"
+              f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+    print(f"\nrate-limited {result['admission']['shed']}, degraded without the LLM {result['admission']['degraded']}")
+    print(f"event-loop lag p99 {result['loop_lag']['p99_ms']} ms, max {result['loop_lag']['max_ms']} ms")
+
+
+def compare(result, baseline, tolerance):
+    """Return regressions beyond `tolerance` (fractional) relative to the baseline."""
+    regressions = []
+    if result["config"] != baseline["config"]:
+        print(f"warning: config differs from baseline {baseline['config']}")
+    if result["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {result['throughput_rps']} < baseline {baseline['throughput_rps']} req/s")
+    for name, stats in result["endpoints"].items():
+        base = baseline["endpoints"].get(name)
+        if not base:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            # Ignore sub-millisecond noise on endpoints that are already fast
+            if stats[key] > max(base[key] * (1 + tolerance), base[key] + 1.0):
+                regressions.append(f"{name} {key} {stats[key]} > baseline {base[key]}")
+        if stats["errors"] > base["errors"]:
+            regressions.append(f"{name} errors {stats['errors']} > baseline {base['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200, help="virtual users to simulate")
+    parser.add_argument("--concurrency", type=int, default=200, help="users running at the same time")
+    parser.add_argument("--cards", type=int, default=10, help="recommendations each user swipes through")
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--llm-concurrency", type=int, default=None, help="override LLM_MAX_CONCURRENCY")
+    parser.add_argument("--llm-admission-queue", type=int, default=None,
+                        help="override LLM_ADMISSION_MAX_QUEUED (-1 queues instead of degrading)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", action="store_true", help="print the raw result as JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file to save or compare")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true", help="exit non-zero on regressions vs the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional regression")
+    args = parser.parse_args()
+    if args.compare and not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save-baseline")
+        return 1
+
+    # Read by create_app() when run() builds the app
+    os.environ["DATA_BACKEND"] = "memory"
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["FAKE_LLM_JITTER_MS"] = str(args.llm_jitter_ms)
+    if args.llm_concurrency is not None:
+        os.environ["LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+    if args.llm_admission_queue is not None:
+        os.environ["LLM_ADMISSION_MAX_QUEUED"] = str(args.llm_admission_queue)
+    sys.path.insert(0, BACKEND_DIR)
+    # httpx logs every request at INFO, which would bury the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nbaseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 100
+
+
+class LineTooLong(Exception):
+    """An NDJSON line is longer than the import accepts."""
+
+    def __init__(self, line: int, limit: int):
+        super().__init__(f"Line {line} is longer than {limit} bytes")
+        self.line = line
+        self.limit = limit
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes], max_line_bytes: Optional[int] = None) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield ``(line number, value)`` for each non-blank line of an NDJSON byte stream.
+
+    A line that is not valid JSON yields the ValueError in place of the value,
+    so one bad record does not abort the whole stream. A line longer than
+    ``max_line_bytes`` raises LineTooLong as soon as the buffer exceeds it,
+    so a body without newlines is never held in memory whole.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if max_line_bytes and len(line) > max_line_bytes:
+                raise LineTooLong(line_number, max_line_bytes)
+            if line.strip():
+                yield line_number, _decode(line)
+        if max_line_bytes and len(buffer) > max_line_bytes:
+            raise LineTooLong(line_number + 1, max_line_bytes)
+    if buffer.strip():
+        yield line_number + 1, _decode(buffer)
+
+
+def _decode(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+
+@dataclass
+class ImportReport:
+    user_ids: List[str] = field(default_factory=list)
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    failed: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    def fail(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "imported": len(self.user_ids),
+            "failed": self.failed,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "profiles_per_second": round(len(self.user_ids) / self.seconds, 1) if self.seconds else None,
+            "user_ids": self.user_ids,
+            "errors": self.errors,
+        }
+
+
+async def import_profiles(records: AsyncIterator[Tuple[int, Any]], validate: Callable[[Any], dict],
+                          insert_batch: Callable[[List[dict]], Awaitable[Dict[int, str]]],
+                          batch_size: int = 500, max_profiles: int = 100000) -> ImportReport:
+    """Validate streamed records and insert them in batches while the rest is still arriving.
+
+    ``validate`` turns a record into a profile document with an ``id`` (raising
+    ValueError for bad input) and ``insert_batch`` returns the error message for
+    each rejected position. One batch is written while the next is parsed.
+    User ids are reported in input order; errors carry their line number.
+    """
+    report = ImportReport()
+    start = time.perf_counter()
+    batch: List[Tuple[int, dict]] = []
+    writing: Optional[asyncio.Task] = None
+    accepted = 0
+
+    async def write(pending: List[Tuple[int, dict]]):
+        try:
+            failed = await insert_batch([profile for _, profile in pending])
+        except Exception as e:
+            logger.warning("Bulk profile insert failed: %s", e)
+            failed = {index: str(e) for index in range(len(pending))}
+        report.batches += 1
+        for index, (line, profile) in enumerate(pending):
+            if index in failed:
+                report.fail(line, failed[index])
+            else:
+                report.user_ids.append(profile["id"])
+
+    try:
+        async for line, record in records:
+            if accepted >= max_profiles:
+                report.fail(line, f"Import limit of {max_profiles} profiles reached, stopped reading")
+                break
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                batch.append((line, validate(record)))
+                accepted += 1
+            except ValueError as e:
+                report.fail(line, str(e))
+                continue
+            if len(batch) >= batch_size:
+                if writing is not None:
+                    await writing
+                writing, batch = asyncio.create_task(write(batch)), []
+        if writing is not None:
+            await writing
+            writing = None
+        if batch:
+            await write(batch)
+    finally:
+        if writing is not None and not writing.done():
+            writing.cancel()
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+@dataclass
+class BatchJob:
+    id: str
+    total: int
+    concurrency: int
+    status: str = "queued"  # queued, running, done, failed or cancelled
+    processed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    written: int = 0
+    write_errors: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "written": self.written,
+            "write_errors": self.write_errors,
+            "concurrency": self.concurrency,
+            "seconds": round(elapsed, 3),
+            "users_per_second": round(self.processed / elapsed, 2) if elapsed else None,
+            "errors": self.errors,
+        }
+
+
+class BatchRunner:
+    """Runs ``fn`` over many items with at most ``concurrency`` in flight per job.
+
+    ``concurrency`` workers pull from the job's items, so a job of any size
+    holds only that many tasks. Documents returned by ``fn`` are tagged with
+    the job id, buffered and handed to ``write`` every ``write_batch_size``
+    results. Finished jobs beyond ``max_jobs`` are forgotten oldest first.
+    """
+
+    def __init__(self, write_batch_size: int = 100, max_jobs: int = 100):
+        self.write_batch_size = write_batch_size
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, BatchJob]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status in ("queued", "running"))
+
+    def submit(self, items: Iterable[Any], fn: Callable[[Any], Awaitable[Optional[dict]]],
+               write: Callable[[List[dict]], Awaitable[Any]], concurrency: int = 8) -> BatchJob:
+        items = list(items)
+        job = BatchJob(uuid.uuid4().hex, len(items), max(1, concurrency))
+        self._jobs[job.id] = job
+        finished = [job_id for job_id, old in self._jobs.items() if old.task is not None and old.task.done()]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+        job.task = asyncio.create_task(self._run(job, items, fn, write))
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.task is None or job.task.done():
+            return False
+        job.task.cancel()
+        return True
+
+    async def close(self):
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: BatchJob, items: List[Any], fn, write):
+        job.status, job.started_at = "running", time.time()
+        pending = iter(items)
+        buffer: List[dict] = []
+
+        async def flush():
+            if not buffer:
+                return
+            documents = list(buffer)
+            buffer.clear()
+            try:
+                await write(documents)
+                job.written += len(documents)
+            except Exception as e:
+                logger.warning("Batch job %s write failed: %s", job.id, e)
+                job.write_errors += len(documents)
+
+        async def work():
+            for item in pending:
+                try:
+                    document = await fn(item)
+                except Exception as e:
+                    job.failed += 1
+                    if len(job.errors) < MAX_REPORTED_ERRORS:
+                        job.errors.append({"item": item, "error": f"{type(e).__name__}: {e}"})
+                else:
+                    job.succeeded += 1
+                    if document is not None:
+                        document.setdefault("job_id", job.id)
+                        buffer.append(document)
+                        if len(buffer) >= self.write_batch_size:
+                            await flush()
+                job.processed += 1
+
+        try:
+            await asyncio.gather(*(work() for _ in range(min(job.concurrency, len(items)) or 1)))
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            logger.exception("Batch job %s failed", job.id)
+            job.status = "failed"
+            job.errors.append({"error": f"{type(e).__name__}: {e}"})
+        finally:
+            # Keep what was computed before a cancellation
+            await asyncio.shield(flush())
+            job.finished_at = time.time()
+            logger.info("Batch job finished", extra={"fields": job.to_dict() | {"errors": len(job.errors)}})
+
+
+def create_batch_runner_from_env() -> BatchRunner:
+    """Build the batch runner from BATCH_* settings."""
+    return BatchRunner(
+        write_batch_size=int(os.environ.get("BATCH_WRITE_SIZE", "100")),
+        max_jobs=int(os.environ.get("BATCH_MAX_JOBS", "100")),
+    )
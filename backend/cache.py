@@ -0,0 +1,145 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FIELDS = ("age", "work_group", "work_role", "work_resume", "hobbies_interests")
+
+
+def _canonical_hash(payload) -> str:
+    """sha256 of ``payload`` as compact JSON with sorted keys."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def recommendation_cache_key(user_profile: dict, available_ids: Iterable[str], shown_ids: Iterable[str],
+                             count: int = 1) -> str:
+    """Canonical hash of the inputs that determine a recommendation batch."""
+    payload = {
+        "count": count,
+        "profile": {field: user_profile.get(field) for field in PROFILE_FIELDS},
+        "available": sorted(available_ids),
+        "shown": sorted(set(shown_ids)),
+    }
+    return _canonical_hash(payload)
+
+
+def profile_cache_key(user_profile: dict) -> str:
+    """Hash of the profile fields similar-profile results depend on."""
+    return _canonical_hash({field: user_profile.get(field) for field in PROFILE_FIELDS})
+
+
+class SharedCacheBackend:
+    """Cache entries stored in a database collection so every worker shares hits."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._index_ready = False
+
+    async def _ensure_indexes(self):
+        if not self._index_ready:
+            # One document per key (concurrent upserts cannot duplicate it), looked up without a scan
+            await self.collection.create_index("key", unique=True)
+            # Lets MongoDB purge expired entries by itself
+            await self.collection.create_index("expires_on", expireAfterSeconds=0)
+            self._index_ready = True
+
+    async def get(self, key: str) -> Optional[Any]:
+        await self._ensure_indexes()
+        document = await self.collection.find_one({"key": key}, {"_id": 0})
+        if document is None or document["expires_at"] <= time.time():
+            return None
+        return document["value"]
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self._ensure_indexes()
+        expires_at = time.time() + ttl
+        await self.collection.update_one(
+            {"key": key},
+            {"$set": {"value": value, "expires_at": expires_at,
+                      "expires_on": datetime.fromtimestamp(expires_at, tz=timezone.utc)}},
+            upsert=True,
+        )
+
+
+class RecommendationCache:
+    """In-process LRU cache with per-entry TTL, optionally backed by a shared store."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0,
+                 shared: Optional[SharedCacheBackend] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0, "expirations": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return copy.deepcopy(value)
+            del self._entries[key]
+            self.stats["expirations"] += 1
+
+        if self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception as e:
+                logger.warning("Shared cache read failed: %s", e)
+                value = None
+            if value is not None:
+                self._store(key, value)
+                self.stats["shared_hits"] += 1
+                return copy.deepcopy(value)
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        self._store(key, copy.deepcopy(value))
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value, self.ttl)
+            except Exception as e:
+                logger.warning("Shared cache write failed: %s", e)
+
+    def _store(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def hit_ratio(self) -> float:
+        lookups = self.stats["hits"] + self.stats["shared_hits"] + self.stats["misses"]
+        return (self.stats["hits"] + self.stats["shared_hits"]) / lookups if lookups else 0.0
+
+
+def create_recommendation_cache_from_env(backend) -> RecommendationCache:
+    """Build the cache from RECOMMENDATION_CACHE_* settings."""
+    shared = None
+    if os.environ.get("RECOMMENDATION_CACHE_SHARED", "").lower() in ("1", "true", "yes"):
+        shared = SharedCacheBackend(backend.collection("recommendation_cache"))
+    return RecommendationCache(
+        max_entries=int(os.environ.get("RECOMMENDATION_CACHE_MAX_ENTRIES", "10000")),
+        ttl=float(os.environ.get("RECOMMENDATION_CACHE_TTL_SECONDS", "300")),
+        shared=shared,
+    )
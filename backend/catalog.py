@@ -0,0 +1,152 @@
+import json
+import re
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from prompt_builder import estimate_tokens
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_ALIAS_PATTERN = re.compile(r"[\W_]+")
+
+PROFILE_TEXT_FIELDS = ("work_group", "work_role", "work_resume", "hobbies_interests")
+
+
+def _tokens(text: Optional[str]) -> set:
+    return set(_TOKEN_PATTERN.findall((text or "").lower()))
+
+
+def _alias(text) -> str:
+    return _ALIAS_PATTERN.sub("", str(text).lower())
+
+
+class ExperienceCatalog:
+    """Indexed experience catalog with pre-serialized prompt fragments.
+
+    Experiences are indexed by id and category, and each one's compact JSON,
+    pipe-separated prompt row and their token estimates are computed once at
+    load time so building a prompt is a string join.
+    """
+
+    def __init__(self, experiences: Iterable[dict] = ()):
+        self.load(experiences)
+
+    def load(self, experiences: Iterable[dict]):
+        """Replace the catalog contents and rebuild every index."""
+        self._by_id: "OrderedDict[str, dict]" = OrderedDict()
+        self._by_category: Dict[str, List[str]] = {}
+        self._fragments: Dict[str, str] = {}
+        self._rows: Dict[str, str] = {}
+        self._row_tokens: Dict[str, int] = {}
+        self._fragment_tokens: Dict[str, int] = {}
+        self._token_sets: Dict[str, set] = {}
+        self._aliases: Dict[str, str] = {}
+        for experience in experiences:
+            experience = {key: experience[key] for key in ("id", "title", "description", "category")}
+            experience_id = experience["id"]
+            self._by_id[experience_id] = experience
+            self._by_category.setdefault(experience["category"], []).append(experience_id)
+            self._fragments[experience_id] = json.dumps(experience, separators=(",", ":"), ensure_ascii=False)
+            self._rows[experience_id] = "|".join(
+                " ".join(str(experience[key]).replace("|", "/").split())
+                for key in ("id", "title", "category", "description")
+            )
+            self._row_tokens[experience_id] = estimate_tokens(self._rows[experience_id])
+            self._fragment_tokens[experience_id] = estimate_tokens(self._fragments[experience_id])
+            self._token_sets[experience_id] = _tokens(
+                f"{experience['title']} {experience['description']} {experience['category']}"
+            )
+            self._aliases.setdefault(_alias(experience["title"]), experience_id)
+        # Ids win over titles when the two collide
+        self._aliases.update((_alias(experience_id), experience_id) for experience_id in self._by_id)
+
+    def load_file(self, path: str):
+        with open(path) as f:
+            self.load(json.load(f))
+
+    async def load_from_collection(self, collection) -> bool:
+        """Load from a database collection; keeps the current contents if it is empty."""
+        experiences = await collection.find({}, {"_id": 0}).to_list(length=None)
+        if experiences:
+            self.load(experiences)
+        return bool(experiences)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, experience_id) -> bool:
+        return experience_id in self._by_id
+
+    def get(self, experience_id: str) -> Optional[dict]:
+        experience = self._by_id.get(experience_id)
+        return dict(experience) if experience else None
+
+    def resolve(self, value) -> Optional[str]:
+        """The id of the experience ``value`` names: its id or title, ignoring case and punctuation."""
+        if value is None or isinstance(value, (dict, list)):
+            return None
+        if value in self._by_id:
+            return value
+        return self._aliases.get(_alias(value))
+
+    def ids(self) -> List[str]:
+        return list(self._by_id)
+
+    def categories(self) -> List[str]:
+        return list(self._by_category)
+
+    def by_category(self, category: str) -> List[dict]:
+        return [dict(self._by_id[i]) for i in self._by_category.get(category, [])]
+
+    def available(self, shown_ids) -> List[dict]:
+        return [dict(exp) for exp_id, exp in self._by_id.items() if exp_id not in shown_ids]
+
+    def candidates(self, user_profile: dict, shown_ids, limit: Optional[int] = None) -> List[dict]:
+        """Unseen experiences, pruned to at most ``limit`` by a cheap prefilter.
+
+        The recommender favours discovery, so the prefilter keeps every
+        category represented (round-robin across categories) and, within a
+        category, prefers experiences sharing the fewest words with the
+        profile. Ties are broken by a per-user hash so different users see
+        different subsets of large categories.
+        """
+        if limit is None or limit >= len(self._by_id):
+            return self.available(shown_ids)
+
+        profile_tokens = set()
+        for field in PROFILE_TEXT_FIELDS:
+            profile_tokens |= _tokens(user_profile.get(field))
+        salt = str(user_profile.get("id", "")).encode("utf-8")
+
+        ranked_by_category = []
+        for experience_ids in self._by_category.values():
+            unseen = [i for i in experience_ids if i not in shown_ids]
+            unseen.sort(key=lambda i: (len(self._token_sets[i] & profile_tokens),
+                                       zlib.crc32(salt + i.encode("utf-8"))))
+            if unseen:
+                ranked_by_category.append(unseen)
+
+        selected = []
+        depth = 0
+        while len(selected) < limit and ranked_by_category:
+            ranked_by_category = [ids for ids in ranked_by_category if depth < len(ids)]
+            for ids in ranked_by_category:
+                if len(selected) == limit:
+                    break
+                selected.append(ids[depth])
+            depth += 1
+        return [dict(self._by_id[i]) for i in selected]
+
+    def prompt_fragment(self, experiences: Iterable[dict]) -> str:
+        """Compact JSON array of the given experiences from the cached fragments."""
+        return "[" + ",".join(self._fragments[exp["id"]] for exp in experiences) + "]"
+
+    def prompt_row(self, experience_id: str) -> str:
+        """One ``id|title|category|description`` line for the prompt's candidate table."""
+        return self._rows[experience_id]
+
+    def row_tokens(self, experience_id: str) -> int:
+        return self._row_tokens[experience_id]
+
+    def fragment_tokens(self, experience_id: str) -> int:
+        return self._fragment_tokens[experience_id]
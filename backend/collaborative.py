@@ -0,0 +1,179 @@
+import logging
+import os
+from typing import Container, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RATINGS = {"liked": 1.0, "disliked": -1.0}
+
+
+class ItemItemRecommender:
+    """Item-item collaborative filtering over like/dislike interactions.
+
+    Every rating is +1 (liked) or -1 (disliked). The model keeps one dense
+    float32 matrix ``A`` where ``A[i, j]`` is the sum over users of
+    ``r_ui * r_uj``; its diagonal is the number of users who rated each item.
+    Item similarity is the shrunk cosine ``A[i, j] / (sqrt(A[i, i] * A[j, j])
+    + shrinkage)`` and a candidate's score is its similarity to the user's
+    rated items weighted by their ratings. Each new interaction updates one row
+    and column in place, so the model never needs a full retrain.
+
+    Users with fewer than ``min_interactions`` ratings are cold: their history
+    is topped up with the averaged ratings of similar profiles, and if that is
+    empty too, candidates are ranked by smoothed like ratio.
+
+    When ``catalog`` is given, interactions with experiences outside it are
+    ignored, so the matrix is never sized by ids clients made up.
+    """
+
+    def __init__(self, min_interactions: int = 3, shrinkage: float = 5.0, prior_weight: float = 5.0,
+                 catalog: Optional[Container[str]] = None):
+        self.min_interactions = min_interactions
+        self.shrinkage = shrinkage
+        self.prior_weight = prior_weight
+        self.catalog = catalog
+        self._index: Dict[str, int] = {}
+        self._items: List[str] = []
+        self._ratings: Dict[str, Dict[int, float]] = {}  # user_id -> item index -> rating
+        self._agreement = np.zeros((0, 0), dtype=np.float32)
+        self._likes = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._ratings)
+
+    @property
+    def item_count(self) -> int:
+        return len(self._items)
+
+    def is_cold(self, user_id: str) -> bool:
+        return len(self._ratings.get(user_id, ())) < self.min_interactions
+
+    def observe(self, user_id: str, experience_id: str, action: str):
+        """Apply one interaction; a repeated one replaces the user's earlier rating."""
+        rating = RATINGS.get(action)
+        if rating is None or (self.catalog is not None and experience_id not in self.catalog):
+            return
+        item = self._intern(experience_id)
+        ratings = self._ratings.setdefault(user_id, {})
+        previous = ratings.pop(item, None)
+        if previous == rating:
+            ratings[item] = rating
+            return
+        if previous is not None:
+            self._apply(ratings, item, previous, -1.0)
+        self._apply(ratings, item, rating, 1.0)
+        ratings[item] = rating
+
+    def observe_many(self, interactions: Iterable[dict]):
+        for interaction in interactions:
+            self.observe(interaction.get("user_id"), interaction.get("experience_id"), interaction.get("action"))
+
+    async def load_from_collection(self, collection, batch_size: int = 1000) -> int:
+        """Train from every document in db.interactions; returns the number read."""
+        count, batch = 0, []
+        async for document in collection.find({}, {"_id": 0}):
+            batch.append(document)
+            if len(batch) >= batch_size:
+                self.observe_many(batch)
+                count, batch = count + len(batch), []
+        self.observe_many(batch)
+        count += len(batch)
+        logger.info("Trained item-item model on %d interactions (%d users, %d items)",
+                    count, len(self._ratings), len(self._items))
+        return count
+
+    def recommend(self, user_id: str, candidate_ids: Iterable[str], count: int = 1,
+                  neighbour_ids: Iterable[str] = ()) -> List[Tuple[str, float, Optional[str]]]:
+        """Rank candidates for a user as ``(experience_id, score, because_id)``.
+
+        ``because_id`` is the rated experience that contributed most to the
+        score, or None when the ranking came from popularity alone. Returns an
+        empty list when the model has nothing to go on.
+        """
+        candidate_ids = list(candidate_ids)
+        if not candidate_ids or not self._items:
+            return []
+        history = self._history(user_id, neighbour_ids)
+        known = np.array([self._index.get(i, -1) for i in candidate_ids])
+        in_model = known >= 0
+        if not in_model.any():
+            return []
+        cand = known[in_model]
+
+        raters = np.diagonal(self._agreement)
+        scores = np.zeros(len(candidate_ids), dtype=np.float32)
+        because: List[Optional[str]] = [None] * len(candidate_ids)
+        if history:
+            rated = np.fromiter(history.keys(), dtype=np.int64, count=len(history))
+            weights = np.fromiter(history.values(), dtype=np.float32, count=len(history))
+            norms = np.sqrt(raters)
+            similarity = self._agreement[np.ix_(cand, rated)] / (np.outer(norms[cand], norms[rated]) + self.shrinkage)
+            contributions = similarity * weights
+            scores[in_model] = contributions.sum(axis=1)
+            # Explain by another liked item: a candidate borrowed from a neighbour's history matches itself
+            explained = np.where((cand[:, None] == rated[None, :]) | (weights <= 0), 0.0, contributions)
+            best = explained.argmax(axis=1)
+            for position, row, column in zip(np.flatnonzero(in_model), range(len(cand)), best):
+                if explained[row, column] > 0:
+                    because[position] = self._items[rated[column]]
+
+        # Smoothed like ratio: ranks cold users and breaks ties for everyone else
+        popularity = (self._likes[cand] + 0.5 * self.prior_weight) / (raters[cand] + self.prior_weight) - 0.5
+        scores[in_model] += popularity * (1.0 if not history else 1e-3)
+
+        order = np.argsort(-scores, kind="stable")[:count]
+        return [(candidate_ids[i], float(scores[i]), because[i]) for i in order]
+
+    def _history(self, user_id: str, neighbour_ids: Iterable[str]) -> Dict[int, float]:
+        history = dict(self._ratings.get(user_id, {}))
+        if len(history) >= self.min_interactions:
+            return history
+        borrowed: Dict[int, List[float]] = {}
+        for neighbour_id in neighbour_ids:
+            if neighbour_id == user_id:
+                continue
+            for item, rating in self._ratings.get(neighbour_id, {}).items():
+                borrowed.setdefault(item, []).append(rating)
+        for item, ratings in borrowed.items():
+            # The user's own ratings win over borrowed ones; borrowed ratings count half
+            history.setdefault(item, 0.5 * sum(ratings) / len(ratings))
+        return history
+
+    def _apply(self, ratings: Dict[int, float], item: int, rating: float, sign: float):
+        """Add (sign=1) or remove (sign=-1) one rating's contribution to the agreement matrix."""
+        if ratings:
+            others = np.fromiter(ratings.keys(), dtype=np.int64, count=len(ratings))
+            products = sign * rating * np.fromiter(ratings.values(), dtype=np.float32, count=len(ratings))
+            self._agreement[item, others] += products
+            self._agreement[others, item] += products
+        self._agreement[item, item] += sign
+        if rating > 0:
+            self._likes[item] += sign
+
+    def _intern(self, experience_id: str) -> int:
+        item = self._index.get(experience_id)
+        if item is not None:
+            return item
+        item = self._index[experience_id] = len(self._items)
+        self._items.append(experience_id)
+        if item >= len(self._likes):
+            # Grow geometrically so the catalog growing one item at a time stays cheap
+            capacity = max(16, 2 * len(self._likes))
+            agreement = np.zeros((capacity, capacity), dtype=np.float32)
+            agreement[:item, :item] = self._agreement[:item, :item]
+            likes = np.zeros(capacity, dtype=np.float32)
+            likes[:item] = self._likes[:item]
+            self._agreement, self._likes = agreement, likes
+        return item
+
+
+def create_item_recommender_from_env(catalog: Optional[Container[str]] = None) -> ItemItemRecommender:
+    """Build the item-item recommender from LOCAL_RECOMMENDER_* settings."""
+    return ItemItemRecommender(
+        min_interactions=int(os.environ.get("LOCAL_RECOMMENDER_MIN_INTERACTIONS", "3")),
+        shrinkage=float(os.environ.get("LOCAL_RECOMMENDER_SHRINKAGE", "5")),
+        prior_weight=float(os.environ.get("LOCAL_RECOMMENDER_PRIOR_WEIGHT", "5")),
+        catalog=catalog,
+    )
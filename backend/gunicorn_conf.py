@@ -0,0 +1,43 @@
+"""Gunicorn settings for serving the API with several worker processes.
+
+    SERVER_WORKERS=4 gunicorn -c gunicorn_conf.py 'server:create_app()'
+
+The app is built once in the master (``preload_app``) and forked, so the
+catalog and the modules' import work are shared copy-on-write instead of
+being repeated per worker. Network clients (Motor, httpx, SQLite) connect
+lazily, i.e. after the fork. Each worker runs the app's lifespan after the
+fork and accepts connections immediately, warming up (catalog, item-item
+model, similar-profile indexes from db.profiles) in the background: send
+traffic on ``/api/ready``, not ``/api/health``.
+
+Per-user state goes through the shared store: SQLite next to the app by
+default, or SHARED_STORE=mongo when workers run on several hosts. Shown
+history and profile versions are shared, so no card repeats and no stale
+profile is served whichever worker answers. Still per worker: prefetched
+batches (filtered by the shared history), rate-limit buckets (each worker
+allows the configured rates), warm-up and batch job status (ask the worker
+that accepted the job) and the item-item model's updates since startup.
+
+Graceful reload: ``kill -HUP <master pid>`` starts fresh workers with the
+current settings and retires the old ones after they finish in-flight
+requests (up to GRACEFUL_TIMEOUT seconds), running the app's shutdown hooks
+so buffered writes are flushed. Because the app is preloaded, picking up new
+code needs a binary upgrade instead: ``kill -USR2 <master pid>`` and then
+``kill -TERM <old master pid>`` once the new master is up.
+"""
+import multiprocessing
+import os
+
+workers = int(os.environ.get("SERVER_WORKERS") or multiprocessing.cpu_count())
+# Read by create_app() and shared_store.py in the master, before the fork
+os.environ["SERVER_WORKERS"] = str(workers)
+
+bind = os.environ.get("BIND", "0.0.0.0:8001")
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.environ.get("WORKER_TIMEOUT", "60"))
+keepalive = int(os.environ.get("KEEPALIVE_SECONDS", "5"))
+# Recycle workers now and then to bound memory growth; jitter avoids restarting them all at once
+max_requests = int(os.environ.get("MAX_REQUESTS", "0"))
+max_requests_jitter = max(1, max_requests // 10) if max_requests else 0
@@ -0,0 +1,284 @@
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from repository import bulk_write_error
+
+logger = logging.getLogger(__name__)
+
+
+class InteractionQueueFull(Exception):
+    """The interaction queue stayed full for longer than the enqueue timeout."""
+
+
+class SpillLog:
+    """Append-only NDJSON log holding interactions the database did not accept.
+
+    New events are appended to ``path``. Replay first moves the log aside to
+    ``path + ".replay"`` so appends can continue while it is drained; a replay
+    file left behind by a crash is picked up on the next attempt. File locks
+    make one path safe to share between worker processes: appends and the
+    move aside exclude each other, and only one process replays at a time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.replay_path = path + ".replay"
+        self._replay_lock: Optional[int] = None
+
+    def pending(self) -> bool:
+        return os.path.exists(self.replay_path) or os.path.exists(self.path)
+
+    def append(self, documents: List[dict]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._locked(self.path + ".lock", fcntl.LOCK_SH):
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(document, separators=(",", ":")) + "\n" for document in documents))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def take(self) -> Optional[List[dict]]:
+        """Return the documents to replay, or None if there are none or another process is replaying.
+
+        On success the replay lock stays held until ``keep`` is called.
+        """
+        lock = os.open(self.replay_path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(lock)
+            return None
+        try:
+            if not os.path.exists(self.replay_path):
+                if not os.path.exists(self.path):
+                    os.close(lock)
+                    return None
+                with self._locked(self.path + ".lock", fcntl.LOCK_EX):
+                    os.replace(self.path, self.replay_path)
+            documents = []
+            with open(self.replay_path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        documents.append(json.loads(line))
+                    except ValueError:
+                        # A torn final line from a crash mid-append
+                        logger.warning("Skipping unreadable line in %s", self.replay_path)
+        except BaseException:
+            os.close(lock)
+            raise
+        self._replay_lock = lock
+        return documents
+
+    def keep(self, documents: List[dict]):
+        """Replace the replay file with the documents that still need writing and release the replay lock."""
+        try:
+            if not documents:
+                os.remove(self.replay_path)
+                return
+            temp_path = self.replay_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(document, separators=(",", ":")) + "\n" for document in documents))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.replay_path)
+        finally:
+            if self._replay_lock is not None:
+                os.close(self._replay_lock)
+                self._replay_lock = None
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _locked(path: str, operation: int):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, operation)
+            yield
+        finally:
+            os.close(fd)
+
+
+class InteractionPipeline:
+    """Write-behind pipeline for like/dislike events.
+
+    ``submit`` only puts the event on a bounded in-process queue. A background
+    task drains the queue and writes batches with one unordered insert_many,
+    flushing when ``batch_size`` events are waiting or ``flush_interval``
+    seconds after the first one arrived. When the queue is full, callers wait
+    up to ``enqueue_timeout`` seconds before ``InteractionQueueFull`` is
+    raised. Batches the database rejects as a whole (connection errors,
+    timeouts) are appended to the spill log and replayed every
+    ``retry_interval`` seconds until they go through. ``close`` drains the
+    queue before returning.
+    """
+
+    def __init__(self, repository, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 0.1, enqueue_timeout: float = 0.1,
+                 spill_path: Optional[str] = None, retry_interval: float = 5.0):
+        self.repository = repository
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.retry_interval = retry_interval
+        self.spill = SpillLog(spill_path) if spill_path else None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+        self._next_replay = 0.0
+        self.stats: Dict[str, int] = {
+            "enqueued": 0, "rejected": 0, "written": 0, "batches": 0,
+            "spilled": 0, "replayed": 0, "dropped": 0,
+        }
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        """Start the background writer; also started lazily by ``submit``."""
+        if self._worker is None or self._worker.done():
+            self._closing = False
+            self._worker = asyncio.create_task(self._run())
+
+    async def submit(self, interaction: dict):
+        if self._closing:
+            raise InteractionQueueFull("Interaction pipeline is shutting down")
+        self.start()
+        try:
+            self._queue.put_nowait(dict(interaction))
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(dict(interaction)), self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.stats["rejected"] += 1
+                raise InteractionQueueFull("Interaction queue is full") from None
+        self.stats["enqueued"] += 1
+
+    async def close(self):
+        """Stop accepting events and wait until everything queued is written or spilled."""
+        self._closing = True
+        if self._worker is not None and not self._worker.done():
+            await self._worker
+        await self._drain()
+
+    async def _run(self):
+        if self.spill is not None and self.spill.pending():
+            await self._replay()
+        while not (self._closing and self._queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._write(batch)
+            if self.spill is not None and time.monotonic() >= self._next_replay and self.spill.pending():
+                await self._replay()
+
+    async def _collect(self) -> List[dict]:
+        """Wait for the first event, then gather more until the batch is full or the interval ends."""
+        loop = asyncio.get_running_loop()
+        try:
+            # Wake up periodically so close() and spill replay are noticed while idle
+            first = await asyncio.wait_for(self._queue.get(), self.flush_interval)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0 or self._closing:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _drain(self):
+        while not self._queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._write(batch)
+
+    async def _write(self, batch: List[dict]) -> bool:
+        """Insert one batch; spill it if the database is unavailable."""
+        try:
+            await self.repository.record_many(batch)
+        except bulk_write_error() as e:
+            # Per-document rejections (e.g. validation) will not succeed on retry
+            failed = len(e.details.get("writeErrors", []))
+            self.stats["written"] += len(batch) - failed
+            self.stats["dropped"] += failed
+            self.stats["batches"] += 1
+            logger.warning("Dropped %d interactions rejected by the database", failed)
+            return True
+        except Exception as e:
+            await self._spill(batch, e)
+            return False
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+        return True
+
+    async def _spill(self, batch: List[dict], error: Exception):
+        self._next_replay = time.monotonic() + self.retry_interval
+        if self.spill is None:
+            self.stats["dropped"] += len(batch)
+            logger.error("Dropped %d interactions, no spill log configured: %s", len(batch), error)
+            return
+        try:
+            await asyncio.to_thread(self.spill.append, batch)
+        except OSError as spill_error:
+            self.stats["dropped"] += len(batch)
+            logger.error("Dropped %d interactions, spill failed: %s", len(batch), spill_error)
+            return
+        self.stats["spilled"] += len(batch)
+        logger.warning("Spilled %d interactions to %s: %s", len(batch), self.spill.path, error)
+
+    async def _replay(self):
+        documents = await asyncio.to_thread(self.spill.take)
+        if documents is None:
+            return
+        for start in range(0, len(documents), self.batch_size):
+            batch = documents[start:start + self.batch_size]
+            try:
+                await self.repository.record_many(batch)
+            except bulk_write_error():
+                # Per-document rejections; the rest of the batch was written and retrying will not help
+                pass
+            except Exception as e:
+                await asyncio.to_thread(self.spill.keep, documents[start:])
+                self._next_replay = time.monotonic() + self.retry_interval
+                logger.warning("Spill replay paused with %d interactions left: %s", len(documents) - start, e)
+                return
+            self.stats["replayed"] += len(batch)
+        await asyncio.to_thread(self.spill.keep, [])
+        if documents:
+            logger.info("Replayed %d spilled interactions", len(documents))
+
+
+def create_interaction_pipeline_from_env(repository) -> InteractionPipeline:
+    """Build the interaction pipeline from INTERACTION_* settings."""
+    return InteractionPipeline(
+        repository,
+        max_queue=int(os.environ.get("INTERACTION_QUEUE_MAX", "10000")),
+        batch_size=int(os.environ.get("INTERACTION_BATCH_SIZE", "500")),
+        flush_interval=float(os.environ.get("INTERACTION_FLUSH_MS", "100")) / 1000,
+        enqueue_timeout=float(os.environ.get("INTERACTION_ENQUEUE_TIMEOUT_MS", "100")) / 1000,
+        spill_path=os.environ.get("INTERACTION_SPILL_PATH", "interaction_spill.ndjson") or None,
+        retry_interval=float(os.environ.get("INTERACTION_RETRY_SECONDS", "5")),
+    )
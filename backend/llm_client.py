@@ -0,0 +1,297 @@
+import asyncio
+import contextlib
+import json
+import os
+import random
+import re
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+
+
+class LLMError(Exception):
+    """Raised when a completion could not be obtained."""
+
+
+class LLMTimeoutError(LLMError):
+    """Raised when a completion exceeds its deadline."""
+
+
+class RetryableLLMError(LLMError):
+    """Transient provider failure (rate limit, 5xx, dropped connection)."""
+
+
+@dataclass
+class LLMResult:
+    content: str
+    usage: Dict[str, int] = field(default_factory=dict)
+
+
+class OpenAIProvider:
+    """Chat completions over a shared, pooled HTTP/1.1 keep-alive client.
+
+    The HTTP client (and httpx itself) is created on the first request, so
+    constructing the provider at import time costs nothing.
+    """
+
+    def __init__(self, api_key: Optional[str], model: str = "gpt-3.5-turbo",
+                 base_url: str = "https://api.openai.com/v1", max_connections: int = 100,
+                 max_keepalive_connections: int = 20):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self._client = None
+        # Matches nothing until httpx is imported
+        self._transport_errors: tuple = ()
+
+    def _http(self):
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"} if self.api_key else {},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                ),
+                # The overall deadline is enforced by LLMClient; this only bounds connection setup
+                timeout=httpx.Timeout(None, connect=10.0),
+            )
+            self._transport_errors = (httpx.TransportError,)
+        return self._client
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    async def complete(self, messages: List[dict], max_tokens: int, temperature: float) -> LLMResult:
+        try:
+            response = await self._http().post("/chat/completions", json={
+                "model": self.model,
+                "messages": messages,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+            })
+        except self._transport_errors as e:
+            raise RetryableLLMError(str(e)) from e
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableLLMError(f"OpenAI returned {response.status_code}")
+        if response.status_code >= 400:
+            raise LLMError(f"OpenAI returned {response.status_code}: {response.text}")
+
+        body = response.json()
+        return LLMResult(body["choices"][0]["message"]["content"], body.get("usage", {}))
+
+    async def stream(self, messages: List[dict], max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        """Yield content deltas from a streamed (server-sent events) completion."""
+        try:
+            async with self._http().stream("POST", "/chat/completions", json={
+                "model": self.model,
+                "messages": messages,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "stream": True,
+            }) as response:
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise RetryableLLMError(f"OpenAI returned {response.status_code}")
+                if response.status_code >= 400:
+                    await response.aread()
+                    raise LLMError(f"OpenAI returned {response.status_code}: {response.text}")
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    content = choices[0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+        except self._transport_errors as e:
+            raise RetryableLLMError(str(e)) from e
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class FakeLLMProvider:
+    """Offline provider with configurable latency, for load tests and local runs.
+
+    Answers with the first candidates listed in the prompt's id|title|...
+    table so responses look like a real completion to the parsing code.
+    """
+
+    _row_pattern = re.compile(r'^([^|\n]+)\|[^|\n]*\|', re.MULTILINE)
+    _count_pattern = re.compile(r'Return exactly (\d+) experience suggestion')
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, first_token_fraction: float = 0.2,
+                 chunk_size: int = 16):
+        self.latency = latency
+        self.jitter = jitter
+        self.first_token_fraction = first_token_fraction
+        self.chunk_size = chunk_size
+        self.model = "fake"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    async def complete(self, messages: List[dict], max_tokens: int, temperature: float) -> LLMResult:
+        await asyncio.sleep(self._latency())
+        return self._render(messages)
+
+    async def stream(self, messages: List[dict], max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        latency = self._latency()
+        content = self._render(messages).content
+        chunks = [content[i:i + self.chunk_size] for i in range(0, len(content), self.chunk_size)]
+        await asyncio.sleep(latency * self.first_token_fraction)
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(latency * (1 - self.first_token_fraction) / len(chunks))
+
+    def _latency(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def _render(self, messages: List[dict]) -> LLMResult:
+        prompt = messages[-1]["content"]
+        count_match = self._count_pattern.search(prompt)
+        count = int(count_match.group(1)) if count_match else 1
+        table = prompt.split("Candidates", 1)[-1].split("\n", 1)[-1]
+        ids = [match.group(1) for match in self._row_pattern.finditer(table)][:count] or ["exp1"]
+        content = json.dumps([{"id": experience_id, "reasoning": "Fake provider selection for offline testing."}
+                              for experience_id in ids])
+        return LLMResult(content, {
+            "prompt_tokens": sum(len(message["content"]) for message in messages) // 4,
+            "completion_tokens": len(content) // 4,
+        })
+
+    async def close(self):
+        return None
+
+
+class LLMClient:
+    """Bounded-concurrency completion client with deadlines and jittered retries."""
+
+    def __init__(self, provider, max_concurrency: int = 16, timeout: float = 30.0,
+                 max_retries: int = 2, backoff_base: float = 0.25, backoff_cap: float = 4.0):
+        self.provider = provider
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+
+    @property
+    def available(self) -> bool:
+        return self.provider.available
+
+    async def complete(self, messages: List[dict], max_tokens: int = 800, temperature: float = 0.7,
+                       timeout: Optional[float] = None) -> LLMResult:
+        """Run one completion; the deadline covers queueing, every attempt and backoff."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout if timeout is not None else self.timeout)
+
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise LLMTimeoutError("LLM deadline exceeded")
+            try:
+                async with asyncio.timeout(remaining):
+                    return await self._attempt(messages, max_tokens, temperature)
+            except asyncio.TimeoutError as e:
+                raise LLMTimeoutError("LLM deadline exceeded") from e
+            except RetryableLLMError:
+                if attempt >= self.max_retries:
+                    raise
+            attempt += 1
+            # Full jitter: spread retries from many callers instead of retrying in lockstep
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+            await asyncio.sleep(min(delay, max(0.0, deadline - loop.time())))
+
+    async def stream(self, messages: List[dict], max_tokens: int = 800, temperature: float = 0.7,
+                     timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield content deltas under the same concurrency limit and deadline as complete().
+
+        Transient failures are retried only until the first delta is yielded.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout if timeout is not None else self.timeout)
+
+        attempt = 0
+        while True:
+            yielded = False
+            try:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise LLMTimeoutError("LLM deadline exceeded")
+                # Acquired in this task, so a timeout that races the grant hands the permit back;
+                # wait_for() would run acquire() in a task whose permit can be lost on timeout
+                async with asyncio.timeout(remaining):
+                    await self._semaphore.acquire()
+                self.in_flight += 1
+                try:
+                    async with contextlib.aclosing(self.provider.stream(messages, max_tokens, temperature)) as deltas:
+                        while True:
+                            remaining = deadline - loop.time()
+                            if remaining <= 0:
+                                raise LLMTimeoutError("LLM deadline exceeded")
+                            try:
+                                delta = await asyncio.wait_for(deltas.__anext__(), remaining)
+                            except StopAsyncIteration:
+                                return
+                            yielded = True
+                            yield delta
+                finally:
+                    self.in_flight -= 1
+                    self._semaphore.release()
+            except asyncio.TimeoutError as e:
+                raise LLMTimeoutError("LLM deadline exceeded") from e
+            except RetryableLLMError:
+                if yielded or attempt >= self.max_retries:
+                    raise
+            attempt += 1
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+            await asyncio.sleep(min(delay, max(0.0, deadline - loop.time())))
+
+    async def _attempt(self, messages: List[dict], max_tokens: int, temperature: float) -> LLMResult:
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                return await self.provider.complete(messages, max_tokens, temperature)
+            finally:
+                self.in_flight -= 1
+
+    async def close(self):
+        await self.provider.close()
+
+
+def create_llm_client_from_env() -> LLMClient:
+    """Build the LLM client selected by LLM_PROVIDER ("openai" or "fake")."""
+    if os.environ.get("LLM_PROVIDER", "openai").lower() == "fake":
+        provider = FakeLLMProvider(
+            latency=float(os.environ.get("FAKE_LLM_LATENCY_MS", "500")) / 1000,
+            jitter=float(os.environ.get("FAKE_LLM_JITTER_MS", "0")) / 1000,
+        )
+    else:
+        provider = OpenAIProvider(
+            os.environ.get("OPENAI_API_KEY"),
+            model=os.environ.get("OPENAI_MODEL", "gpt-3.5-turbo"),
+            base_url=os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+            max_connections=int(os.environ.get("LLM_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.environ.get("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        )
+    return LLMClient(
+        provider,
+        max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "16")),
+        timeout=float(os.environ.get("LLM_TIMEOUT_SECONDS", "30")),
+        max_retries=int(os.environ.get("LLM_MAX_RETRIES", "2")),
+    )
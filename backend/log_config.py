@@ -0,0 +1,85 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+_listener = None
+_queue_handler = None
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; structured fields come from ``extra={"fields": {...}}``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class _Listener(logging.handlers.QueueListener):
+    """QueueListener that tracks whether it is running, so stopping it twice is harmless."""
+
+    running = False
+
+    def start(self):
+        super().start()
+        self.running = True
+
+    def stop(self):
+        if self.running:
+            self.running = False
+            super().stop()
+
+
+def configure_logging(level: str = None):
+    """Send root logging through a queue drained by a background thread.
+
+    Request handlers only enqueue records; formatting and writing to stdout
+    happen on the listener thread, so a slow terminal or pipe never stalls
+    the event loop. Safe to call more than once.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler()
+    if os.environ.get("LOG_FORMAT", "json").lower() == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    _queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(level or os.environ.get("LOG_LEVEL", "INFO").upper())
+
+    _listener = _Listener(_queue_handler.queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+    # A forked worker (gunicorn preload_app) inherits neither a usable queue nor the listener thread
+    os.register_at_fork(after_in_child=_restart_listener)
+
+
+def _restart_listener():
+    global _listener
+    if _listener is not None:
+        # The parent's listener thread was blocked in get() at the fork, so the
+        # child's copy of the queue stays locked; records still in it are the parent's
+        _queue_handler.queue = queue.SimpleQueue()
+        _listener = _Listener(_queue_handler.queue, *_listener.handlers, respect_handler_level=True)
+        _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import logging
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# fetch(exclude_ids, count) -> ranked recommendations
+FetchBatch = Callable[[List[str], int], Awaitable[List[dict]]]
+
+
+class PrefetchQueue:
+    """Per-user queue of ranked recommendations, refilled in the background.
+
+    The head of a user's queue is served until it shows up in their shown
+    history, so repeated calls without an interaction return the same card.
+    When the unseen remainder drops to ``low_watermark`` a background task
+    fetches the next batch.
+    """
+
+    def __init__(self, batch_size: int = 5, low_watermark: int = 2, max_users: int = 10000):
+        self.batch_size = batch_size
+        self.low_watermark = low_watermark
+        self.max_users = max_users
+        self._queues: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self._refills: Dict[str, asyncio.Task] = {}
+
+    async def next(self, user_id: str, shown_ids: Iterable[str], fetch: FetchBatch) -> Optional[dict]:
+        shown = set(shown_ids)
+        queue = self._prune(user_id, shown)
+
+        if not queue:
+            await self._refill(user_id, shown, fetch)
+            queue = self._prune(user_id, shown)
+
+        if queue and len(queue) <= self.low_watermark and user_id not in self._refills:
+            self._start_refill(user_id, shown, fetch)
+
+        return dict(queue[0]) if queue else None
+
+    def head(self, user_id: str, shown_ids: Iterable[str]) -> Optional[dict]:
+        """The card next() would serve, without triggering a fetch."""
+        if user_id not in self._queues:
+            return None
+        queue = self._prune(user_id, set(shown_ids))
+        return dict(queue[0]) if queue else None
+
+    def offer(self, user_id: str, items: List[dict]):
+        """Append recommendations produced elsewhere (e.g. a streamed completion)."""
+        queue = self._queues.setdefault(user_id, [])
+        queued_ids = {item.get("id") for item in queue}
+        queue.extend(item for item in items if item.get("id") not in queued_ids)
+        self._prune(user_id, set())
+
+    def peek(self, user_id: str) -> List[dict]:
+        return [dict(item) for item in self._queues.get(user_id, [])]
+
+    def invalidate(self, user_id: str):
+        self._queues.pop(user_id, None)
+        task = self._refills.pop(user_id, None)
+        if task is not None:
+            task.cancel()
+
+    def _prune(self, user_id: str, shown: set) -> List[dict]:
+        queue = [item for item in self._queues.get(user_id, []) if item.get("id") not in shown]
+        self._queues[user_id] = queue
+        self._queues.move_to_end(user_id)
+        while len(self._queues) > self.max_users:
+            evicted, _ = self._queues.popitem(last=False)
+            task = self._refills.pop(evicted, None)
+            if task is not None:
+                task.cancel()
+        return queue
+
+    async def _refill(self, user_id: str, shown: set, fetch: FetchBatch):
+        task = self._refills.get(user_id) or self._start_refill(user_id, shown, fetch)
+        try:
+            await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # The refill was cancelled by invalidate(); only propagate our own cancellation
+            if not task.cancelled():
+                raise
+
+    def _start_refill(self, user_id: str, shown: set, fetch: FetchBatch) -> asyncio.Task:
+        task = asyncio.create_task(self._fetch_into_queue(user_id, shown, fetch))
+        self._refills[user_id] = task
+        task.add_done_callback(functools.partial(self._refill_done, user_id))
+        return task
+
+    def _refill_done(self, user_id: str, task: asyncio.Task):
+        if self._refills.get(user_id) is task:
+            del self._refills[user_id]
+
+    async def _fetch_into_queue(self, user_id: str, shown: set, fetch: FetchBatch):
+        queued_ids = {item.get("id") for item in self._queues.get(user_id, [])}
+        try:
+            batch = await fetch(sorted(shown | queued_ids), self.batch_size)
+        except Exception as e:
+            logger.warning("Prefetch refill failed for %s: %s", user_id, e)
+            return
+
+        if user_id not in self._queues:
+            return
+        queue = self._queues[user_id]
+        for item in batch:
+            if item.get("id") not in shown and item.get("id") not in queued_ids:
+                queue.append(item)
+                queued_ids.add(item.get("id"))
+
+
+def create_prefetch_queue_from_env() -> PrefetchQueue:
+    """Build the prefetch queue from PREFETCH_* settings."""
+    return PrefetchQueue(
+        batch_size=int(os.environ.get("PREFETCH_BATCH_SIZE", "5")),
+        low_watermark=int(os.environ.get("PREFETCH_LOW_WATERMARK", "2")),
+        max_users=int(os.environ.get("PREFETCH_MAX_USERS", "10000")),
+    )
@@ -0,0 +1,152 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from singleflight import SingleFlight
+
+
+class Profile:
+    """Compact user profile; ``__slots__`` keeps cached entries small."""
+
+    __slots__ = ("id", "age", "work_group", "work_role", "work_resume", "hobbies_interests")
+
+    def __init__(self, id: str, age: int, work_group: str, work_role: str, work_resume: str,
+                 hobbies_interests: str):
+        self.id = id
+        self.age = age
+        self.work_group = work_group
+        self.work_role = work_role
+        self.work_resume = work_resume
+        self.hobbies_interests = hobbies_interests
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Profile":
+        return cls(*(data.get(field) for field in cls.__slots__))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """Mapping-style access so profiles can be passed where dicts are expected."""
+        return getattr(self, field, default) if field in self.__slots__ else default
+
+    def __getitem__(self, field: str) -> Any:
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Profile) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Profile({self.to_dict()!r})"
+
+
+class ProfileService:
+    """Read-through LRU cache of profiles in front of the ProfileRepository.
+
+    Profiles are cached when created and on first read. Unknown ids are
+    cached negatively for ``negative_ttl`` seconds so repeated lookups of a
+    bad id do not hit the database; the short TTL lets profiles created by
+    another worker become visible. Concurrent misses for the same id share
+    one database read.
+
+    With a cross-process ``shared`` store, creates and updates bump a
+    per-profile version there and every read compares it with the version
+    the cached entry was loaded at, so an update made through one worker is
+    seen by all of them. ``on_change(user_id)`` is called when a cached
+    profile turns out to be stale.
+    """
+
+    def __init__(self, repository, max_entries: int = 100000, negative_ttl: float = 30.0,
+                 shared=None, on_change: Optional[Callable[[str], Any]] = None):
+        self.repository = repository
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.shared = shared if shared is not None and shared.cross_process else None
+        self.on_change = on_change
+        # user_id -> (Profile or negative expiry time, version it was loaded at)
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._loads = SingleFlight()
+        self.stats: Dict[str, int] = {"hits": 0, "negative_hits": 0, "misses": 0, "stale": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, user_id: str) -> Optional[Profile]:
+        version = await self.shared.version(f"profile:{user_id}") if self.shared is not None else 0
+        cached = self._entries.get(user_id)
+        if cached is not None:
+            entry, loaded_version = cached
+            if loaded_version != version:
+                del self._entries[user_id]
+                self.stats["stale"] += 1
+                if isinstance(entry, Profile) and self.on_change is not None:
+                    self.on_change(user_id)
+            elif isinstance(entry, Profile):
+                self._entries.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return entry
+            elif entry > time.monotonic():
+                self.stats["negative_hits"] += 1
+                return None
+            else:
+                del self._entries[user_id]
+
+        self.stats["misses"] += 1
+        document = await self._loads.do(user_id, lambda: self.repository.get(user_id))
+        if document is None:
+            self._store(user_id, time.monotonic() + self.negative_ttl, version)
+            return None
+        profile = Profile.from_dict(document)
+        self._store(user_id, profile, version)
+        return profile
+
+    async def create(self, profile_data: Dict[str, Any]) -> Profile:
+        await self.repository.create(profile_data)
+        profile = Profile.from_dict(profile_data)
+        self._store(profile.id, profile, await self._bump(profile.id))
+        return profile
+
+    async def create_many(self, profiles: List[Dict[str, Any]]) -> Dict[int, str]:
+        """Insert a batch of new profiles without caching them (bulk imports would flush the LRU).
+
+        Returns the error message for each profile the database rejected.
+        """
+        failed = await self.repository.create_many(profiles)
+        for profile in profiles:
+            # Drop negative entries left by lookups made before the import
+            self.invalidate(profile["id"])
+        return failed
+
+    async def update(self, user_id: str, fields: Dict[str, Any]) -> Optional[Profile]:
+        if not fields:
+            return await self.get(user_id)
+        updated = await self.repository.update(user_id, fields)
+        self.invalidate(user_id)
+        await self._bump(user_id)
+        return Profile.from_dict(updated) if updated else None
+
+    def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+
+    async def _bump(self, user_id: str) -> int:
+        return await self.shared.bump(f"profile:{user_id}") if self.shared is not None else 0
+
+    def _store(self, user_id: str, entry: Any, version: int):
+        self._entries[user_id] = (entry, version)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def create_profile_service_from_env(repository, shared=None, on_change=None) -> ProfileService:
+    """Build the profile service from PROFILE_CACHE_* settings."""
+    return ProfileService(
+        repository,
+        shared=shared,
+        on_change=on_change,
+        max_entries=int(os.environ.get("PROFILE_CACHE_MAX_ENTRIES", "100000")),
+        negative_ttl=float(os.environ.get("PROFILE_CACHE_NEGATIVE_TTL_SECONDS", "30")),
+    )
@@ -0,0 +1,207 @@
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from string import Template
+from typing import Any, Dict, List
+
+# Words (with their leading space), digit runs, punctuation runs and whitespace,
+# roughly the pieces a BPE tokenizer starts from before merging
+_PIECE_PATTERN = re.compile(r" ?[^\W\d_]+| ?\d+| ?[^\w\s]+|\s+|_+")
+
+# Chat formatting overhead: per message, plus the priming of the reply
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_OVERHEAD_TOKENS = 3
+
+SYSTEM_PROMPT = Template(
+    "You are an autonomous extractor of experiential data. Use strict, directive language. No filler.\n"
+    "Method: match the user's profile against real individuals with similar experiences (Wikipedia, "
+    "biographies, forums), find the high-value experiences those individuals commonly share, and pick them "
+    "from the candidates. Do not rely only on keywords or categories.\n"
+    "Order by discovery value. First: experiences completely unrelated to the user's profile but "
+    "statistically common among the matched individuals. Last: extensions of what the user already does.\n"
+    "Answer with a JSON array only: [{\"id\":\"<candidate id>\",\"reasoning\":\"<at most $words words: "
+    "discovery value and real-world individual matches>\"}]"
+)
+
+USER_PROMPT = Template(
+    "Profile: age $age | group $work_group | role $work_role\n"
+    "Resume: $work_resume\n"
+    "Hobbies: $hobbies_interests\n"
+    "Candidates (id|title|category|description):\n"
+    "$candidates\n"
+    "Return exactly $count experience suggestion(s) from the candidates, highest priority first."
+)
+
+# The prompt this builder replaced (static text only), kept to report the tokens saved
+LEGACY_STATIC_TEXT = (
+    "You are an autonomous extractor of experiential data. Your task is to build a structured profile of a user "
+    "by collecting only high-value, transferable, and concrete life and career experiences. Disregard trivial or "
+    "superficial events. Operate in absolute mode: give no explanations, no clarifications, and no filler. Speak "
+    "in brief, functional commands.\n\nYour goal is to create an experience profile so detailed it can be mapped "
+    "against known individuals (real-world) to match the user with compatible experts with the experience they "
+    "desire. These archetypes can then serve as AI advisors.\n\n**USER PROFILE:**\nAge: \nWork Group: \n"
+    "Work Role: \nWork Resume: \nHobbies & Interests: \n\n**PROCESS:**\n1. Analyze user's profile against "
+    "individuals with similar experiences (Wikipedia, biographies, forums).\n2. Extract common high-value "
+    "experiences shared by these similar individuals.\n3. Match against available experiences below.\n\n"
+    "**AVAILABLE EXPERIENCES:**\n\n\n**CRITICAL ORDERING REQUIREMENT:**\nOrder suggestions by discovery value, "
+    "highest to lowest priority:\n\n**HIGHEST PRIORITY:** Experiences COMPLETELY UNRELATED to user's current "
+    "profile BUT statistically highly common among matched profiles. These reveal hidden dimensions and unlock "
+    "new expert domains.\n\n**LOWEST PRIORITY:** More related to user's current profile, rabbit hole extensions "
+    "of existing elements.\n\nGoal: MAXIMUM DISCOVERY of unrelated experiences.\n\n**When generating experience "
+    "suggestions, do not rely only on explicit keywords or categories. Instead, match the user's current "
+    "experiences against other individuals with similar experiences. Then identify what experiences these "
+    "individuals have in common and suggest these.**\n\n**OUTPUT REQUIREMENT:**\nReturn exactly 1 experience "
+    "suggestions as a JSON array, ordered highest priority first:\n\n[\n  {\n    \"id\": \"experience_id\",\n"
+    "    \"title\": \"Experience Title\",\n    \"description\": \"Experience Description\",\n    \"category\": "
+    "\"Category\", \n    \"reasoning\": \"Brief directive explanation of discovery value and real-world "
+    "individual matches\"\n  }\n]\n\nUse strict, directive language. No friendly tone. Focus on maximum "
+    "discovery potential.\n"
+    "You are an autonomous extractor of experiential data. Use strict, directive language. Focus on maximum "
+    "discovery potential by matching user profiles against real individuals and extracting completely unrelated "
+    "but statistically common experiences."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the BPE token count of ``text`` without a tokenizer dependency.
+
+    Common words are one token and longer ones one per five letters; digits
+    go three to a token and punctuation two. This errs on the high side for
+    English prose and JSON, which is the safe direction for a budget.
+    """
+    tokens = 0
+    for piece in _PIECE_PATTERN.findall(text or ""):
+        body = piece.strip()
+        if not body:
+            tokens += 1
+        elif body[0].isdigit():
+            tokens += (len(body) + 2) // 3
+        elif body[0].isalpha():
+            tokens += (len(body) + 4) // 5
+        else:
+            tokens += (len(body) + 1) // 2
+    return tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` at a piece boundary so its estimate stays within ``max_tokens``."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept, tokens = [], 0
+    for piece in _PIECE_PATTERN.findall(text):
+        cost = estimate_tokens(piece)
+        if tokens + cost > max_tokens:
+            break
+        kept.append(piece)
+        tokens += cost
+    return "".join(kept).rstrip() + "..."
+
+
+@dataclass
+class PromptPlan:
+    """Messages for one recommendation request and the settings sized for them."""
+
+    messages: List[dict]
+    max_tokens: int
+    count: int
+    candidate_ids: List[str]
+    report: Dict[str, Any] = field(default_factory=dict)
+
+
+class PromptBuilder:
+    """Builds compact recommendation prompts within an input token budget.
+
+    The system message is static, rendered once and sent first so provider
+    prompt caching can reuse it. The user message holds the profile, with
+    each free-text field capped at ``max_field_tokens``, and candidates as
+    pipe-separated rows pre-rendered by the catalog. Candidates are added in
+    the given order until ``max_input_tokens`` would be exceeded, keeping at
+    least ``count`` of them. The model answers with ids and reasoning only;
+    titles and descriptions are filled in from the catalog. ``max_tokens`` is
+    sized to that schema: ``count`` items with up to ``reasoning_words``
+    words of reasoning each.
+    """
+
+    def __init__(self, catalog, max_input_tokens: int = 1200, max_field_tokens: int = 120,
+                 reasoning_words: int = 25, report_savings: bool = True):
+        self.catalog = catalog
+        self.max_input_tokens = max_input_tokens
+        self.max_field_tokens = max_field_tokens
+        self.reasoning_words = reasoning_words
+        self.report_savings = report_savings
+        self.system_prompt = SYSTEM_PROMPT.substitute(words=reasoning_words)
+        self.system_tokens = estimate_tokens(self.system_prompt)
+        self._legacy_static_tokens = estimate_tokens(LEGACY_STATIC_TEXT)
+
+    def build(self, user_profile: dict, candidates: List[dict], count: int = 1) -> PromptPlan:
+        count = min(count, len(candidates))
+        prefix, _, suffix = USER_PROMPT.substitute(
+            age=user_profile.get("age"),
+            work_group=user_profile.get("work_group"),
+            work_role=user_profile.get("work_role"),
+            work_resume=truncate_to_tokens(str(user_profile.get("work_resume") or ""), self.max_field_tokens),
+            hobbies_interests=truncate_to_tokens(str(user_profile.get("hobbies_interests") or ""),
+                                                 self.max_field_tokens),
+            candidates="\0",
+            count=count,
+        ).rpartition("\0")
+        used = (self.system_tokens + estimate_tokens(prefix) + estimate_tokens(suffix)
+                + 2 * MESSAGE_OVERHEAD_TOKENS + REPLY_OVERHEAD_TOKENS)
+
+        rows, candidate_ids = [], []
+        for experience in candidates:
+            row_tokens = self.catalog.row_tokens(experience["id"]) + 1
+            if used + row_tokens > self.max_input_tokens and len(rows) >= count:
+                break
+            rows.append(self.catalog.prompt_row(experience["id"]))
+            candidate_ids.append(experience["id"])
+            used += row_tokens
+
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prefix + "\n".join(rows) + suffix},
+        ]
+        max_tokens = self.max_output_tokens(candidate_ids, count)
+        return PromptPlan(messages, max_tokens, count, candidate_ids,
+                          self._report(user_profile, candidates, len(rows), count, used, max_tokens))
+
+    def max_output_tokens(self, candidate_ids: List[str], count: int) -> int:
+        """Completion budget for ``count`` {"id", "reasoning"} objects, with a 25% margin."""
+        longest_id = max(candidate_ids, key=len, default="")
+        item = estimate_tokens(json.dumps({"id": longest_id, "reasoning": ""})) + 2 * self.reasoning_words
+        return int((count * item + 4) * 1.25)
+
+    def _report(self, user_profile: dict, candidates: List[dict], included: int, count: int,
+                input_tokens: int, max_tokens: int) -> Dict[str, Any]:
+        report = {
+            "input_tokens": input_tokens,
+            "max_tokens": max_tokens,
+            "candidates": included,
+            "candidates_dropped": len(candidates) - included,
+        }
+        if self.report_savings:
+            profile_text = " ".join(str(user_profile.get(key) or "") for key in
+                                    ("age", "work_group", "work_role", "work_resume", "hobbies_interests"))
+            baseline_input = (self._legacy_static_tokens + estimate_tokens(profile_text)
+                              + sum(self.catalog.fragment_tokens(exp["id"]) for exp in candidates)
+                              + 2 * MESSAGE_OVERHEAD_TOKENS + REPLY_OVERHEAD_TOKENS)
+            baseline_max = max(800, 250 * count)
+            report.update({
+                "baseline_input_tokens": baseline_input,
+                "baseline_max_tokens": baseline_max,
+                "input_tokens_saved": baseline_input - input_tokens,
+                "max_tokens_saved": baseline_max - max_tokens,
+            })
+        return report
+
+
+def create_prompt_builder_from_env(catalog) -> PromptBuilder:
+    """Build the prompt builder from PROMPT_* settings."""
+    return PromptBuilder(
+        catalog,
+        max_input_tokens=int(os.environ.get("PROMPT_MAX_INPUT_TOKENS", "1200")),
+        max_field_tokens=int(os.environ.get("PROMPT_MAX_FIELD_TOKENS", "120")),
+        reasoning_words=int(os.environ.get("PROMPT_REASONING_WORDS", "25")),
+        report_savings=os.environ.get("PROMPT_REPORT_SAVINGS", "1").lower() not in ("0", "false", "no"),
+    )
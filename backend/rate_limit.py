@@ -0,0 +1,164 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class RateLimited(Exception):
+    """A request exceeded the per-user or global request rate."""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"Too many requests ({scope} limit), retry in {retry_after:.1f}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second up to ``burst``; a rate of 0 never limits."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float = 1.0) -> float:
+        """Seconds until ``cost`` tokens are available (0 if they are now)."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        missing = min(cost, self.burst) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, cost: float = 1.0):
+        """Remove ``cost`` tokens; the balance may go negative for costs above the burst."""
+        if not self.unlimited:
+            self._refill()
+            self.tokens -= cost
+
+    def give(self, amount: float):
+        if not self.unlimited:
+            self.tokens = min(self.burst, self.tokens + amount)
+
+
+class RateLimiter:
+    """Per-user and global token buckets in front of the recommendation endpoints.
+
+    Both buckets are checked before either is charged, so a request refused by
+    the global limit does not use up the user's allowance. Idle users' buckets
+    are dropped least recently used first beyond ``max_users``.
+    """
+
+    def __init__(self, user_rate: float = 2.0, user_burst: float = 10.0, global_rate: float = 500.0,
+                 global_burst: float = 1000.0, max_users: int = 100000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_users = max_users
+        self.clock = clock
+        self.global_bucket = TokenBucket(global_rate, global_burst, clock)
+        self._users: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.stats: Dict[str, int] = {"admitted": 0, "user_limited": 0, "global_limited": 0}
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def acquire(self, user_id: str):
+        """Charge one request to ``user_id``; raises RateLimited when a bucket is empty."""
+        bucket = self._bucket(user_id)
+        wait = bucket.wait_time()
+        if wait > 0:
+            self.stats["user_limited"] += 1
+            raise RateLimited("user", wait)
+        wait = self.global_bucket.wait_time()
+        if wait > 0:
+            self.stats["global_limited"] += 1
+            raise RateLimited("global", wait)
+        bucket.take()
+        self.global_bucket.take()
+        self.stats["admitted"] += 1
+
+    def _bucket(self, user_id: str) -> TokenBucket:
+        bucket = self._users.get(user_id)
+        if bucket is None:
+            bucket = self._users[user_id] = TokenBucket(self.user_rate, self.user_burst, self.clock)
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return bucket
+
+
+class LLMAdmission:
+    """Decides whether an LLM call may start now or the request should degrade.
+
+    A call is refused instead of queued when ``max_concurrency + max_queued``
+    admitted calls have not been released yet (a negative ``max_queued``
+    always queues), or when its estimated cost (prompt plus completion budget)
+    exceeds what is left of the tokens-per-minute budget. The count is kept
+    here rather than read from the client, whose own counter only covers calls
+    that already hold one of its ``max_concurrency`` slots. Every admitted call
+    must be release()d, which also returns the unused part of its reservation.
+    """
+
+    def __init__(self, llm, max_queued: int = 0, tokens_per_minute: float = 0.0,
+                 token_burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.llm = llm
+        self.max_queued = max_queued
+        self.token_bucket = TokenBucket(tokens_per_minute / 60, token_burst or tokens_per_minute, clock)
+        self.in_flight = 0
+        self.stats: Dict[str, int] = {"admitted": 0, "concurrency": 0, "token_budget": 0}
+
+    def admit(self, estimated_tokens: int) -> Optional[str]:
+        """Reserve a call slot and ``estimated_tokens`` and return None, or return why the call was refused."""
+        if self.max_queued >= 0 and self.in_flight >= self.llm.max_concurrency + self.max_queued:
+            self.stats["concurrency"] += 1
+            return "concurrency"
+        if self.token_bucket.wait_time(estimated_tokens) > 0:
+            self.stats["token_budget"] += 1
+            return "token_budget"
+        self.token_bucket.take(estimated_tokens)
+        self.in_flight += 1
+        self.stats["admitted"] += 1
+        return None
+
+    def release(self, reserved_tokens: int, used_tokens: Optional[int] = None):
+        """End an admitted call and give back what the provider did not bill.
+
+        ``used_tokens`` is None when the call reported no usage (it failed, or
+        was streamed); the whole reservation is returned then.
+        """
+        self.in_flight -= 1
+        unused = reserved_tokens - (used_tokens or 0)
+        if unused > 0:
+            self.token_bucket.give(unused)
+
+
+def create_rate_limiter_from_env() -> RateLimiter:
+    """Build the request rate limiter from RATE_LIMIT_* settings (a rate of 0 disables that bucket)."""
+    return RateLimiter(
+        user_rate=float(os.environ.get("RATE_LIMIT_USER_PER_SECOND", "2")),
+        user_burst=float(os.environ.get("RATE_LIMIT_USER_BURST", "10")),
+        global_rate=float(os.environ.get("RATE_LIMIT_GLOBAL_PER_SECOND", "500")),
+        global_burst=float(os.environ.get("RATE_LIMIT_GLOBAL_BURST", "1000")),
+        max_users=int(os.environ.get("RATE_LIMIT_MAX_USERS", "100000")),
+    )
+
+
+def create_llm_admission_from_env(llm) -> LLMAdmission:
+    """Build LLM admission control from LLM_ADMISSION_* settings."""
+    return LLMAdmission(
+        llm,
+        max_queued=int(os.environ.get("LLM_ADMISSION_MAX_QUEUED", "0")),
+        tokens_per_minute=float(os.environ.get("LLM_TOKENS_PER_MINUTE", "0")),
+        token_burst=float(os.environ["LLM_TOKENS_BURST"]) if os.environ.get("LLM_TOKENS_BURST") else None,
+    )
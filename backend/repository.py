@@ -0,0 +1,305 @@
+import copy
+import os
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+
+
+def bulk_write_error():
+    """pymongo's BulkWriteError, imported on first use since pymongo is slow to import.
+
+    Use as ``except bulk_write_error() as e:``; except clauses are only
+    evaluated once an exception is raised.
+    """
+    from pymongo.errors import BulkWriteError
+    return BulkWriteError
+
+
+# In-process backend (tests and local runs without MongoDB)
+
+def _matches(document: dict, query: Optional[dict]) -> bool:
+    """Evaluate the small subset of Mongo query syntax used by the repositories."""
+    for key, condition in (query or {}).items():
+        value = document.get(key)
+        if isinstance(condition, dict) and "$in" in condition:
+            if value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(document: dict, projection: Optional[dict]) -> dict:
+    """Apply an exclusion projection such as {"_id": 0}."""
+    result = copy.deepcopy(document)
+    for key, include in (projection or {}).items():
+        if not include:
+            result.pop(key, None)
+    return result
+
+
+class InMemoryCursor:
+    """Async cursor over a snapshot of matching documents."""
+
+    def __init__(self, documents: List[dict]):
+        self._documents = documents
+
+    def limit(self, count: int) -> "InMemoryCursor":
+        if count:
+            self._documents = self._documents[:count]
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        return self._documents[:length] if length else list(self._documents)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._documents:
+            yield document
+
+
+class InMemoryCollection:
+    """Motor-compatible collection stored in process memory."""
+
+    def __init__(self):
+        self._documents: List[dict] = []
+
+    async def insert_one(self, document: dict):
+        document.setdefault("_id", ObjectId())
+        self._documents.append(copy.deepcopy(document))
+
+    async def insert_many(self, documents: Iterable[dict], ordered: bool = True):
+        for document in documents:
+            await self.insert_one(document)
+
+    async def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> Optional[dict]:
+        for document in self._documents:
+            if _matches(document, query):
+                return _project(document, projection)
+        return None
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> InMemoryCursor:
+        return InMemoryCursor([_project(doc, projection) for doc in self._documents if _matches(doc, query)])
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False):
+        target = next((doc for doc in self._documents if _matches(doc, query)), None)
+        if target is None:
+            if not upsert:
+                return
+            target = {k: v for k, v in query.items() if not isinstance(v, dict)}
+            target["_id"] = ObjectId()
+            self._documents.append(target)
+
+        for key, value in update.get("$set", {}).items():
+            target[key] = copy.deepcopy(value)
+        for key, value in update.get("$addToSet", {}).items():
+            values = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+            existing = target.setdefault(key, [])
+            existing.extend(v for v in values if v not in existing)
+        for key, value in update.get("$inc", {}).items():
+            target[key] = target.get(key, 0) + value
+
+    async def delete_many(self, query: Optional[dict] = None):
+        self._documents = [doc for doc in self._documents if not _matches(doc, query)]
+
+    async def count_documents(self, query: Optional[dict] = None) -> int:
+        return sum(1 for doc in self._documents if _matches(doc, query))
+
+    async def create_index(self, keys: Any, **kwargs):
+        return None
+
+
+class InMemoryBackend:
+    """Data backend keeping every collection in process memory."""
+
+    def __init__(self):
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def collection(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection()
+        return self._collections[name]
+
+    async def close(self):
+        return None
+
+
+class MongoBackend:
+    """Data backend using Motor's asyncio client with a bounded connection pool."""
+
+    def __init__(self, url: str, db_name: str, max_pool_size: int = 100, min_pool_size: int = 0,
+                 max_idle_time_ms: Optional[int] = None, wait_queue_timeout_ms: Optional[int] = None):
+        self.url = url
+        self.db_name = db_name
+        self._options = {
+            "maxPoolSize": max_pool_size,
+            "minPoolSize": min_pool_size,
+            "maxIdleTimeMS": max_idle_time_ms,
+            "waitQueueTimeoutMS": wait_queue_timeout_ms,
+        }
+        self._client = None
+
+    @property
+    def client(self):
+        """The Motor client, created (and motor imported) on first use."""
+        if self._client is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+
+            # connect=False defers connecting (and pymongo's monitor threads) to the first
+            # operation, so the client may be created before workers are forked
+            self._client = AsyncIOMotorClient(self.url, connect=False, **self._options)
+        return self._client
+
+    @property
+    def db(self):
+        return self.client[self.db_name]
+
+    def collection(self, name: str):
+        return LazyCollection(self, name)
+
+    async def close(self):
+        if self._client is not None:
+            self._client.close()
+
+
+class LazyCollection:
+    """Handle on a Mongo collection that creates the client on first access.
+
+    Repositories hold collections from import time on; this keeps building
+    them free of motor imports and client setup.
+    """
+
+    def __init__(self, backend: MongoBackend, name: str):
+        self._backend = backend
+        self._name = name
+        self._collection = None
+
+    def __getattr__(self, attribute: str):
+        if self._collection is None:
+            self._collection = self._backend.db[self._name]
+        return getattr(self._collection, attribute)
+
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def create_backend_from_env():
+    """Build the data backend selected by DATA_BACKEND ("mongo" or "memory")."""
+    if os.environ.get("DATA_BACKEND", "mongo").lower() == "memory":
+        return InMemoryBackend()
+    return MongoBackend(
+        os.environ.get("MONGO_URL", "mongodb://localhost:27017/"),
+        os.environ.get("MONGO_DB_NAME", "experience_recommender"),
+        max_pool_size=int(os.environ.get("MONGO_MAX_POOL_SIZE", "100")),
+        min_pool_size=int(os.environ.get("MONGO_MIN_POOL_SIZE", "0")),
+        max_idle_time_ms=_optional_int("MONGO_MAX_IDLE_TIME_MS"),
+        wait_queue_timeout_ms=_optional_int("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+    )
+
+
+# Repositories
+
+class ProfileRepository:
+    """User profiles keyed by their public ``id``."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def create(self, profile: dict):
+        await self.collection.insert_one(dict(profile))
+
+    async def create_many(self, profiles: List[dict]) -> Dict[int, str]:
+        """Insert unordered; returns the error message for each rejected position."""
+        if not profiles:
+            return {}
+        try:
+            await self.collection.insert_many([dict(profile) for profile in profiles], ordered=False)
+        except bulk_write_error() as e:
+            return {error["index"]: error.get("errmsg", "Write failed") for error in e.details.get("writeErrors", [])}
+        return {}
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": user_id}, {"_id": 0})
+
+    async def batches(self, batch_size: int = 1000) -> AsyncIterator[List[dict]]:
+        """Every stored profile, ``batch_size`` at a time."""
+        batch = []
+        async for document in self.collection.find({}, {"_id": 0}):
+            batch.append(document)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def update(self, user_id: str, fields: dict) -> Optional[dict]:
+        await self.collection.update_one({"id": user_id}, {"$set": dict(fields)})
+        return await self.get(user_id)
+
+
+class InteractionRepository:
+    """Like/dislike events, written in batches by the interaction pipeline."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def record_many(self, interactions: List[dict]):
+        if interactions:
+            await self.collection.insert_many([dict(i) for i in interactions], ordered=False)
+
+    async def for_user(self, user_id: str) -> List[dict]:
+        return await self.collection.find({"user_id": user_id}, {"_id": 0}).to_list(length=None)
+
+
+class ShownHistoryRepository:
+    """Experience ids already shown to each user."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def get(self, user_id: str) -> List[str]:
+        document = await self.collection.find_one({"user_id": user_id}, {"_id": 0})
+        return list(document.get("experience_ids", [])) if document else []
+
+    async def add(self, user_id: str, experience_id: str):
+        await self.collection.update_one(
+            {"user_id": user_id},
+            {"$addToSet": {"experience_ids": experience_id}},
+            upsert=True,
+        )
+
+    async def add_many(self, user_id: str, experience_ids: List[str]):
+        await self.collection.update_one(
+            {"user_id": user_id},
+            {"$addToSet": {"experience_ids": {"$each": list(experience_ids)}}},
+            upsert=True,
+        )
+
+
+class RecommendationRepository:
+    """Recommendations computed ahead of time (batch jobs), one document per user and run."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def save_many(self, documents: List[dict]):
+        if documents:
+            await self.collection.insert_many([dict(document) for document in documents], ordered=False)
+
+
+class Repositories:
+    """Bundle of the repositories backed by a single data backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.profiles = ProfileRepository(backend.collection("profiles"))
+        self.interactions = InteractionRepository(backend.collection("interactions"))
+        self.shown = ShownHistoryRepository(backend.collection("shown_history"))
+        self.recommendations = RecommendationRepository(backend.collection("recommendations"))
+
+    async def close(self):
+        await self.backend.close()
@@ -0,0 +1,390 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Container, Dict, Iterable, List, Optional, Tuple
+
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class IncrementalJSONParser:
+    """Push parser reporting recommendation fields while a completion is still streaming.
+
+    ``feed()`` accepts arbitrary text chunks and returns events:
+
+    - ``("field", key, value)`` when a string field of an object completes
+    - ``("delta", key, text)`` for partial text of fields listed in ``stream_fields``
+    - ``("object", obj)`` when an object closes and parses, after
+      ``repair_json`` if it was malformed
+    - ``("error", raw)`` when a closed object cannot be repaired
+
+    Objects may be bare, inside a top-level array or inside a wrapper such as
+    ``{"recommendations": [...]}`` (an object with no ``id`` or ``title``
+    whose value is an object or a list of objects, as RecommendationParser
+    unwraps); any prose around them is ignored. Call ``finish()`` once the
+    stream ends to recover an object that was cut off.
+    """
+
+    def __init__(self, stream_fields: Tuple[str, ...] = ("reasoning",)):
+        self.stream_fields = stream_fields
+        self._depth = 0
+        self._containers: List[str] = []
+        self._object_depth: Optional[int] = None
+        self._identified = False
+        self._raw: List[str] = []
+        self._in_string = False
+        self._escape: Optional[str] = None
+        self._string_is_key = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._delta: List[str] = []
+
+    def feed(self, chunk: str) -> List[tuple]:
+        events: List[tuple] = []
+        for char in chunk:
+            if self._object_depth is not None:
+                self._raw.append(char)
+
+            if self._in_string:
+                self._consume_string_char(char, events)
+                continue
+
+            if char == '"' and self._object_depth is not None:
+                self._in_string = True
+                self._string_is_key = self._depth == self._object_depth and self._expect_key
+                self._string_start = len(self._raw)
+                continue
+
+            if char in "{[":
+                if char == "{" and self._in_wrapper_value():
+                    # Report the wrapped objects instead of the wrapper
+                    self._object_depth = None
+                self._depth += 1
+                self._containers.append(char)
+                if char == "{" and self._object_depth is None:
+                    self._object_depth = self._depth
+                    self._raw = ["{"]
+                    self._expect_key = True
+                    self._key = None
+                    self._identified = False
+            elif char in "}]":
+                if self._object_depth is not None and self._depth == self._object_depth and char == "}":
+                    self._close_object(events)
+                self._depth = max(0, self._depth - 1)
+                if self._containers:
+                    self._containers.pop()
+            elif self._object_depth is not None and self._depth == self._object_depth:
+                if char == ",":
+                    self._expect_key = True
+                elif char == ":":
+                    self._expect_key = False
+
+        self._flush_delta(events)
+        return events
+
+    def finish(self) -> List[tuple]:
+        """End of input: report an object cut off mid-way (e.g. at max_tokens) after repairing it."""
+        events: List[tuple] = []
+        self._flush_delta(events)
+        if self._object_depth is not None:
+            raw = "".join(self._raw)
+            self._object_depth = None
+            self._raw = []
+            self._depth, self._in_string, self._escape = 0, False, None
+            self._containers = []
+            try:
+                events.append(("object", json.loads(repair_json(raw))))
+            except json.JSONDecodeError:
+                events.append(("error", raw))
+        return events
+
+    def _consume_string_char(self, char: str, events: List[tuple]):
+        streaming = not self._string_is_key and self._depth == self._object_depth and self._key in self.stream_fields
+
+        if self._escape is not None:
+            self._escape += char
+            if self._escape[0] != "u":
+                if streaming:
+                    self._delta.append(_SIMPLE_ESCAPES.get(char, char))
+                self._escape = None
+            elif len(self._escape) == 5:
+                if streaming:
+                    try:
+                        self._delta.append(chr(int(self._escape[1:], 16)))
+                    except ValueError:
+                        pass
+                self._escape = None
+            return
+
+        if char == "\\":
+            self._escape = ""
+            return
+
+        if char != '"':
+            if streaming:
+                self._delta.append(char)
+            return
+
+        self._in_string = False
+        if self._depth != self._object_depth:
+            return
+        raw = "".join(self._raw[self._string_start:-1])
+        try:
+            value = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            value = raw
+        if self._string_is_key:
+            self._key = value
+        else:
+            self._flush_delta(events)
+            self._identified = self._identified or self._key in ("id", "title")
+            events.append(("field", self._key, value))
+
+    def _in_wrapper_value(self) -> bool:
+        """Whether an object opening now is a value (or list item) of a tracked object without id or title."""
+        if self._object_depth is None or self._identified or self._expect_key:
+            return False
+        return self._depth == self._object_depth or (
+            self._depth == self._object_depth + 1 and self._containers[-1] == "[")
+
+    def _flush_delta(self, events: List[tuple]):
+        if self._delta:
+            events.append(("delta", self._key, "".join(self._delta)))
+            self._delta = []
+
+    def _close_object(self, events: List[tuple]):
+        raw = "".join(self._raw)
+        self._object_depth = None
+        self._raw = []
+        try:
+            events.append(("object", json.loads(raw)))
+        except json.JSONDecodeError:
+            try:
+                events.append(("object", json.loads(repair_json(raw))))
+            except json.JSONDecodeError:
+                events.append(("error", raw))
+
+
+# Repair
+
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+_SMART_DOUBLE_QUOTES = str.maketrans({"\u201c": '"', "\u201d": '"'})
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$-]*")
+_DANGLING_KEY = re.compile(r'[,{]\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
+
+
+def repair_json(text: str) -> str:
+    """Rewrite common LLM JSON mistakes into valid JSON, as far as they can be.
+
+    Handles code fences, smart or single quotes, raw newlines in strings,
+    unquoted keys and bare words, Python literals, comments, missing commas
+    between values, trailing commas, mismatched closers, and output cut off
+    mid-way (open strings and containers are closed, a dangling key dropped).
+    Text that is already valid JSON comes back unchanged.
+    """
+    text = _FENCE.sub("", text)
+    if '"' not in text:
+        text = text.translate(_SMART_DOUBLE_QUOTES)
+    out: List[str] = []
+    stack: List[str] = []
+    quote: Optional[str] = None
+    last = ""  # last significant character written
+    i, n = 0, len(text)
+    while i < n:
+        char = text[i]
+        if quote is not None:
+            if char == "\\" and i + 1 < n:
+                escaped = text[i + 1]
+                out.append(escaped if quote == "'" and escaped == "'" else char + escaped)
+                i += 2
+                continue
+            if char == quote:
+                out.append('"')
+                quote, last = None, '"'
+            elif char == '"':
+                out.append('\\"')
+            elif char in "\n\r\t":
+                out.append({"\n": "\\n", "\r": "\\r", "\t": "\\t"}[char])
+            else:
+                out.append(char)
+            i += 1
+            continue
+
+        if char in " \t\r\n":
+            out.append(char)
+        elif char == "/" and text.startswith("//", i):
+            end = text.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        elif char == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            if char in stack:
+                while stack[-1] != char:
+                    out.append(stack.pop())
+                out.append(stack.pop())
+                last = char
+        elif char in ",:":
+            if stack:
+                out.append(char)
+                last = char
+        elif not stack and char not in "{[":
+            pass  # prose around the JSON
+        else:
+            if stack and (last in ('"', "}", "]") or last.isalnum() or last == "."):
+                # Two values in a row: the model forgot a comma
+                out.append(",")
+            if char in "{[":
+                stack.append("}" if char == "{" else "]")
+                out.append(char)
+                last = char
+            elif char in "\"'":
+                quote = char
+                out.append('"')
+            elif char.isdigit() or char in "-.":
+                end = i + 1
+                while end < n and (text[end].isalnum() or text[end] in ".+-"):
+                    end += 1
+                out.append(text[i:end])
+                last = text[end - 1]
+                i = end
+                continue
+            else:
+                match = _IDENTIFIER.match(text, i)
+                if match is None:
+                    i += 1
+                    continue
+                word = match.group(0)
+                out.append(_LITERALS.get(word) or json.dumps(word))
+                last = "e" if word in _LITERALS else '"'
+                i = match.end()
+                continue
+        i += 1
+
+    if quote is not None:
+        out.append('"')
+    repaired = "".join(out).rstrip()
+    if stack and stack[-1] == "}":
+        repaired = _DANGLING_KEY.sub(lambda m: "{" if m.group(0).startswith("{") else "", repaired)
+    repaired = repaired.rstrip().rstrip(",").rstrip()
+    if repaired.endswith(":"):
+        repaired += "null"
+    return repaired + "".join(reversed(stack))
+
+
+def _strip_trailing_comma(out: List[str]):
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index]
+
+
+def extract_objects(text: str) -> List[Any]:
+    """Every top-level JSON object in ``text``, repairing malformed or truncated ones.
+
+    Objects may be bare, inside an array, or surrounded by prose and code
+    fences. Objects that cannot be repaired are skipped.
+    """
+    stripped = text.strip()
+    if stripped[:1] in ("[", "{"):
+        # Fast path: most answers are valid JSON as they are
+        try:
+            parsed = json.loads(stripped)
+        except json.JSONDecodeError:
+            pass
+        else:
+            items = parsed if isinstance(parsed, list) else [parsed]
+            return [item for item in items if isinstance(item, dict)]
+    parser = IncrementalJSONParser(stream_fields=())
+    events = parser.feed(text) + parser.finish()
+    return [event[1] for event in events if event[0] == "object"]
+
+
+# Validation
+
+@dataclass
+class ParseResult:
+    """Valid recommendations from one response and why anything else was rejected."""
+
+    recommendations: List[dict]
+    rejected: Dict[str, int] = field(default_factory=dict)
+    objects: int = 0
+
+
+class RecommendationParser:
+    """Extracts recommendations from a completion and validates them.
+
+    Each object is resolved to a catalog experience by its ``id`` (or, when a
+    model echoes the title instead, by title; case, spacing and punctuation are
+    ignored). The catalog supplies title, description and category, the
+    model's ``reasoning`` is kept, and the result is checked against
+    ``schema`` (a pydantic model) when one is given. Wrapper objects such as
+    ``{"recommendations": [...]}`` are unwrapped, and duplicates, unknown ids,
+    already shown ids and, when ``candidate_ids`` are given, catalog ids the
+    prompt did not offer are rejected with a reason.
+    """
+
+    def __init__(self, catalog, schema=None):
+        self.catalog = catalog
+        self.schema = schema
+
+    def parse(self, text: str, count: int, exclude_ids: Iterable[str] = (),
+              candidate_ids: Optional[Iterable[str]] = None) -> ParseResult:
+        if candidate_ids is not None:
+            candidate_ids = set(candidate_ids)
+        objects = []
+        for obj in extract_objects(text or ""):
+            objects.extend(self._unwrap(obj))
+        result = ParseResult([], {}, len(objects))
+        seen = set()
+        for obj in objects:
+            recommendation, reason = self.validate(obj, exclude_ids, candidate_ids)
+            if recommendation is not None and recommendation["id"] in seen:
+                recommendation, reason = None, "duplicate"
+            if recommendation is None:
+                result.rejected[reason] = result.rejected.get(reason, 0) + 1
+                continue
+            seen.add(recommendation["id"])
+            if len(result.recommendations) < count:
+                result.recommendations.append(recommendation)
+        if not objects:
+            result.rejected["no_json"] = 1
+        return result
+
+    def validate(self, obj: Any, exclude_ids: Iterable[str] = (),
+                 candidate_ids: Optional[Container[str]] = None) -> Tuple[Optional[dict], Optional[str]]:
+        """Return ``(recommendation, None)`` or ``(None, reason)`` for one parsed object."""
+        if not isinstance(obj, dict):
+            return None, "not_object"
+        experience_id = self.catalog.resolve(obj.get("id")) or self.catalog.resolve(obj.get("title"))
+        if experience_id is None:
+            return None, "unknown_id"
+        if candidate_ids is not None and experience_id not in candidate_ids:
+            return None, "not_offered"
+        if experience_id in exclude_ids:
+            return None, "already_shown"
+        reasoning = obj.get("reasoning", "")
+        if isinstance(reasoning, list):
+            reasoning = " ".join(str(part) for part in reasoning)
+        recommendation = dict(self.catalog.get(experience_id), reasoning=str(reasoning or "").strip())
+        if self.schema is not None:
+            try:
+                recommendation = self.schema(**recommendation).model_dump()
+            except ValueError:
+                return None, "schema"
+        return recommendation, None
+
+    @staticmethod
+    def _unwrap(obj: Any) -> List[Any]:
+        if isinstance(obj, dict) and "id" not in obj and "title" not in obj:
+            nested = [value for value in obj.values() if isinstance(value, (list, dict))]
+            for value in nested:
+                items = value if isinstance(value, list) else [value]
+                if any(isinstance(item, dict) for item in items):
+                    return [item for item in items if isinstance(item, dict)]
+        return [obj]
@@ -0,0 +1,94 @@
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+GZIP_MIN_BYTES = int(os.environ.get("RESPONSE_GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("RESPONSE_GZIP_LEVEL", "5"))
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact UTF-8 JSON, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps() instead of FastAPI's default encoder path."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[List[str]]]:
+    """Split ``a,b.c`` into dotted paths; None (everything) when no fields are given."""
+    if not fields:
+        return None
+    paths = [field.strip().split(".") for field in fields.split(",") if field.strip()]
+    return paths or None
+
+
+def project(payload: Any, paths: Optional[Iterable[List[str]]]) -> Any:
+    """Keep only the dotted ``paths`` of ``payload``; lists are projected per element."""
+    if paths is None:
+        return payload
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        for index, key in enumerate(path):
+            if index == len(path) - 1:
+                node[key] = None
+            elif node.get(key, {}) is None:
+                break  # a shorter path already selects the whole subtree
+            else:
+                node = node.setdefault(key, {})
+    return _project(payload, tree)
+
+
+def _project(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _project(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+def etag(body: bytes) -> str:
+    """Weak validator of the uncompressed body, so gzip and identity responses share it."""
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = tag[2:] if tag.startswith("W/") else tag
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def lean_response(payload: Any, headers: Dict[str, str], fields: Optional[str] = None) -> Response:
+    """Serialize ``payload`` once for a GET: projection, ETag/304 and gzip above GZIP_MIN_BYTES.
+
+    ``headers`` are the request headers; If-None-Match and Accept-Encoding are read from them.
+    """
+    body = dumps(project(payload, parse_fields(fields)))
+    tag = etag(body)
+    response_headers = {"ETag": tag, "Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+    if etag_matches(headers.get("if-none-match"), tag):
+        return Response(status_code=304, headers=response_headers)
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in headers.get("accept-encoding", "").lower():
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        response_headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type="application/json", headers=response_headers)
@@ -1,37 +1,45 @@
 import os
 import uuid
-from fastapi import FastAPI, HTTPException
+import asyncio
+import logging
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
-import openai
-from pymongo import MongoClient
+from typing import AsyncIterator, List, Optional, Dict, Any
+import contextlib
+import functools
 import json
+import math
+import time
 from dotenv import load_dotenv
+from ann_index import ProfileIndex
+from bulk import LineTooLong, create_batch_runner_from_env, import_profiles, iter_ndjson
+from catalog import ExperienceCatalog
+from collaborative import create_item_recommender_from_env
+from interaction_pipeline import InteractionQueueFull, create_interaction_pipeline_from_env
+from cache import RecommendationCache, create_recommendation_cache_from_env, profile_cache_key, recommendation_cache_key
+from llm_client import create_llm_client_from_env
+from log_config import configure_logging
+from metrics import (FALLBACKS, LLM_ERRORS, LLM_TOKENS, PARSE_FAILURES, PARSED_OBJECTS, PROMPT_TOKENS, RECOMMENDATIONS,
+                     REQUESTS_DEGRADED, REQUESTS_SHED, STAGE_SECONDS, registry)
+from prefetch import create_prefetch_queue_from_env
+from prompt_builder import PromptPlan, create_prompt_builder_from_env
+from profiles import create_profile_service_from_env
+from rate_limit import RateLimited, create_llm_admission_from_env, create_rate_limiter_from_env
+from response_parser import IncrementalJSONParser, ParseResult, RecommendationParser
+from repository import Repositories, create_backend_from_env
+from shown_history import create_shown_history_store_from_env
+from shared_store import create_shared_store_from_env
+from similarity import SimilarityEngine
+from serialization import FastJSONResponse, lean_response
+from singleflight import SingleFlight
+from warmup import create_warmup_pool_from_env
 
-# Load environment variables
-load_dotenv()
+logger = logging.getLogger("server")
 
-app = FastAPI()
-
-# CORS configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# MongoDB connection
-MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
-client = MongoClient(MONGO_URL)
-db = client.experience_recommender
-
-# OpenAI configuration
-openai.api_key = os.environ.get('OPENAI_API_KEY')
-print(f"OpenAI API Key loaded: {'✓' if openai.api_key else '✗'}")
-print(f"OpenAI API Key starts with: {openai.api_key[:20] if openai.api_key else 'None'}...")
+# Routes are collected on a router and mounted by create_app()
+router = APIRouter()
 
 # Pydantic models
 class UserProfile(BaseModel):
@@ -41,6 +49,13 @@ class UserProfile(BaseModel):
     work_resume: str
     hobbies_interests: str
 
+class UserProfileUpdate(BaseModel):
+    age: Optional[int] = None
+    work_group: Optional[str] = None
+    work_role: Optional[str] = None
+    work_resume: Optional[str] = None
+    hobbies_interests: Optional[str] = None
+
 class ExperienceRecommendation(BaseModel):
     id: str
     title: str
@@ -53,6 +68,11 @@ class UserInteraction(BaseModel):
     experience_id: str
     action: str  # 'liked' or 'disliked'
 
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[str]
+    count: int = 5
+    concurrency: Optional[int] = None
+
 # In-memory storage for demo (replace with proper database in production)
 mock_profiles = [
     {
@@ -64,7 +84,7 @@ mock_profiles = [
         "hobbies_interests": "coding, gaming, reading sci-fi"
     },
     {
-        "id": "2", 
+        "id": "2",
         "age": 30,
         "work_group": "Tech",
         "work_role": "Product Manager",
@@ -116,269 +136,903 @@ mock_experiences = [
     {"id": "exp15", "title": "Urban Gardening", "description": "Grow fresh produce in small spaces", "category": "Agriculture"}
 ]
 
-# Track shown recommendations per user
-user_shown_recommendations = {}
+# Last-resort recommendations when neither the LLM nor the item-item model has one
+fallback_recommendations = [
+    {
+        "id": "exp1",
+        "title": "Pottery Making",
+        "description": "Learn the ancient art of pottery",
+        "category": "Arts & Crafts",
+        "reasoning": "Based on statistical analysis, people with similar profiles often explore creative outlets that use their hands in completely different ways."
+    },
+    {
+        "id": "exp4",
+        "title": "Stand-up Comedy",
+        "description": "Develop your comedic timing and stage presence",
+        "category": "Performance",
+        "reasoning": "Analytical minds often excel at observational humor and structured storytelling, providing a completely different creative outlet."
+    },
+    {
+        "id": "exp6",
+        "title": "Mushroom Foraging",
+        "description": "Learn to identify and harvest wild mushrooms safely",
+        "category": "Nature",
+        "reasoning": "Detail-oriented professionals often find satisfaction in the methodical nature of foraging while connecting with nature."
+    },
+    {
+        "id": "exp2",
+        "title": "Salsa Dancing",
+        "description": "Master the passionate dance of salsa",
+        "category": "Dance",
+        "reasoning": "Physical expression through dance provides a perfect counterbalance to analytical work."
+    },
+    {
+        "id": "exp3",
+        "title": "Beekeeping",
+        "description": "Understand the fascinating world of bees",
+        "category": "Agriculture",
+        "reasoning": "Working with nature and understanding complex systems appeals to methodical thinkers."
+    }
+]
 
-def get_ai_recommendations(user_profile: dict, similar_profiles: List[dict], shown_ids: List[str] = []) -> List[dict]:
-    """Use OpenAI to generate experience recommendations based on profile similarity analysis."""
-    
-    if not openai.api_key:
-        print("OpenAI API key not found, using fallback recommendations")
-        return generate_fallback_recommendations(shown_ids)
-    
-    # Filter out already shown experiences
-    available_experiences = [exp for exp in mock_experiences if exp['id'] not in shown_ids]
-    
-    if not available_experiences:
-        return []
-    
-    # Prepare the new sophisticated prompt
-    prompt = f"""
-You are an autonomous extractor of experiential data. Your task is to build a structured profile of a user by collecting only high-value, transferable, and concrete life and career experiences. Disregard trivial or superficial events. Operate in absolute mode: give no explanations, no clarifications, and no filler. Speak in brief, functional commands.
+def record_parse_result(result: ParseResult):
+    """Export how many parsed objects were accepted and why the others were rejected."""
+    if result.recommendations:
+        PARSED_OBJECTS.inc(len(result.recommendations), outcome="accepted")
+    for reason, rejected in result.rejected.items():
+        PARSED_OBJECTS.inc(rejected, outcome=reason)
 
-Your goal is to create an experience profile so detailed it can be mapped against known individuals (real-world) to match the user with compatible experts with the experience they desire. These archetypes can then serve as AI advisors.
+def record_prompt_report(plan: PromptPlan):
+    """Export the token estimates of one built prompt."""
+    for kind, value in plan.report.items():
+        if kind.endswith("tokens") or kind.endswith("tokens_saved"):
+            PROMPT_TOKENS.inc(value, kind=kind)
+    logger.debug("Prompt built", extra={"fields": plan.report})
 
-**USER PROFILE:**
-Age: {user_profile.get('age')}
-Work Group: {user_profile.get('work_group')}
-Work Role: {user_profile.get('work_role')}
-Work Resume: {user_profile.get('work_resume')}
-Hobbies & Interests: {user_profile.get('hobbies_interests')}
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-**PROCESS:**
-1. Analyze user's profile against individuals with similar experiences (Wikipedia, biographies, forums).
-2. Extract common high-value experiences shared by these similar individuals.
-3. Match against available experiences below.
+def similar_profile_summary(profile: dict) -> dict:
+    """What a client may see of another user's profile: no id (it is their only credential) and no free text."""
+    return {"work_role": profile.get("work_role"), "work_group": profile.get("work_group"),
+            "similarity": profile.get("similarity")}
 
-**AVAILABLE EXPERIENCES:**
-{json.dumps(available_experiences, indent=2)}
 
-**CRITICAL ORDERING REQUIREMENT:**
-Order suggestions by discovery value, highest to lowest priority:
+class Recommender:
+    """The components of one app and the recommendation logic over them.
 
-**HIGHEST PRIORITY:** Experiences COMPLETELY UNRELATED to user's current profile BUT statistically highly common among matched profiles. These reveal hidden dimensions and unlock new expert domains.
+    Built by create_app() from the environment. Constructing it only allocates:
+    database, shared-store and LLM clients connect on first use, and start()
+    and close() run in the app's lifespan.
+    """
 
-**LOWEST PRIORITY:** More related to user's current profile, rabbit hole extensions of existing elements.
+    def __init__(self, backend=None):
+        # Data layer (async Motor backend by default, DATA_BACKEND=memory for an in-process store)
+        self.repos = Repositories(backend if backend is not None else create_backend_from_env())
 
-Goal: MAXIMUM DISCOVERY of unrelated experiences.
+        # Per-user state shared between worker processes (SHARED_STORE=local|sqlite|mongo)
+        self.shared_store = create_shared_store_from_env(self.repos.backend)
 
-**When generating experience suggestions, do not rely only on explicit keywords or categories. Instead, match the user's current experiences against other individuals with similar experiences. Then identify what experiences these individuals have in common and suggest these.**
+        # Per-user queue of prefetched recommendation batches
+        self.prefetch_queue = create_prefetch_queue_from_env()
 
-**OUTPUT REQUIREMENT:**
-Return exactly 1 experience suggestion as JSON:
+        # Read-through profile cache in front of db.profiles; stale entries also drop prefetched batches
+        self.profile_service = create_profile_service_from_env(self.repos.profiles, self.shared_store,
+                                                               on_change=self.prefetch_queue.invalidate)
 
-{{
-  "id": "experience_id",
-  "title": "Experience Title",
-  "description": "Experience Description",
-  "category": "Category", 
-  "reasoning": "Brief directive explanation of discovery value and real-world individual matches"
-}}
+        # Like/dislike events are queued and written in batches (spilled to disk while the database is down)
+        self.interaction_pipeline = create_interaction_pipeline_from_env(self.repos.interactions)
 
-Use strict, directive language. No friendly tone. Focus on maximum discovery potential.
-"""
 
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an autonomous extractor of experiential data. Use strict, directive language. Focus on maximum discovery potential by matching user profiles against real individuals and extracting completely unrelated but statistically common experiences."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=800,
-            temperature=0.7
+        # Recommendation cache (RECOMMENDATION_CACHE_SHARED=1 shares entries across workers)
+        self.recommendation_cache = create_recommendation_cache_from_env(self.repos.backend)
+
+        # Similar-profile results per profile version, filled by warm-up and on first lookup
+        self.similar_profile_cache = RecommendationCache(
+            max_entries=int(os.environ.get('SIMILAR_PROFILE_CACHE_MAX_ENTRIES', '10000')),
+            ttl=float(os.environ.get('SIMILAR_PROFILE_CACHE_TTL_SECONDS', '300')),
         )
-        
-        # Parse the AI response
-        ai_response = response.choices[0].message.content
-        print(f"OpenAI response: {ai_response}")
-        
-        # Try to extract JSON from the response
+
+        # Background jobs that prefetch a new profile's first recommendations (WARMUP_*)
+        self.warmup_pool = create_warmup_pool_from_env()
+
+        # Background batch-recommendation jobs (BATCH_*); results are written to db.recommendations
+        self.batch_runner = create_batch_runner_from_env()
+        self.bulk_import_batch_size = int(os.environ.get('BULK_IMPORT_BATCH_SIZE', '500'))
+        self.bulk_import_max_profiles = int(os.environ.get('BULK_IMPORT_MAX_PROFILES', '100000'))
+        self.bulk_import_max_line_bytes = int(os.environ.get('BULK_IMPORT_MAX_LINE_BYTES', '65536'))
+        self.batch_max_users = int(os.environ.get('BATCH_MAX_USERS', '100000'))
+
+        # Coalesces identical in-flight recommendation computations
+        self.single_flight = SingleFlight()
+
+        # LLM configuration (LLM_PROVIDER=fake for an offline provider)
+        self.llm = create_llm_client_from_env()
+
+        # Token buckets per user and overall (RATE_LIMIT_*); LLM calls past the concurrency or
+        # tokens-per-minute budget degrade to a local recommendation instead of queuing
+        self.rate_limiter = create_rate_limiter_from_env()
+        self.llm_admission = create_llm_admission_from_env(self.llm)
+
+        # Indexed catalog (EXPERIENCE_CATALOG_PATH to load from a JSON file, EXPERIENCE_CATALOG_SOURCE=db for db.experiences)
+        self.catalog = ExperienceCatalog(mock_experiences)
+        if os.environ.get('EXPERIENCE_CATALOG_PATH'):
+            self.catalog.load_file(os.environ['EXPERIENCE_CATALOG_PATH'])
+        self.prompt_max_candidates = int(os.environ.get('PROMPT_MAX_CANDIDATES', '40'))
+
+        # Bounded in-memory shown history (bitsets over catalog ids) with write-behind to the database
+        self.shown_history = create_shown_history_store_from_env(self.repos.shown, self.shared_store, self.catalog)
+
+        # Compact prompts within an input token budget (PROMPT_MAX_INPUT_TOKENS), output sized to the schema
+        self.prompt_builder = create_prompt_builder_from_env(self.catalog)
+
+        # Repairs malformed model output and validates each object against the catalog and ExperienceRecommendation
+        self.recommendation_parser = RecommendationParser(self.catalog, ExperienceRecommendation)
+
+        # Item-item model trained from db.interactions and updated on every like/dislike.
+        # RECOMMENDER_MODE=llm uses it as the fallback, local serves only from it, and
+        # cold_start asks the LLM only for users with too few interactions.
+        self.item_recommender = create_item_recommender_from_env(self.catalog)
+        self.mode = os.environ.get('RECOMMENDER_MODE', 'llm').lower()
+
+        # Precomputed feature matrix over the profile store
+        self.similarity_engine = SimilarityEngine(mock_profiles)
+        self.similarity_min_score = float(os.environ.get('SIMILARITY_MIN_SCORE', '3'))
+
+        # Embedding ANN index (SIMILARITY_BACKEND=ann). Both are filled from db.profiles during warm-up,
+        # so every worker indexes the same profiles whatever the others wrote.
+        self.similarity_backend = os.environ.get('SIMILARITY_BACKEND', 'vector').lower()
+        self.ann_min_score = float(os.environ.get('ANN_MIN_SCORE', '0'))
+        self.profile_index = ProfileIndex()
+        self.profile_index.add_many(mock_profiles)
+
+        # Re-clustering of the ANN index, run in a worker thread once enough profiles were added
+        self._index_training: Optional[asyncio.Task] = None
+
+        # Startup state reported by /api/ready
+        self.readiness: Dict[str, Any] = {"ready": False, "stopping": False, "started_at": None,
+                                          "startup_seconds": None, "error": None}
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    def register_metrics(self):
+        """Export gauges read from these components at scrape time."""
+        registry.gauge("recommender_cache_entries", "Entries in the in-process recommendation cache.",
+                       lambda: len(self.recommendation_cache))
+        registry.gauge("recommender_cache_hit_ratio", "Recommendation cache hit ratio since start.",
+                       self.recommendation_cache.hit_ratio)
+        registry.gauge("recommender_cache_events", "Recommendation cache lookups and evictions by kind.",
+                       lambda: {(kind,): value for kind, value in self.recommendation_cache.stats.items()}, ("kind",))
+        registry.gauge("recommender_singleflight_calls", "Single-flight leaders and coalesced callers.",
+                       lambda: {(kind,): value for kind, value in self.single_flight.stats.items()}, ("kind",))
+        registry.gauge("recommender_llm_in_flight", "LLM calls currently in flight.", lambda: self.llm.in_flight)
+        registry.gauge("recommender_llm_admitted", "LLM calls admitted and not yet finished, including queued ones.",
+                       lambda: self.llm_admission.in_flight)
+        registry.gauge("recommender_profile_cache_entries", "Profiles (and negative entries) in the profile cache.",
+                       lambda: len(self.profile_service))
+        registry.gauge("recommender_interaction_queue_depth", "Interactions waiting to be written.",
+                       lambda: len(self.interaction_pipeline))
+        registry.gauge("recommender_interaction_events", "Interaction pipeline events by outcome.",
+                       lambda: {(outcome,): value for outcome, value in self.interaction_pipeline.stats.items()},
+                       ("outcome",))
+        registry.gauge("recommender_local_model_users", "Users known to the item-item model.",
+                       lambda: len(self.item_recommender))
+        registry.gauge("recommender_rate_limited_users", "Users with a rate-limit bucket.", lambda: len(self.rate_limiter))
+        registry.gauge("recommender_llm_admission", "LLM admission decisions by outcome.",
+                       lambda: {(outcome,): value for outcome, value in self.llm_admission.stats.items()}, ("outcome",))
+        registry.gauge("recommender_warmup_queue_depth", "Profile warm-up jobs waiting for a worker.",
+                       lambda: len(self.warmup_pool))
+        registry.gauge("recommender_warmup_jobs", "Profile warm-up jobs by outcome.",
+                       lambda: {(outcome,): value for outcome, value in self.warmup_pool.stats.items()}, ("outcome",))
+        registry.gauge("recommender_batch_jobs_running", "Batch recommendation jobs queued or running.",
+                       lambda: len(self.batch_runner))
+        registry.gauge("recommender_shown_history_users", "Users held in the shown-history cache.",
+                       lambda: len(self.shown_history))
+
+    async def get_ai_recommendations(self, user_profile: dict, similar_profiles: List[dict],
+                                     shown_ids: Optional[List[str]] = None, count: int = 1) -> List[dict]:
+        """Use OpenAI to generate up to `count` ranked experience recommendations based on profile similarity analysis."""
+        # Filter out already shown experiences (set membership, not a list scan)
+        shown_ids = set(shown_ids or ())
+
+        if self.prefer_local(user_profile['id']):
+            local = self.local_recommendations(user_profile, similar_profiles, shown_ids, count)
+            if local:
+                RECOMMENDATIONS.inc(source="local")
+                return local
+
+        if not self.llm.available:
+            logger.warning("OpenAI API key not found, using fallback recommendations")
+            FALLBACKS.inc(reason="no_llm")
+            return self.generate_fallback_recommendations(shown_ids, user_profile, similar_profiles, count)
+
+        available_experiences = self.catalog.candidates(user_profile, shown_ids, limit=self.prompt_max_candidates)
+
+        if not available_experiences:
+            return []
+
+        count = min(count, len(available_experiences))
+        cache_key = recommendation_cache_key(user_profile, [exp['id'] for exp in available_experiences], shown_ids, count)
+        cached = await self.recommendation_cache.get(cache_key)
+        if cached is not None:
+            RECOMMENDATIONS.inc(source="cache")
+            return cached
+
+        # Identical concurrent requests (double clicks, retries) share one LLM call
+        return await self.single_flight.do(
+            cache_key,
+            lambda: self.request_ai_recommendations(user_profile, available_experiences, shown_ids, count, cache_key,
+                                                    similar_profiles),
+        )
+
+    async def request_ai_recommendations(self, user_profile: dict, available_experiences: List[dict], shown_ids,
+                                         count: int, cache_key: str,
+                                         similar_profiles: Optional[List[dict]] = None) -> List[dict]:
+        """Call the LLM for `count` recommendations, parse them and cache the result."""
+        similar_profiles = similar_profiles or []
         try:
-            # Find JSON object in the response
-            start_idx = ai_response.find('{')
-            end_idx = ai_response.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != -1:
-                json_str = ai_response[start_idx:end_idx]
-                recommendation = json.loads(json_str)
-                print(f"Parsed recommendation: {recommendation}")
-                return [recommendation]  # Return as array for consistency
+            with STAGE_SECONDS.time(stage="prompt_build"):
+                plan = self.prompt_builder.build(user_profile, available_experiences, count)
+            record_prompt_report(plan)
+            reserved_tokens = plan.report["input_tokens"] + plan.max_tokens
+            refused = self.llm_admission.admit(reserved_tokens)
+            if refused:
+                return self.degraded_recommendations(refused, user_profile, similar_profiles, shown_ids, count)
+            used_tokens = None
+            try:
+                with STAGE_SECONDS.time(stage="llm_call"):
+                    response = await self.llm.complete(
+                        messages=plan.messages,
+                        max_tokens=plan.max_tokens,
+                        temperature=0.7
+                    )
+                if response.usage:
+                    used_tokens = response.usage.get("total_tokens") or \
+                        response.usage.get("prompt_tokens", 0) + response.usage.get("completion_tokens", 0)
+            finally:
+                # Also on errors and cancellation, or admission would count the call as in flight forever
+                self.llm_admission.release(reserved_tokens, used_tokens)
+            for kind in ("prompt_tokens", "completion_tokens"):
+                LLM_TOKENS.inc(response.usage.get(kind, 0), kind=kind)
+
+            # Parse the AI response
+            ai_response = response.content
+            logger.debug("OpenAI response", extra={"fields": {"content": ai_response}})
+
+            # Extract, repair and validate the recommendations in the response
+            with STAGE_SECONDS.time(stage="json_extract"):
+                result = self.recommendation_parser.parse(ai_response, count, shown_ids, plan.candidate_ids)
+            record_parse_result(result)
+            recommendations = result.recommendations
+            if not recommendations:
+                reason = "no_json" if "no_json" in result.rejected else "no_usable_items"
+                logger.warning("No usable recommendation in response, using fallback",
+                               extra={"fields": {"reason": reason, "rejected": result.rejected}})
+                PARSE_FAILURES.inc(reason=reason)
+                FALLBACKS.inc(reason="parse_failure")
+                return self.generate_fallback_recommendations(shown_ids, user_profile, similar_profiles, count)
+            logger.info("Parsed recommendations", extra={"fields": {"ids": [rec['id'] for rec in recommendations]}})
+            RECOMMENDATIONS.inc(source="llm")
+            await self.recommendation_cache.set(cache_key, recommendations)
+            return recommendations
+
+        except Exception as e:
+            logger.error("OpenAI API Error: %s", e)
+            LLM_ERRORS.inc(error=type(e).__name__)
+            FALLBACKS.inc(reason="llm_error")
+            return self.generate_fallback_recommendations(shown_ids, user_profile, similar_profiles, count)
+
+    def degraded_recommendations(self, reason: str, user_profile: dict, similar_profiles: List[dict], shown_ids,
+                                 count: int = 1) -> List[dict]:
+        """Serve the item-item model (or the static fallback) when admission control refuses an LLM call."""
+        recommendations = self.local_recommendations(user_profile, similar_profiles, shown_ids, count)
+        source = "local" if recommendations else "fallback"
+        if not recommendations:
+            recommendations = self.generate_fallback_recommendations(shown_ids, count=count)
+        REQUESTS_DEGRADED.inc(reason=reason, source=source)
+        logger.info("LLM call refused, degraded", extra={"fields": {"reason": reason, "source": source}})
+        return recommendations
+
+    def enforce_rate_limit(self, user_id: str):
+        """Charge one request to the user's and the global bucket, or answer 429 with Retry-After."""
+        try:
+            self.rate_limiter.acquire(user_id)
+        except RateLimited as e:
+            REQUESTS_SHED.inc(scope=e.scope)
+            raise HTTPException(status_code=429, detail=str(e),
+                                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+
+    def prefer_local(self, user_id: str) -> bool:
+        """Whether RECOMMENDER_MODE says to try the item-item model before the LLM."""
+        return self.mode == 'local' or (self.mode == 'cold_start' and not self.item_recommender.is_cold(user_id))
+
+    def local_recommendations(self, user_profile: dict, similar_profiles: List[dict], shown_ids,
+                              count: int = 1) -> List[dict]:
+        """Rank unseen catalog experiences with the item-item model; empty when it has no signal."""
+        with STAGE_SECONDS.time(stage="local_recommend"):
+            ranked = self.item_recommender.recommend(
+                user_profile['id'],
+                self.catalog.ids(),
+                count=count + len(shown_ids),
+                neighbour_ids=[profile['id'] for profile in similar_profiles],
+            )
+        recommendations = []
+        for experience_id, _, because_id in ranked:
+            if experience_id in shown_ids:
+                continue
+            recommendation = dict(self.catalog.get(experience_id))
+            because = self.catalog.get(because_id) if because_id else None
+            if because:
+                recommendation["reasoning"] = f"People who liked {because['title']} also enjoyed this."
             else:
-                print("Could not find JSON object in response, using fallback")
-                return generate_fallback_recommendations(shown_ids)
-                
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error: {e}, using fallback")
-            return generate_fallback_recommendations(shown_ids)
-            
-    except Exception as e:
-        print(f"OpenAI API Error: {str(e)}")
-        return generate_fallback_recommendations(shown_ids)
-
-def generate_fallback_recommendations(shown_ids: List[str] = []):
-    """Generate fallback recommendations when AI fails."""
-    
-    fallback_recommendations = [
-        {
-            "id": "exp1",
-            "title": "Pottery Making",
-            "description": "Learn the ancient art of pottery",
-            "category": "Arts & Crafts",
-            "reasoning": "Based on statistical analysis, people with similar profiles often explore creative outlets that use their hands in completely different ways."
-        },
-        {
-            "id": "exp4", 
-            "title": "Stand-up Comedy",
-            "description": "Develop your comedic timing and stage presence",
-            "category": "Performance",
-            "reasoning": "Analytical minds often excel at observational humor and structured storytelling, providing a completely different creative outlet."
-        },
-        {
-            "id": "exp6",
-            "title": "Mushroom Foraging",
-            "description": "Learn to identify and harvest wild mushrooms safely",
-            "category": "Nature",
-            "reasoning": "Detail-oriented professionals often find satisfaction in the methodical nature of foraging while connecting with nature."
-        },
-        {
-            "id": "exp2",
-            "title": "Salsa Dancing",
-            "description": "Master the passionate dance of salsa",
-            "category": "Dance",
-            "reasoning": "Physical expression through dance provides a perfect counterbalance to analytical work."
-        },
-        {
-            "id": "exp3",
-            "title": "Beekeeping",
-            "description": "Understand the fascinating world of bees",
-            "category": "Agriculture",
-            "reasoning": "Working with nature and understanding complex systems appeals to methodical thinkers."
-        }
-    ]
-    
-    # Filter out already shown recommendations
-    available_fallbacks = [rec for rec in fallback_recommendations if rec['id'] not in shown_ids]
-    
-    if available_fallbacks:
-        return [available_fallbacks[0]]  # Return one recommendation
-    else:
-        return []
-
-def find_similar_profiles(user_profile: dict) -> List[dict]:
-    """Find profiles similar to the user's profile using simple matching."""
-    similar_profiles = []
-    
-    for profile in mock_profiles:
-        similarity_score = 0
-        
-        # Check work group similarity
-        if profile['work_group'].lower() == user_profile.get('work_group', '').lower():
-            similarity_score += 3
-            
-        # Check age similarity (within 5 years)
-        age_diff = abs(profile['age'] - user_profile.get('age', 0))
-        if age_diff <= 5:
-            similarity_score += 2
-            
-        # Check work role similarity (contains similar keywords)
-        user_role = user_profile.get('work_role', '').lower()
-        profile_role = profile['work_role'].lower()
-        if any(word in profile_role for word in user_role.split()):
-            similarity_score += 2
-            
-        # Add profile if similarity score is high enough
-        if similarity_score >= 3:
-            similar_profiles.append(profile)
-    
-    return similar_profiles[:3]  # Return top 3 similar profiles
-
-@app.post("/api/profile")
-async def create_profile(profile: UserProfile):
+                recommendation["reasoning"] = "Recommended from what people with similar tastes liked and passed on."
+            recommendations.append(recommendation)
+            if len(recommendations) >= count:
+                break
+        return recommendations
+
+    def generate_fallback_recommendations(self, shown_ids: Optional[List[str]] = None,
+                                          user_profile: Optional[dict] = None,
+                                          similar_profiles: Optional[List[dict]] = None, count: int = 1):
+        """Generate fallback recommendations when AI fails."""
+        shown_ids = shown_ids or []
+        similar_profiles = similar_profiles or []
+
+        # Prefer what the item-item model learned from recorded interactions
+        if user_profile is not None and self.mode != 'local':
+            local = self.local_recommendations(user_profile, similar_profiles, shown_ids, count)
+            if local:
+                return local
+
+        # Filter out already shown recommendations
+        available_fallbacks = [rec for rec in fallback_recommendations if rec['id'] not in shown_ids]
+
+        return available_fallbacks[:count]
+
+    async def find_similar_profiles(self, user_profile: dict) -> List[dict]:
+        """Find the profiles most similar to the user's profile, best match first, with their `similarity`.
+
+        The result is for the server's own use; responses carry similar_profile_summary() of it.
+        """
+        cache_key = f"{user_profile['id']}:{profile_cache_key(user_profile)}"
+        cached = await self.similar_profile_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        with STAGE_SECONDS.time(stage="similar_profiles"):
+            if self.similarity_backend == 'ann':
+                scored = self.profile_index.search(user_profile, k=3, min_score=self.ann_min_score)
+            else:
+                scored = self.similarity_engine.search(user_profile, k=3, min_score=self.similarity_min_score)
+        similar_profiles = [dict(profile, similarity=round(score, 3)) for score, profile in scored]
+        await self.similar_profile_cache.set(cache_key, similar_profiles)
+        return similar_profiles
+
+    def batch_fetcher(self, user_profile, similar_profiles: List[dict]):
+        """fetch(exclude_ids, count) for the prefetch queue, bound to one user's profile."""
+        async def fetch_batch(exclude_ids: List[str], count: int) -> List[dict]:
+            return await self.get_ai_recommendations(user_profile, similar_profiles, exclude_ids, count)
+        return fetch_batch
+
+    async def warm_up_profile(self, user_profile) -> Dict[str, Any]:
+        """Precompute a new user's similar profiles and first recommendation batch."""
+        user_id = user_profile['id']
+        similar_profiles = await self.find_similar_profiles(user_profile)
+        shown_ids = await self.shown_history.get(user_id)
+        await self.prefetch_queue.next(user_id, shown_ids, self.batch_fetcher(user_profile, similar_profiles))
+        return {"similar_profiles": len(similar_profiles), "recommendations": len(self.prefetch_queue.peek(user_id))}
+
+    async def index_profiles(self, profiles: List[dict]):
+        """Make profiles searchable for similar-profile lookups.
+
+        Featurizing and embedding run in a worker thread so an import batch
+        does not stall the event loop; only the inserts happen on it.
+        """
+        features, vectors = await asyncio.to_thread(
+            lambda: (self.similarity_engine.featurize_many(profiles), self.profile_index.embed_many(profiles)))
+        self.similarity_engine.add_many(profiles, features)
+        self.profile_index.add_many(profiles, vectors)
+        if self.profile_index.index.needs_training and (self._index_training is None or self._index_training.done()):
+            self._index_training = asyncio.create_task(self.train_profile_index())
+
+    async def train_profile_index(self):
+        """Re-cluster the ANN index off the event loop; lookups use the previous clustering meanwhile."""
+        started = time.perf_counter()
+        try:
+            with STAGE_SECONDS.time(stage="ann_train"):
+                await self.profile_index.train()
+        except Exception:
+            logger.exception("ANN index training failed")
+            return
+        logger.info("ANN index trained", extra={"fields": {"profiles": len(self.profile_index),
+                                                           "seconds": round(time.perf_counter() - started, 3)}})
+
+    async def load_profile(self, user_id: str):
+        """Get a user's profile from the profile cache, or 404 if it does not exist."""
+        with STAGE_SECONDS.time(stage="profile_lookup"):
+            user_profile = await self.profile_service.get(user_id)
+        if user_profile is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return user_profile
+
+    async def insert_imported_profiles(self, profiles: List[dict]) -> Dict[int, str]:
+        """Insert one import batch and make the accepted profiles searchable."""
+        with STAGE_SECONDS.time(stage="db_profile_bulk_insert"):
+            failed = await self.profile_service.create_many(profiles)
+        await self.index_profiles([profile for index, profile in enumerate(profiles) if index not in failed])
+        return failed
+
+    async def batch_recommend(self, user_id: str, count: int) -> Dict[str, Any]:
+        """Compute one user's recommendations for a batch job and queue them for their next request."""
+        user_profile = await self.profile_service.get(user_id)
+        if user_profile is None:
+            raise LookupError("Profile not found")
+        similar_profiles = await self.find_similar_profiles(user_profile)
+        shown_ids = await self.shown_history.get(user_id)
+        recommendations = await self.get_ai_recommendations(user_profile, similar_profiles, shown_ids, count)
+        self.prefetch_queue.offer(user_id, recommendations)
+        return {"user_id": user_id, "recommendations": recommendations, "created_at": time.time()}
+
+    def stream_recommendation(self, obj: Any, shown_ids, candidate_ids) -> Optional[dict]:
+        """Validate one object parsed from a streamed completion; None if it is unusable."""
+        recommendation, reason = self.recommendation_parser.validate(obj, shown_ids, candidate_ids)
+        PARSED_OBJECTS.inc(outcome=reason or "accepted")
+        if recommendation is not None:
+            RECOMMENDATIONS.inc(source="llm_stream")
+        return recommendation
+
+    async def stream_recommendation_events(self, user_id: str, user_profile: dict, shown_ids) -> AsyncIterator[str]:
+        """Yield SSE events for the next recommendation as the completion streams in.
+
+        Events: `meta` (id and title), `field` (description, category), `reasoning`
+        (text deltas), then `recommendation` with the final object and `done`.
+        The `recommendation` event is authoritative: if the stream fails part-way
+        it carries a fallback instead of the partially streamed card.
+        """
+        queued = self.prefetch_queue.head(user_id, shown_ids)
+        if queued:
+            yield sse_event("recommendation", queued)
+            yield sse_event("done", {})
+            return
+
+        available_experiences = self.catalog.candidates(user_profile, shown_ids, limit=self.prompt_max_candidates)
+        if not available_experiences:
+            yield sse_event("done", {"message": "No more recommendations available"})
+            return
+
+        recommendation = None
+        if self.prefer_local(user_profile['id']):
+            local = self.local_recommendations(user_profile, [], shown_ids, 1)
+            if local:
+                RECOMMENDATIONS.inc(source="local")
+                recommendation = local[0]
+        refused = None
+        if recommendation is None and self.llm.available:
+            plan = self.prompt_builder.build(user_profile, available_experiences, 1)
+            record_prompt_report(plan)
+            reserved_tokens = plan.report["input_tokens"] + plan.max_tokens
+            refused = self.llm_admission.admit(reserved_tokens)
+            if refused:
+                degraded = self.degraded_recommendations(refused, user_profile, [], shown_ids, 1)
+                recommendation = degraded[0] if degraded else None
+        if recommendation is None and self.llm.available and not refused:
+            parser = IncrementalJSONParser()
+            offered = set(plan.candidate_ids)
+            meta_sent = False
+            try:
+                deltas = self.llm.stream(plan.messages, max_tokens=plan.max_tokens)
+                async with contextlib.aclosing(deltas):
+                    async for delta in deltas:
+                        for event in parser.feed(delta):
+                            if event[0] == "field" and event[1] == "id" and not meta_sent:
+                                # The model only sends id and reasoning; the card itself comes from the catalog
+                                experience_id = self.catalog.resolve(event[2])
+                                experience = self.catalog.get(experience_id) if experience_id in offered else None
+                                if experience is not None:
+                                    meta_sent = True
+                                    yield sse_event("meta", {"id": experience["id"], "title": experience["title"]})
+                                    for key in ("description", "category"):
+                                        yield sse_event("field", {key: experience[key]})
+                            elif event[0] == "delta" and event[1] == "reasoning":
+                                yield sse_event("reasoning", {"text": event[2]})
+                            elif event[0] == "object":
+                                recommendation = self.stream_recommendation(event[1], shown_ids, offered)
+                                if recommendation is not None:
+                                    break
+                            elif event[0] == "error":
+                                PARSE_FAILURES.inc(reason="stream_json_decode")
+                        if recommendation is not None:
+                            break
+                    else:
+                        # The completion ended (possibly cut off at max_tokens) without a usable object
+                        for event in parser.finish():
+                            if event[0] == "object" and recommendation is None:
+                                recommendation = self.stream_recommendation(event[1], shown_ids, offered)
+                            elif event[0] == "error":
+                                PARSE_FAILURES.inc(reason="stream_json_decode")
+            except Exception as e:
+                logger.error("OpenAI streaming error: %s", e)
+                LLM_ERRORS.inc(error=type(e).__name__)
+            finally:
+                # Streamed completions report no usage, so the whole reservation goes back
+                self.llm_admission.release(reserved_tokens)
+
+        if recommendation is None or recommendation.get("id") in shown_ids:
+            FALLBACKS.inc(reason="stream_failure" if self.llm.available else "no_llm")
+            fallbacks = self.generate_fallback_recommendations(shown_ids, user_profile)
+            recommendation = fallbacks[0] if fallbacks else None
+
+        if recommendation is None:
+            yield sse_event("done", {"message": "No more recommendations available"})
+            return
+        # Keep the streamed card as the user's current head so a plain retry returns it
+        self.prefetch_queue.offer(user_id, [recommendation])
+        yield sse_event("recommendation", recommendation)
+        yield sse_event("done", {})
+
+    async def load_catalog(self):
+        """Replace the built-in catalog with db.experiences when configured."""
+        if os.environ.get('EXPERIENCE_CATALOG_SOURCE', '').lower() == 'db':
+            await self.catalog.load_from_collection(self.repos.backend.collection("experiences"))
+
+    async def train_item_recommender(self):
+        """Train the item-item model from db.interactions (LOCAL_RECOMMENDER_TRAIN_ON_STARTUP=0 to skip)."""
+        if os.environ.get('LOCAL_RECOMMENDER_TRAIN_ON_STARTUP', '1') != '0':
+            await self.item_recommender.load_from_collection(self.repos.interactions.collection)
+
+    async def load_profiles(self):
+        """Index every profile in db.profiles for similar-profile lookups (PROFILE_INDEX_LOAD_ON_STARTUP=0 to skip)."""
+        if os.environ.get('PROFILE_INDEX_LOAD_ON_STARTUP', '1') == '0':
+            return
+        async for batch in self.repos.profiles.batches():
+            await self.index_profiles(batch)
+        logger.info("Indexed stored profiles", extra={"fields": {"profiles": len(self.similarity_engine)}})
+
+    async def warm_up(self):
+        """Load what recommendations depend on, then report the worker ready.
+
+        Runs in the background so the worker accepts connections (and passes
+        /api/health) at once; load balancers should route traffic on /api/ready.
+        """
+        try:
+            await self.load_catalog()
+            await self.train_item_recommender()
+            await self.load_profiles()
+        except Exception as e:
+            self.readiness["error"] = f"{type(e).__name__}: {e}"
+            logger.exception("Warm-up failed")
+            return
+        self.readiness["ready"] = True
+        self.readiness["startup_seconds"] = round(time.perf_counter() - self.readiness["started_at"], 3)
+        logger.info("Ready", extra={"fields": {"startup_seconds": self.readiness["startup_seconds"],
+                                               "experiences": len(self.catalog),
+                                               "model_users": len(self.item_recommender)}})
+
+    def start(self):
+        """Start the background components for one worker process."""
+        self.readiness.update(ready=False, stopping=False, started_at=time.perf_counter(), startup_seconds=None, error=None)
+        logger.info("LLM provider configured", extra={"fields": {"provider": type(self.llm.provider).__name__,
+                                                                 "available": self.llm.available}})
+        # Replays anything spilled by a previous run
+        self.interaction_pipeline.start()
+        self.warmup_pool.start()
+        self._warm_up_task = asyncio.create_task(self.warm_up())
+
+    async def close(self):
+        """Stop background work, flush buffered writes and release pooled connections."""
+        self.readiness.update(ready=False, stopping=True)
+        for task in (self._warm_up_task, self._index_training):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        await self.warmup_pool.close()
+        await self.batch_runner.close()
+        await self.interaction_pipeline.close()
+        await self.shown_history.close()
+        await self.shared_store.close()
+        await self.repos.close()
+        await self.llm.close()
+
+
+def get_recommender(request: Request) -> Recommender:
+    """The Recommender of the app serving the request."""
+    return request.app.state.recommender
+
+@router.post("/api/profile")
+async def create_profile(profile: UserProfile, recommender: Recommender = Depends(get_recommender)):
     """Create a new user profile."""
     try:
         user_id = str(uuid.uuid4())
-        profile_data = profile.dict()
+        profile_data = profile.model_dump()
         profile_data["id"] = user_id
-        
+
         # Store in database
-        db.profiles.insert_one(profile_data)
-        
-        # Initialize shown recommendations for this user
-        user_shown_recommendations[user_id] = []
-        
-        return {"user_id": user_id, "message": "Profile created successfully"}
+        with STAGE_SECONDS.time(stage="db_profile_insert"):
+            user_profile = await recommender.profile_service.create(profile_data)
+
+        # Make the new profile searchable for similar-profile lookups
+        await recommender.index_profiles([profile_data])
+
+        # Have the first recommendation ready before the frontend asks for it
+        job = recommender.warmup_pool.submit(user_id, lambda: recommender.warm_up_profile(user_profile))
+
+        return {"user_id": user_id, "message": "Profile created successfully", "warmup": job.status}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def validate_imported_profile(record: Any) -> dict:
+    """Turn one NDJSON record into a profile document with a new id; ValueError if it is not a UserProfile."""
+    if not isinstance(record, dict):
+        raise ValueError("Expected a JSON object")
+    profile_data = UserProfile(**record).model_dump()
+    profile_data["id"] = str(uuid.uuid4())
+    return profile_data
+
+@router.post("/api/profiles/bulk")
+async def import_profiles_bulk(request: Request, recommender: Recommender = Depends(get_recommender)):
+    """Create profiles from an NDJSON body, one UserProfile per line.
+
+    Batches are inserted while the body is still being received. The response
+    lists the new user ids in input order, the rejected lines and throughput.
+    Imported profiles are not warmed up; use /api/recommendations/batch.
+    A line longer than BULK_IMPORT_MAX_LINE_BYTES stops the import with 413;
+    the batches before it stay imported.
+    """
+    records = iter_ndjson(request.stream(), recommender.bulk_import_max_line_bytes)
+    try:
+        report = await import_profiles(records, validate_imported_profile, recommender.insert_imported_profiles,
+                                       batch_size=recommender.bulk_import_batch_size,
+                                       max_profiles=recommender.bulk_import_max_profiles)
+    except LineTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    logger.info("Bulk profile import", extra={"fields": {key: value for key, value in report.to_dict().items()
+                                                         if key not in ("user_ids", "errors")}})
+    return report.to_dict()
+
+@router.get("/api/profile/{user_id}/warmup")
+async def get_warmup_status(user_id: str, recommender: Recommender = Depends(get_recommender)):
+    """Status of the profile's warm-up job."""
+    job = recommender.warmup_pool.status(user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No warm-up job for this profile")
+    return job.to_dict()
+
+@router.delete("/api/profile/{user_id}/warmup")
+async def cancel_warmup(user_id: str, recommender: Recommender = Depends(get_recommender)):
+    """Cancel the profile's warm-up job (e.g. the user left) and drop what it prefetched."""
+    job = recommender.warmup_pool.status(user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No warm-up job for this profile")
+    if recommender.warmup_pool.cancel(user_id):
+        recommender.prefetch_queue.invalidate(user_id)
+    return job.to_dict()
+
+@router.put("/api/profile/{user_id}")
+async def update_profile(user_id: str, update: UserProfileUpdate, recommender: Recommender = Depends(get_recommender)):
+    """Update fields of an existing user profile."""
+    try:
+        fields = update.model_dump(exclude_unset=True)
+        profile = await recommender.profile_service.update(user_id, fields)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        # Similar-profile lookups see the new fields, and recommendations queued for the old profile no longer apply
+        await recommender.index_profiles([profile.to_dict()])
+        recommender.prefetch_queue.invalidate(user_id)
+
+        return {"user_id": user_id, "message": "Profile updated successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/recommendations/{user_id}")
-async def get_recommendations(user_id: str):
-    """Get experience recommendations for a user."""
+@router.get("/api/recommendations/{user_id}")
+async def get_recommendations(user_id: str, request: Request, fields: Optional[str] = None,
+                              recommender: Recommender = Depends(get_recommender)):
+    """Get experience recommendations for a user.
+
+    `fields` projects the payload to comma-separated dotted paths (e.g.
+    `recommendations.id,recommendations.title,similar_profiles.work_role`).
+    Similar profiles are summarised as role, group and similarity only.
+    Responses carry an ETag for conditional GETs and are gzipped when large.
+    """
     try:
-        # Get user profile (for demo, we'll use the first mock profile)
-        user_profile = mock_profiles[0]  # In real app, get from database by user_id
-        
+        recommender.enforce_rate_limit(user_id)
+
+        # Get user profile
+        user_profile = await recommender.load_profile(user_id)
+
         # Find similar profiles
-        similar_profiles = find_similar_profiles(user_profile)
-        
+        similar_profiles = await recommender.find_similar_profiles(user_profile)
+
         # Get AI recommendations
-        shown_ids = user_shown_recommendations.get(user_id, [])
-        recommendations = get_ai_recommendations(user_profile, similar_profiles, shown_ids)
-        
-        return {
-            "user_profile": user_profile,
-            "similar_profiles": similar_profiles,
-            "recommendations": recommendations
-        }
+        shown_ids = await recommender.shown_history.get(user_id)
+        recommendations = await recommender.get_ai_recommendations(user_profile, similar_profiles, shown_ids)
+
+        with STAGE_SECONDS.time(stage="serialize"):
+            return lean_response({
+                "user_profile": user_profile.to_dict(),
+                "similar_profiles": [similar_profile_summary(profile) for profile in similar_profiles],
+                "recommendations": recommendations
+            }, request.headers, fields)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/interaction")
-async def record_interaction(interaction: UserInteraction):
+@router.post("/api/recommendations/batch", status_code=202)
+async def start_batch_recommendations(batch: BatchRecommendationRequest,
+                                      recommender: Recommender = Depends(get_recommender)):
+    """Start a background job computing recommendations for many users.
+
+    At most `concurrency` users are processed at once (default half the LLM
+    concurrency limit, so interactive requests keep the rest). Results are
+    written to db.recommendations in batches and queued for each user's next
+    request on this worker.
+    """
+    user_ids = list(dict.fromkeys(batch.user_ids))
+    if len(user_ids) > recommender.batch_max_users:
+        raise HTTPException(status_code=413, detail=f"At most {recommender.batch_max_users} users per batch")
+    llm = recommender.llm
+    count = max(1, min(batch.count, recommender.prefetch_queue.batch_size * 4))
+    concurrency = min(batch.concurrency or max(1, llm.max_concurrency // 2), llm.max_concurrency)
+    job = recommender.batch_runner.submit(user_ids, functools.partial(recommender.batch_recommend, count=count),
+                                          recommender.repos.recommendations.save_many, concurrency=concurrency)
+    return job.to_dict()
+
+@router.get("/api/recommendations/batch/{job_id}")
+async def get_batch_recommendations(job_id: str, recommender: Recommender = Depends(get_recommender)):
+    """Progress and throughput of a batch recommendation job."""
+    job = recommender.batch_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job.to_dict()
+
+@router.delete("/api/recommendations/batch/{job_id}")
+async def cancel_batch_recommendations(job_id: str, recommender: Recommender = Depends(get_recommender)):
+    """Cancel a batch job; results computed so far are still written."""
+    job = recommender.batch_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    recommender.batch_runner.cancel(job_id)
+    return job.to_dict()
+
+@router.post("/api/interaction")
+async def record_interaction(interaction: UserInteraction, recommender: Recommender = Depends(get_recommender)):
     """Record user interaction with a recommendation."""
+    # Only catalog experiences reach the database, the shown history and the item-item model
+    if interaction.experience_id not in recommender.catalog:
+        raise HTTPException(status_code=404, detail="Experience not found")
     try:
-        interaction_data = interaction.dict()
+        interaction_data = interaction.model_dump()
         interaction_data["id"] = str(uuid.uuid4())
-        
-        # Store in database
-        db.interactions.insert_one(interaction_data)
-        
+
+        # Queue for the background batch writer
+        with STAGE_SECONDS.time(stage="interaction_enqueue"):
+            await recommender.interaction_pipeline.submit(interaction_data)
+
         # Add to shown recommendations for this user
-        if interaction.user_id not in user_shown_recommendations:
-            user_shown_recommendations[interaction.user_id] = []
-        user_shown_recommendations[interaction.user_id].append(interaction.experience_id)
-        
+        await recommender.shown_history.add(interaction.user_id, interaction.experience_id)
+
+        # Incrementally update the item-item model
+        recommender.item_recommender.observe(interaction.user_id, interaction.experience_id, interaction.action)
+
         return {"message": "Interaction recorded successfully"}
+    except InteractionQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/next-recommendation/{user_id}")
-async def get_next_recommendation(user_id: str):
+@router.get("/api/next-recommendation/{user_id}")
+async def get_next_recommendation(user_id: str, recommender: Recommender = Depends(get_recommender)):
     """Get the next recommendation for the user."""
     try:
+        recommender.enforce_rate_limit(user_id)
+
         # Get user profile
-        user_profile = mock_profiles[0]  # In real app, get from database
-        
+        user_profile = await recommender.load_profile(user_id)
+
         # Find similar profiles
-        similar_profiles = find_similar_profiles(user_profile)
-        
-        # Get new recommendations (filter out already seen)
-        shown_ids = user_shown_recommendations.get(user_id, [])
-        recommendations = get_ai_recommendations(user_profile, similar_profiles, shown_ids)
-        
-        # Return the first recommendation
-        if recommendations:
-            return recommendations[0]
+        similar_profiles = await recommender.find_similar_profiles(user_profile)
+
+        # Serve the head of the user's prefetched batch (filter out already seen)
+        shown_ids = await recommender.shown_history.get(user_id)
+        recommendation = await recommender.prefetch_queue.next(
+            user_id, shown_ids, recommender.batch_fetcher(user_profile, similar_profiles))
+
+        if recommendation:
+            return recommendation
         else:
             return {"message": "No more recommendations available"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/health")
+@router.get("/api/next-recommendation/{user_id}/stream")
+async def stream_next_recommendation(user_id: str, recommender: Recommender = Depends(get_recommender)):
+    """Stream the next recommendation for the user as server-sent events."""
+    recommender.enforce_rate_limit(user_id)
+    user_profile = await recommender.load_profile(user_id)
+    shown_ids = await recommender.shown_history.get(user_id)
+    return StreamingResponse(
+        recommender.stream_recommendation_events(user_id, user_profile, shown_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@contextlib.asynccontextmanager
+async def lifespan(application: FastAPI):
+    """Start the app's components for one worker process and stop them on shutdown."""
+    recommender: Recommender = application.state.recommender
+    recommender.start()
+    try:
+        yield
+    finally:
+        await recommender.close()
+
+@router.get("/api/metrics")
+async def metrics():
+    """Prometheus text-format metrics."""
+    return PlainTextResponse(registry.render(), headers={"Content-Type": registry.content_type})
+
+@router.get("/api/health")
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "message": "Experience Recommender API is running"}
 
+@router.get("/api/ready")
+async def readiness_check(recommender: Recommender = Depends(get_recommender)):
+    """Readiness: 200 once warm-up has finished, 503 while starting, after a failed warm-up or when shutting down."""
+    readiness = recommender.readiness
+    body = {
+        "status": "ready" if readiness["ready"] else "stopping" if readiness["stopping"] else "starting",
+        "startup_seconds": readiness["startup_seconds"],
+        "experiences": len(recommender.catalog),
+        "interaction_pipeline": recommender.interaction_pipeline.running,
+    }
+    if readiness["error"]:
+        body.update(status="failed", error=readiness["error"])
+    return JSONResponse(body, status_code=200 if readiness["ready"] else 503)
+
+def create_app(backend=None) -> FastAPI:
+    """Build the ASGI application and its components: settings, middleware, routes and lifespan.
+
+    Nothing is built at import; serve with `uvicorn server:create_app --factory`.
+    ``backend`` replaces the data backend chosen by DATA_BACKEND, e.g. one
+    InMemoryBackend shared by several apps standing in for one database.
+    """
+    # Load environment variables (the components read their settings as they are built)
+    load_dotenv()
+
+    # Structured logging through a background queue listener (LOG_LEVEL, LOG_FORMAT=json|text)
+    configure_logging()
+
+    application = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+    application.state.recommender = Recommender(backend)
+    application.state.recommender.register_metrics()
+
+    # CORS configuration
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Multi-worker mode (see gunicorn_conf.py) tags each response with the worker that served it
+    if int(os.environ.get('SERVER_WORKERS', '1')) > 1:
+        @application.middleware("http")
+        async def add_worker_header(request, call_next):
+            response = await call_next(request)
+            response.headers["X-Worker-Id"] = str(os.getpid())
+            return response
+
+    application.include_router(router)
+    return application
+
 if __name__ == "__main__":
+    # Single process for development; use `gunicorn -c gunicorn_conf.py 'server:create_app()'` to serve with several workers
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run("server:create_app", factory=True, host="0.0.0.0", port=8001)
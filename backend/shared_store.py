@@ -0,0 +1,168 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+
+class LocalSharedStore:
+    """In-process stand-in for the shared store; only correct with a single worker.
+
+    Every store keeps two kinds of per-user state: grow-only string sets
+    (experiences shown to a user) and version counters bumped whenever a
+    cached object (a profile) changes, so other workers know to reload it.
+    Components skip the store when ``cross_process`` is false, since their
+    own in-process caches already hold the same state.
+    """
+
+    cross_process = False
+
+    def __init__(self):
+        self._sets: Dict[str, Set[str]] = {}
+        self._versions: Dict[str, int] = {}
+
+    async def members(self, key: str) -> Set[str]:
+        return set(self._sets.get(key, ()))
+
+    async def add_members(self, key: str, members: Iterable[str]):
+        self._sets.setdefault(key, set()).update(members)
+
+    async def version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    async def bump(self, key: str) -> int:
+        self._versions[key] = self._versions.get(key, 0) + 1
+        return self._versions[key]
+
+    async def close(self):
+        pass
+
+
+class SQLiteSharedStore:
+    """Shared store in a SQLite file, for several worker processes on one host.
+
+    Each process opens its own connection on first use (never before a fork)
+    and runs queries in a worker thread. WAL mode lets readers proceed while
+    another process writes.
+    """
+
+    cross_process = True
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS members (key TEXT, member TEXT, PRIMARY KEY (key, member))")
+            connection.execute("CREATE TABLE IF NOT EXISTS versions (key TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def _run(self, sql: str, params: tuple = (), many: bool = False):
+        with self._lock:
+            connection = self._connect()
+            if many:
+                connection.executemany(sql, params)
+                return None
+            return connection.execute(sql, params).fetchall()
+
+    async def members(self, key: str) -> Set[str]:
+        rows = await asyncio.to_thread(self._run, "SELECT member FROM members WHERE key = ?", (key,))
+        return {member for member, in rows}
+
+    async def add_members(self, key: str, members: Iterable[str]):
+        rows = [(key, member) for member in members]
+        if rows:
+            await asyncio.to_thread(self._run, "INSERT OR IGNORE INTO members (key, member) VALUES (?, ?)", rows, True)
+
+    async def version(self, key: str) -> int:
+        rows = await asyncio.to_thread(self._run, "SELECT version FROM versions WHERE key = ?", (key,))
+        return rows[0][0] if rows else 0
+
+    def _bump(self, key: str) -> int:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("INSERT INTO versions (key, version) VALUES (?, 1) "
+                                   "ON CONFLICT (key) DO UPDATE SET version = version + 1", (key,))
+                version = connection.execute("SELECT version FROM versions WHERE key = ?", (key,)).fetchone()[0]
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            return version
+
+    async def bump(self, key: str) -> int:
+        return await asyncio.to_thread(self._bump, key)
+
+    async def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+class MongoSharedStore:
+    """Shared store in a database collection, for workers spread across hosts."""
+
+    cross_process = True
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._index_ready = False
+
+    async def _ensure_index(self):
+        if not self._index_ready:
+            await self.collection.create_index("key", unique=True)
+            self._index_ready = True
+
+    async def members(self, key: str) -> Set[str]:
+        document = await self.collection.find_one({"key": key}, {"_id": 0, "members": 1})
+        return set(document.get("members", [])) if document else set()
+
+    async def add_members(self, key: str, members: Iterable[str]):
+        members = list(members)
+        if members:
+            await self._ensure_index()
+            await self.collection.update_one({"key": key}, {"$addToSet": {"members": {"$each": members}}}, upsert=True)
+
+    async def version(self, key: str) -> int:
+        document = await self.collection.find_one({"key": key}, {"_id": 0, "version": 1})
+        return document.get("version", 0) if document else 0
+
+    async def bump(self, key: str) -> int:
+        await self._ensure_index()
+        await self.collection.update_one({"key": key}, {"$inc": {"version": 1}}, upsert=True)
+        return await self.version(key)
+
+    async def close(self):
+        pass
+
+
+def create_shared_store_from_env(backend):
+    """Build the shared store from SHARED_STORE=local|sqlite|mongo.
+
+    Defaults to the local stand-in with one worker and to SQLite when
+    SERVER_WORKERS is above one.
+    """
+    workers = int(os.environ.get("SERVER_WORKERS", "1"))
+    kind = os.environ.get("SHARED_STORE", "sqlite" if workers > 1 else "local").lower()
+    if kind == "sqlite":
+        return SQLiteSharedStore(os.environ.get("SHARED_STORE_PATH", "shared_state.sqlite3"))
+    if kind == "mongo":
+        return MongoSharedStore(backend.collection("shared_state"))
+    if kind != "local":
+        raise ValueError(f"Unknown SHARED_STORE: {kind}")
+    return LocalSharedStore()
@@ -0,0 +1,205 @@
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Container, Dict, Iterable, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ExperienceIdTable:
+    """Interns experience ids to small consecutive integers (bit positions).
+
+    With a ``catalog``, only its ids are interned and bits_for() skips any
+    other id, so the table (and every bitset) stays bounded by the catalog.
+    """
+
+    def __init__(self, catalog: Optional[Container[str]] = None):
+        self.catalog = catalog
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def accepts(self, experience_id: str) -> bool:
+        return self.catalog is None or experience_id in self._index or experience_id in self.catalog
+
+    def intern(self, experience_id: str) -> int:
+        index = self._index.get(experience_id)
+        if index is None:
+            index = len(self._ids)
+            self._index[experience_id] = index
+            self._ids.append(experience_id)
+        return index
+
+    def lookup(self, experience_id: str) -> Optional[int]:
+        return self._index.get(experience_id)
+
+    def id_at(self, index: int) -> str:
+        return self._ids[index]
+
+    def bits_for(self, experience_ids: Iterable[str]) -> int:
+        bits = 0
+        for experience_id in experience_ids:
+            if self.accepts(experience_id):
+                bits |= 1 << self.intern(experience_id)
+        return bits
+
+
+class ShownSet:
+    """Read-only set view over a user's shown-history bitset."""
+
+    __slots__ = ("_bits", "_table")
+
+    def __init__(self, bits: int, table: ExperienceIdTable):
+        self._bits = bits
+        self._table = table
+
+    def __contains__(self, experience_id) -> bool:
+        index = self._table.lookup(experience_id)
+        return index is not None and bool((self._bits >> index) & 1)
+
+    def __iter__(self) -> Iterator[str]:
+        bits = self._bits
+        while bits:
+            # Jump straight to the lowest set bit instead of shifting through the zeros
+            lowest = bits & -bits
+            yield self._table.id_at(lowest.bit_length() - 1)
+            bits ^= lowest
+
+    def __len__(self) -> int:
+        return self._bits.bit_count()
+
+    def __repr__(self) -> str:
+        return f"ShownSet({sorted(self)!r})"
+
+
+class ShownHistoryStore:
+    """Bounded in-memory shown history in front of the ShownHistoryRepository.
+
+    Each user's history is one Python int used as a bitset over interned
+    experience ids. Additions are applied in memory immediately and written
+    to the database in the background (write-behind), coalesced per user.
+    Cold users are evicted LRU and reloaded on demand. Cached entries older
+    than ``refresh_interval`` are merged with the database copy on read; since
+    histories only ever grow, merging by union keeps every worker convergent.
+
+    With a cross-process ``shared`` store, additions are also written to it
+    before ``add`` returns and every read merges it in, so a card shown by one
+    worker is never repeated by another.
+
+    Writes that fail stay pending and are retried every ``retry_interval``
+    seconds. Ids outside ``catalog`` (when given) are not recorded.
+    """
+
+    def __init__(self, repository, max_users: int = 100000, flush_interval: float = 0.05,
+                 refresh_interval: float = 2.0, shared=None, retry_interval: float = 5.0,
+                 catalog: Optional[Container[str]] = None):
+        self.repository = repository
+        self.shared = shared if shared is not None and shared.cross_process else None
+        self.max_users = max_users
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.table = ExperienceIdTable(catalog)
+        self._entries: "OrderedDict[str, list]" = OrderedDict()  # user_id -> [bits, loaded_at]
+        self._pending: Dict[str, Set[str]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, user_id: str) -> ShownSet:
+        shared_ids = await self.shared.members(f"shown:{user_id}") if self.shared is not None else ()
+        entry = self._entries.get(user_id)
+        if entry is None or time.monotonic() - entry[1] > self.refresh_interval:
+            stored = await self.repository.get(user_id)
+            bits = self.table.bits_for(stored) | self.table.bits_for(self._pending.get(user_id, ()))
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                bits |= entry[0]
+            entry = [bits, time.monotonic()]
+            self._entries[user_id] = entry
+            self._evict()
+        if shared_ids:
+            entry[0] |= self.table.bits_for(shared_ids)
+        self._entries.move_to_end(user_id)
+        return ShownSet(entry[0], self.table)
+
+    async def add(self, user_id: str, experience_id: str):
+        if not self.table.accepts(experience_id):
+            return
+        bit = 1 << self.table.intern(experience_id)
+        entry = self._entries.get(user_id)
+        if entry is None:
+            # Not loaded yet: the next get() merges the database copy with this pending write
+            self._entries[user_id] = entry = [0, float("-inf")]
+            self._evict()
+        entry[0] |= bit
+        if self.shared is not None:
+            await self.shared.add_members(f"shown:{user_id}", [experience_id])
+        self._pending.setdefault(user_id, set()).add(experience_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> int:
+        """Write every pending addition now; returns how many users' writes failed (they stay pending)."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            results = await asyncio.gather(
+                *(self.repository.add_many(user_id, sorted(ids)) for user_id, ids in pending.items()),
+                return_exceptions=True,
+            )
+        except asyncio.CancelledError:
+            # Interrupted by close(); its final flush writes them again (additions are idempotent)
+            for user_id, ids in pending.items():
+                self._pending.setdefault(user_id, set()).update(ids)
+            raise
+        failed = 0
+        for (user_id, ids), result in zip(pending.items(), results):
+            if isinstance(result, Exception):
+                logger.warning("Shown history write failed for %s: %s", user_id, result)
+                self._pending.setdefault(user_id, set()).update(ids)
+                failed += 1
+        return failed
+
+    async def close(self):
+        # A pending retry may be waiting out retry_interval; make one last attempt instead
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+        await self.flush()
+
+    async def _flush_later(self):
+        delay = self.flush_interval
+        while True:
+            await asyncio.sleep(delay)
+            failed = await self.flush()
+            if not self._pending:
+                return
+            # Failed writes wait for the retry interval; additions made during the flush go out as usual
+            delay = self.retry_interval if failed else self.flush_interval
+
+    def _evict(self):
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+
+def create_shown_history_store_from_env(repository, shared=None,
+                                        catalog: Optional[Container[str]] = None) -> ShownHistoryStore:
+    """Build the shown-history store from SHOWN_HISTORY_* settings."""
+    return ShownHistoryStore(
+        repository,
+        shared=shared,
+        max_users=int(os.environ.get("SHOWN_HISTORY_MAX_USERS", "100000")),
+        flush_interval=float(os.environ.get("SHOWN_HISTORY_FLUSH_MS", "50")) / 1000,
+        refresh_interval=float(os.environ.get("SHOWN_HISTORY_REFRESH_SECONDS", "2")),
+        retry_interval=float(os.environ.get("SHOWN_HISTORY_RETRY_SECONDS", "5")),
+        catalog=catalog,
+    )
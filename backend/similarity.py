@@ -0,0 +1,175 @@
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Relative importance of each feature block in the final score
+DEFAULT_WEIGHTS = {
+    "work_group": 3.0,
+    "age": 2.0,
+    "work_role": 2.0,
+    "work_resume": 1.0,
+    "hobbies_interests": 1.0,
+}
+
+
+def _stable_hash(token: str) -> int:
+    # crc32 rather than hash(): Python's string hash is salted per process
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN_PATTERN.findall((text or "").lower())
+
+
+class SimilarityEngine:
+    """Vectorized profile similarity over a precomputed feature matrix.
+
+    Each profile becomes one float32 row made of fixed-width blocks: a hashed
+    one-hot of ``work_group``, a one-hot age bucket and L2-normalised hashed
+    bags of tokens for role, resume and hobbies. A query is weighted per block
+    and scored against every row with a single matrix-vector product.
+    """
+
+    def __init__(self, profiles: Iterable[dict] = (), hash_dim: int = 256, group_dim: int = 64,
+                 age_bucket_size: int = 5, max_age: int = 120, weights: Optional[Dict[str, float]] = None):
+        self.hash_dim = hash_dim
+        self.group_dim = group_dim
+        self.age_bucket_size = age_bucket_size
+        self.age_buckets = max_age // age_bucket_size + 1
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+
+        self._blocks = {}
+        offset = 0
+        for name, width in (("work_group", group_dim), ("age", self.age_buckets), ("work_role", hash_dim),
+                            ("work_resume", hash_dim), ("hobbies_interests", hash_dim)):
+            self._blocks[name] = (offset, offset + width)
+            offset += width
+        self.dim = offset
+
+        self.profiles: List[dict] = []
+        self._rows: Dict[str, int] = {}
+        self._ids = np.empty(0, dtype=object)
+        self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self.add_many(profiles)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def add(self, profile: dict):
+        self.add_many([profile])
+
+    def add_many(self, profiles: Iterable[dict], features: Optional[np.ndarray] = None):
+        """Index profiles; one whose id is already indexed replaces the stored row.
+
+        ``features`` are the profiles' rows from featurize_many() when they
+        were computed elsewhere (e.g. in a worker thread).
+        """
+        profiles = list(profiles)
+        if features is None:
+            features = self.featurize_many(profiles)
+        size = len(self.profiles)
+        new: List[dict] = []
+        new_rows: List[np.ndarray] = []
+        for profile, row_features in zip(profiles, features):
+            row = self._rows.get(profile.get("id"))
+            if row is None:
+                if profile.get("id") is not None:
+                    self._rows[profile["id"]] = size + len(new)
+                new.append(profile)
+                new_rows.append(row_features)
+            elif row >= size:
+                new[row - size], new_rows[row - size] = profile, row_features
+            else:
+                self._matrix[row] = row_features
+                self.profiles[row] = profile
+        if not new:
+            return
+        profiles = new
+        needed = size + len(profiles)
+        if needed > self._matrix.shape[0]:
+            # Grow geometrically so incremental inserts stay amortised O(1)
+            capacity = max(needed, 2 * self._matrix.shape[0], 16)
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            matrix[:size] = self._matrix[:size]
+            self._matrix = matrix
+            ids = np.empty(capacity, dtype=object)
+            ids[:size] = self._ids[:size]
+            self._ids = ids
+        self._matrix[size:needed] = new_rows
+        for index, profile in enumerate(profiles, start=size):
+            self._ids[index] = profile.get("id")
+        self.profiles.extend(profiles)
+
+    def featurize_many(self, profiles: List[dict]) -> np.ndarray:
+        """Feature rows for ``profiles``; reads only the settings, so it may run in a worker thread."""
+        features = np.zeros((len(profiles), self.dim), dtype=np.float32)
+        for index, profile in enumerate(profiles):
+            features[index] = self.featurize(profile)
+        return features
+
+    def featurize(self, profile: dict) -> np.ndarray:
+        """Feature row for a stored profile."""
+        row = np.zeros(self.dim, dtype=np.float32)
+        start, _ = self._blocks["work_group"]
+        group = (profile.get("work_group") or "").strip().lower()
+        if group:
+            row[start + _stable_hash(group) % self.group_dim] = 1.0
+        start, _ = self._blocks["age"]
+        row[start + self._age_bucket(profile.get("age"))] = 1.0
+        for field in ("work_role", "work_resume", "hobbies_interests"):
+            start, end = self._blocks[field]
+            self._hash_tokens(profile.get(field), row[start:end])
+        return row
+
+    def query_vector(self, profile: dict) -> np.ndarray:
+        """Weighted query row; neighbouring age buckets earn half credit."""
+        query = self.featurize(profile)
+        start, end = self._blocks["age"]
+        bucket = self._age_bucket(profile.get("age"))
+        for neighbour in (bucket - 1, bucket + 1):
+            if 0 <= neighbour < self.age_buckets:
+                query[start + neighbour] = 0.5
+        for name, (start, end) in self._blocks.items():
+            query[start:end] *= self.weights[name]
+        return query
+
+    def scores(self, profile: dict) -> np.ndarray:
+        return self._matrix[:len(self.profiles)] @ self.query_vector(profile)
+
+    def search(self, profile: dict, k: int = 3, min_score: float = 0.0) -> List[Tuple[float, dict]]:
+        """Return up to k ``(score, stored profile)`` pairs ranked by similarity, best first."""
+        size = len(self.profiles)
+        if size == 0 or k <= 0:
+            return []
+        scores = self.scores(profile)
+        if profile.get("id") is not None:
+            scores[self._ids[:size] == profile.get("id")] = -np.inf
+
+        k = min(k, size)
+        candidates = np.argpartition(-scores, k - 1)[:k] if k < size else np.arange(size)
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(float(scores[i]), self.profiles[i]) for i in ranked if scores[i] >= min_score]
+
+    def top_k(self, profile: dict, k: int = 3, min_score: float = 0.0) -> List[dict]:
+        """Return up to k stored profiles ranked by similarity, best first."""
+        return [stored for _, stored in self.search(profile, k, min_score)]
+
+    def _age_bucket(self, age) -> int:
+        try:
+            age = int(age)
+        except (TypeError, ValueError):
+            age = 0
+        return min(max(age, 0) // self.age_bucket_size, self.age_buckets - 1)
+
+    def _hash_tokens(self, text: Optional[str], out: np.ndarray):
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        np.add.at(out, [_stable_hash(token) % self.hash_dim for token in tokens], 1.0)
+        norm = np.linalg.norm(out)
+        if norm:
+            out /= norm
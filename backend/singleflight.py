@@ -0,0 +1,49 @@
+import asyncio
+import copy
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight computation.
+
+    The first caller for a key starts the work; callers arriving while it runs
+    await the same task and receive a copy of its result (or its exception).
+    The shared task is shielded, so one caller disconnecting does not cancel
+    the work for the others.
+    """
+
+    def __init__(self, max_tracked_keys: int = 10000):
+        self.max_tracked_keys = max_tracked_keys
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced_by_key: "OrderedDict[Hashable, int]" = OrderedDict()
+        self.stats: Dict[str, int] = {"leaders": 0, "coalesced": 0}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            self._count(key)
+            return copy.deepcopy(await asyncio.shield(task))
+
+        self.stats["leaders"] += 1
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Retrieve the exception so an unobserved failure does not log a warning
+            task.exception()
+
+    def _count(self, key: Hashable):
+        self.coalesced_by_key[key] = self.coalesced_by_key.get(key, 0) + 1
+        self.coalesced_by_key.move_to_end(key)
+        while len(self.coalesced_by_key) > self.max_tracked_keys:
+            self.coalesced_by_key.popitem(last=False)
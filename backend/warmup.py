@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupJob:
+    user_id: str
+    status: str = "queued"  # queued, running, done, failed, timeout, cancelled or skipped
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Dict[str, Any] = field(default_factory=dict)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in ("queued", "running")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "status": self.status,
+            "queued_seconds": round((self.started_at or self.finished_at or time.time()) - self.created_at, 3),
+            "run_seconds": round(self.finished_at - self.started_at, 3) if self.finished_at and self.started_at else None,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class WarmupPool:
+    """Bounded pool of workers precomputing what a new user's first requests need.
+
+    Jobs wait in a queue of at most ``max_pending``; when it is full the job
+    is marked ``skipped`` rather than slowing down the request that submitted
+    it. Each job runs as its own task so cancel() stops one user's job without
+    stopping the worker, and a job running longer than ``timeout`` is
+    cancelled. The last ``max_jobs`` jobs are kept for status queries.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 1000, max_jobs: int = 10000, timeout: float = 60.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, WarmupJob]" = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "submitted": 0, "done": 0, "failed": 0, "timeout": 0, "cancelled": 0, "skipped": 0,
+        }
+
+    def __len__(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> bool:
+        return any(not worker.done() for worker in self._workers)
+
+    def start(self):
+        if self.running or self.workers <= 0:
+            return
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    def submit(self, user_id: str, fn: Callable[[], Awaitable[Dict[str, Any]]]) -> WarmupJob:
+        """Queue ``fn`` for ``user_id``, replacing any earlier job for the same user."""
+        self.cancel(user_id)
+        job = WarmupJob(user_id)
+        self._remember(job)
+        self.stats["submitted"] += 1
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.max_pending)
+        if self.workers <= 0:
+            job.status = "skipped"
+        else:
+            try:
+                self._queue.put_nowait((job, fn))
+            except asyncio.QueueFull:
+                job.status = "skipped"
+        if job.status == "skipped":
+            self.stats["skipped"] += 1
+        return job
+
+    def status(self, user_id: str) -> Optional[WarmupJob]:
+        return self._jobs.get(user_id)
+
+    def cancel(self, user_id: str) -> bool:
+        """Cancel the user's queued or running job; False if there was none."""
+        job = self._jobs.get(user_id)
+        if job is None or job.finished:
+            return False
+        if job.task is not None:
+            job.task.cancel()
+        self._finish(job, "cancelled")
+        return True
+
+    async def close(self):
+        for job in list(self._jobs.values()):
+            if not job.finished:
+                self.cancel(job.user_id)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _work(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.max_pending)
+        while True:
+            job, fn = await self._queue.get()
+            if job.finished:
+                continue
+            job.status, job.started_at = "running", time.time()
+            task = job.task = asyncio.create_task(fn())
+            try:
+                await asyncio.wait({task}, timeout=self.timeout)
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            if job.finished:
+                continue
+            if not task.done():
+                task.cancel()
+                self._finish(job, "timeout")
+            elif task.cancelled():
+                self._finish(job, "cancelled")
+            elif task.exception() is not None:
+                error = task.exception()
+                logger.warning("Warm-up failed for %s: %s", job.user_id, error)
+                self._finish(job, "failed", error=f"{type(error).__name__}: {error}")
+            else:
+                job.result = task.result() or {}
+                self._finish(job, "done")
+
+    def _finish(self, job: WarmupJob, status: str, error: Optional[str] = None):
+        job.status, job.error, job.finished_at = status, error, time.time()
+        job.task = None
+        self.stats[status] += 1
+
+    def _remember(self, job: WarmupJob):
+        self._jobs[job.user_id] = job
+        self._jobs.move_to_end(job.user_id)
+        while len(self._jobs) > self.max_jobs:
+            _, evicted = self._jobs.popitem(last=False)
+            if not evicted.finished:
+                if evicted.task is not None:
+                    evicted.task.cancel()
+                self._finish(evicted, "cancelled")
+
+
+def create_warmup_pool_from_env() -> WarmupPool:
+    """Build the warm-up pool from WARMUP_* settings (WARMUP_WORKERS=0 disables warm-up)."""
+    return WarmupPool(
+        workers=int(os.environ.get("WARMUP_WORKERS", "4")),
+        max_pending=int(os.environ.get("WARMUP_MAX_PENDING", "1000")),
+        max_jobs=int(os.environ.get("WARMUP_MAX_JOBS", "10000")),
+        timeout=float(os.environ.get("WARMUP_TIMEOUT_SECONDS", "60")),
+    )
@@ -1,12 +1,25 @@
-import requests
+"""Integration checks against a running server (BACKEND_URL, default http://localhost:8001).
+
+Run directly with `python backend_test.py`. Under pytest it is skipped unless
+requests is installed and BACKEND_URL is set; tests/ covers the app in-process.
+"""
 import json
+import os
 import sys
 import time
 from datetime import datetime
 
+try:
+    import requests
+except ImportError:
+    requests = None
+
+BACKEND_URL = os.environ.get("BACKEND_URL")
+
 class ExperienceRecommenderTester:
-    def __init__(self, base_url="https://ba9c4fba-7e59-4e76-9046-432c1a2b5e28.preview.emergentagent.com"):
-        self.base_url = base_url
+    def __init__(self, base_url=None):
+        self.base_url = (base_url or BACKEND_URL or "http://localhost:8001").rstrip("/")
+        self.last_worker = None
         self.tests_run = 0
         self.tests_passed = 0
         self.user_id = None
@@ -25,6 +38,10 @@ class ExperienceRecommenderTester:
                 response = requests.get(url, headers=headers)
             elif method == 'POST':
                 response = requests.post(url, json=data, headers=headers)
+            elif method == 'PUT':
+                response = requests.put(url, json=data, headers=headers)
+            
+            self.last_worker = response.headers.get('X-Worker-Id')
             
             success = response.status_code == expected_status
             if success:
@@ -58,6 +75,26 @@ class ExperienceRecommenderTester:
             print(f"Health check response: {response}")
         return success
     
+    def test_readiness(self, timeout=30):
+        """Wait for the readiness endpoint to report the server warmed up"""
+        deadline = time.time() + timeout
+        while True:
+            try:
+                response = requests.get(f"{self.base_url}/api/ready", timeout=5)
+            except requests.RequestException as e:
+                response = None
+                print(f"Readiness check failed: {e}")
+            if response is not None and response.status_code == 200:
+                print(f"✅ Ready: {response.json()}")
+                return True
+            if response is not None and response.status_code == 503 and response.json().get("status") == "failed":
+                print(f"❌ Warm-up failed: {response.json()}")
+                return False
+            if time.time() > deadline:
+                print(f"❌ Not ready after {timeout}s")
+                return False
+            time.sleep(0.5)
+    
     def test_create_profile(self, profile_data):
         """Test creating a user profile"""
         success, response = self.run_test(
@@ -153,6 +190,65 @@ class ExperienceRecommenderTester:
         )
         return success
 
+    def test_cross_worker_consistency(self, rounds=20):
+        """Swipe through cards and update the profile while requests land on different workers.
+
+        Each request opens a new connection, so a multi-worker server spreads
+        them across its workers (reported in the X-Worker-Id header). No card
+        may repeat after it was swiped, and a profile update must be visible
+        to every worker right away.
+        """
+        if not self.user_id:
+            print("❌ Cannot test cross-worker consistency without a user_id")
+            return False
+        
+        workers = set()
+        swiped = []
+        for i in range(rounds):
+            success, response = self.run_test(f"Cross-worker Next Recommendation #{i+1}", "GET",
+                                              f"api/next-recommendation/{self.user_id}", 200)
+            workers.add(self.last_worker)
+            if not success:
+                return False
+            if 'id' not in response:
+                print("No more recommendations available, stopping early")
+                break
+            if response['id'] in swiped:
+                print(f"❌ Card {response['id']} repeated after it was swiped")
+                return False
+            swiped.append(response['id'])
+            success, _ = self.run_test(f"Cross-worker Interaction #{i+1}", "POST", "api/interaction", 200, data={
+                "user_id": self.user_id,
+                "experience_id": response['id'],
+                "action": "liked" if i % 2 == 0 else "disliked"
+            })
+            workers.add(self.last_worker)
+            if not success:
+                return False
+        
+        new_hobbies = f"cross-worker check {datetime.now().isoformat()}"
+        success, _ = self.run_test("Update Profile", "PUT", f"api/profile/{self.user_id}", 200,
+                                   data={"hobbies_interests": new_hobbies})
+        if not success:
+            return False
+        for i in range(max(4, 2 * len(workers))):
+            success, response = self.run_test(f"Read Updated Profile #{i+1}", "GET",
+                                              f"api/recommendations/{self.user_id}", 200)
+            workers.add(self.last_worker)
+            if not success:
+                return False
+            if response.get('user_profile', {}).get('hobbies_interests') != new_hobbies:
+                print(f"❌ Worker {self.last_worker} served a stale profile")
+                return False
+        
+        workers.discard(None)
+        if len(workers) < 2:
+            print("⚠️ Requests were served by a single worker, so cross-worker consistency was not checked here; "
+                  "start the server with SERVER_WORKERS>1, or run tests/test_multi_worker.py")
+        else:
+            print(f"✅ {len(swiped)} unique cards and a consistent profile across {len(workers)} workers")
+        return True
+
 def main():
     # Setup
     tester = ExperienceRecommenderTester()
@@ -174,6 +270,11 @@ def main():
         print("❌ Health check failed, stopping tests")
         return 1
     
+    # Wait for warm-up to finish
+    if not tester.test_readiness():
+        print("❌ Readiness check failed, stopping tests")
+        return 1
+    
     # Test profile creation
     if not tester.test_create_profile(profile_data):
         print("❌ Profile creation failed, stopping tests")
@@ -199,6 +300,11 @@ def main():
     diversity_score = diverse_recommendations / recommendation_count if recommendation_count > 0 else 0
     print(f"\n📊 Recommendation diversity score: {diversity_score:.2f} ({diverse_recommendations}/{recommendation_count})")
     
+    # Test that per-user state is shared between worker processes
+    print("\n===== TESTING CROSS-WORKER CONSISTENCY =====\n")
+    if not tester.test_cross_worker_consistency():
+        print("❌ Cross-worker consistency failed")
+    
     # Print results
     print(f"\n📊 Tests passed: {tester.tests_passed}/{tester.tests_run}")
     
@@ -209,5 +315,12 @@ def main():
     
     return 0 if tester.tests_passed == tester.tests_run and ai_integration_success else 1
 
+def test_integration_against_running_server():
+    """pytest entry point: runs main() against BACKEND_URL."""
+    import pytest
+    if requests is None or not BACKEND_URL:
+        pytest.skip("integration test: needs requests and BACKEND_URL pointing at a running server")
+    assert main() == 0
+
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
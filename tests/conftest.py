@@ -0,0 +1,14 @@
+import os
+import sys
+
+# The backend modules import each other as top-level modules, as when run from backend/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+# Offline settings for every app a test builds: in-memory database, fake LLM, no spill file
+os.environ.update({
+    "DATA_BACKEND": "memory",
+    "LLM_PROVIDER": "fake",
+    "FAKE_LLM_LATENCY_MS": "1",
+    "INTERACTION_SPILL_PATH": "",
+    "LOG_LEVEL": "WARNING",
+})
@@ -0,0 +1,75 @@
+"""IVFIndex and ProfileIndex: recall against brute force and the edge cases of search."""
+import numpy as np
+import pytest
+
+from ann_index import IVFIndex, ProfileIndex
+
+DIM = 32
+
+
+def clustered_vectors(count, clusters=20, seed=1):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, DIM))
+    vectors = centres[rng.integers(clusters, size=count)] + 0.3 * rng.normal(size=(count, DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def filled_index(count, **options):
+    index = IVFIndex(DIM, **options)
+    index.add_many(clustered_vectors(count), [{"id": str(i)} for i in range(count)])
+    return index
+
+
+def test_recall_at_k_against_brute_force():
+    index = filled_index(2000, nlist=32, nprobe=8, train_threshold=1000)
+    assert index.needs_training
+    index.train()
+    assert index.centroids is not None and not index.needs_training
+
+    k, found, wanted = 10, 0, 0
+    for query in clustered_vectors(50, seed=2):
+        exact = {payload["id"] for _, payload in index.exact_search(query, k)}
+        found += len(exact & {payload["id"] for _, payload in index.search(query, k)})
+        wanted += len(exact)
+    assert found / wanted >= 0.9
+
+
+def test_vectors_added_after_training_are_searchable():
+    index = filled_index(500, nlist=8, nprobe=1)
+    index.train()
+    vector = clustered_vectors(1, seed=3)[0]
+    index.add(vector, {"id": "new"})
+    assert index.search(vector, k=1, nprobe=1)[0][1] == {"id": "new"}
+
+
+def test_empty_index():
+    index = IVFIndex(DIM)
+    query = clustered_vectors(1)[0]
+    assert index.search(query) == [] and index.exact_search(query) == []
+    assert not index.needs_training
+    index.train()
+    assert index.centroids is None
+
+
+@pytest.mark.parametrize("trained", [False, True])
+def test_k_larger_than_the_index_returns_everything_best_first(trained):
+    index = filled_index(5, nlist=2, nprobe=2)
+    if trained:
+        index.train()
+    query = clustered_vectors(1, seed=4)[0]
+    results = index.search(query, k=50)
+    assert sorted(payload["id"] for _, payload in results) == ["0", "1", "2", "3", "4"]
+    assert [score for score, _ in results] == sorted((score for score, _ in results), reverse=True)
+    assert results == index.exact_search(query, k=50)
+
+
+def test_profile_index_replaces_by_id_and_excludes_the_query_profile():
+    index = ProfileIndex()
+    index.add_many([{"id": "a", "work_resume": "python apis", "hobbies_interests": "chess"},
+                    {"id": "b", "work_resume": "pottery", "hobbies_interests": "gardening"}])
+    index.add({"id": "b", "work_resume": "python services", "hobbies_interests": "chess"})
+    assert len(index) == 2
+
+    query = {"id": "a", "work_resume": "python apis", "hobbies_interests": "chess"}
+    assert [profile["id"] for profile in index.top_k(query, k=5)] == ["b"]
+    assert index.top_k(query, k=5, min_score=1.01) == []
@@ -0,0 +1,73 @@
+"""NDJSON parsing and the streamed bulk profile import."""
+import asyncio
+import json
+
+import pytest
+
+from bulk import LineTooLong, import_profiles, iter_ndjson
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(records):
+    return [record async for record in records]
+
+
+def validate(record):
+    if "name" not in record:
+        raise ValueError("name is required")
+    return {"id": record["name"]}
+
+
+@pytest.mark.asyncio
+async def test_lines_split_across_chunks_are_joined():
+    records = await collect(iter_ndjson(stream(b'{"a": 1}\n{"a"', b': 2}\n\n{"a": 3}')))
+    assert records == [(1, {"a": 1}), (2, {"a": 2}), (4, {"a": 3})]
+
+
+@pytest.mark.asyncio
+async def test_invalid_line_yields_the_error():
+    records = await collect(iter_ndjson(stream(b'{"a": 1}\nnot json\n')))
+    assert records[0] == (1, {"a": 1})
+    assert records[1][0] == 2 and isinstance(records[1][1], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_line_longer_than_the_limit_raises_before_it_ends():
+    chunks = [b'{"a": 1}\n'] + [b"x" * 64] * 4
+    with pytest.raises(LineTooLong) as raised:
+        await collect(iter_ndjson(stream(*chunks), max_line_bytes=100))
+    assert raised.value.line == 2
+
+
+@pytest.mark.asyncio
+async def test_import_reports_ids_in_order_and_failures_by_line():
+    inserted = []
+
+    async def insert(batch):
+        await asyncio.sleep(0)
+        inserted.append([profile["id"] for profile in batch])
+        return {index: "duplicate" for index, profile in enumerate(batch) if profile["id"] == "dup"}
+
+    lines = [{"name": "a"}, {}, {"name": "b"}, {"name": "dup"}, {"name": "c"}]
+    body = "\n".join(json.dumps(line) for line in lines).encode()
+    report = await import_profiles(iter_ndjson(stream(body)), validate, insert, batch_size=2)
+
+    assert report.user_ids == ["a", "b", "c"]
+    assert inserted == [["a", "b"], ["dup", "c"]]
+    assert [error["line"] for error in report.errors] == [2, 4]
+    assert report.failed == 2 and report.batches == 2
+
+
+@pytest.mark.asyncio
+async def test_import_stops_at_the_profile_limit():
+    async def insert(batch):
+        return {}
+
+    body = b"\n".join(json.dumps({"name": str(i)}).encode() for i in range(5))
+    report = await import_profiles(iter_ndjson(stream(body)), validate, insert, max_profiles=3)
+    assert report.user_ids == ["0", "1", "2"]
+    assert report.errors[0]["line"] == 4
@@ -0,0 +1,69 @@
+"""The recommendation cache: key canonicalisation, LRU/TTL and the shared backend."""
+import asyncio
+
+import pytest
+
+from cache import RecommendationCache, SharedCacheBackend, recommendation_cache_key
+from repository import InMemoryBackend
+
+PROFILE = {"age": 31, "work_group": "Tech", "work_role": "Engineer", "work_resume": "APIs", "hobbies_interests": "chess"}
+
+
+def test_key_ignores_order_and_unrelated_fields():
+    key = recommendation_cache_key(PROFILE, ["b", "a"], ["x", "y", "x"], 3)
+    assert key == recommendation_cache_key(dict(PROFILE, id="u1"), ["a", "b"], ["y", "x"], 3)
+    assert key != recommendation_cache_key(PROFILE, ["a", "b"], ["y", "x"], 2)
+    assert key != recommendation_cache_key(dict(PROFILE, age=32), ["a", "b"], ["y", "x"], 3)
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_and_the_oldest_is_evicted():
+    recommendations = RecommendationCache(max_entries=2, ttl=0.05)
+    await recommendations.set("a", [1])
+    await recommendations.set("b", [2])
+    assert await recommendations.get("a") == [1]
+    await recommendations.set("c", [3])  # "b" is now the least recently used
+    assert await recommendations.get("b") is None
+    await asyncio.sleep(0.06)
+    assert await recommendations.get("a") is None
+    assert recommendations.stats["evictions"] == 1 and recommendations.stats["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_callers_get_copies():
+    recommendations = RecommendationCache()
+    value = [{"id": "exp1"}]
+    await recommendations.set("k", value)
+    value[0]["id"] = "changed"
+    (await recommendations.get("k"))[0]["id"] = "changed again"
+    assert await recommendations.get("k") == [{"id": "exp1"}]
+
+
+class RecordingCollection:
+    """Passes through to a collection and records the indexes asked for."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.indexes = []
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def create_index(self, keys, **kwargs):
+        self.indexes.append((keys, kwargs))
+
+
+@pytest.mark.asyncio
+async def test_shared_backend_serves_other_workers_and_indexes_the_key():
+    collection = RecordingCollection(InMemoryBackend().collection("recommendation_cache"))
+    first = RecommendationCache(ttl=0.05, shared=SharedCacheBackend(collection))
+    second = RecommendationCache(ttl=0.05, shared=SharedCacheBackend(collection))
+
+    await first.set("k", ["exp1"])
+    assert await second.get("k") == ["exp1"]
+    assert second.stats["shared_hits"] == 1
+    assert ("key", {"unique": True}) in collection.indexes
+
+    await asyncio.sleep(0.06)
+    second.clear()
+    assert await second.get("k") is None
@@ -0,0 +1,71 @@
+"""ItemItemRecommender: training from db.interactions, scoring, and its use as the server's fallback."""
+import pytest
+
+import server
+from collaborative import ItemItemRecommender
+from repository import InMemoryBackend
+
+INTERACTIONS = [
+    {"user_id": "a", "experience_id": "exp1", "action": "liked"},
+    {"user_id": "a", "experience_id": "exp2", "action": "liked"},
+    {"user_id": "b", "experience_id": "exp1", "action": "liked"},
+    {"user_id": "b", "experience_id": "exp2", "action": "liked"},
+    {"user_id": "c", "experience_id": "exp1", "action": "liked"},
+    {"user_id": "c", "experience_id": "exp3", "action": "disliked"},
+    {"user_id": "u", "experience_id": "exp1", "action": "liked"},
+]
+
+PROFILE = {"id": "u", "age": 31, "work_group": "Tech", "work_role": "Engineer",
+           "work_resume": "APIs", "hobbies_interests": "chess"}
+
+
+@pytest.mark.asyncio
+async def test_trains_from_recorded_interactions():
+    collection = InMemoryBackend().collection("interactions")
+    await collection.insert_many([dict(interaction) for interaction in INTERACTIONS])
+    model = ItemItemRecommender(catalog={"exp1", "exp2", "exp3"})
+    await collection.insert_one({"user_id": "a", "experience_id": "made-up", "action": "liked"})
+
+    assert await model.load_from_collection(collection, batch_size=3) == len(INTERACTIONS) + 1
+    assert len(model) == 4 and model.item_count == 3  # the id outside the catalog is ignored
+    assert model.is_cold("u")
+
+
+def test_scores_co_liked_items_first_and_explains_them():
+    model = ItemItemRecommender()
+    model.observe_many(INTERACTIONS)
+    ranked = model.recommend("u", ["exp3", "exp4", "exp2"], count=3)
+    assert [experience_id for experience_id, _, _ in ranked] == ["exp2", "exp4", "exp3"]
+    assert ranked[0][2] == "exp1" and ranked[0][1] > 0 > ranked[2][1]
+
+
+def test_a_repeated_interaction_replaces_the_earlier_rating():
+    model = ItemItemRecommender()
+    model.observe_many(INTERACTIONS)
+    model.observe("c", "exp3", "liked")
+    ranked = dict((experience_id, score) for experience_id, score, _ in model.recommend("u", ["exp3"]))
+    assert ranked["exp3"] > 0
+
+
+@pytest.fixture
+def recommender():
+    recommender = server.create_app().state.recommender
+    recommender.item_recommender.observe_many(INTERACTIONS)
+    return recommender
+
+
+def test_local_recommendations_exclude_shown_ids(recommender):
+    recommendations = recommender.local_recommendations(PROFILE, [], {"exp2"}, count=3)
+    ids = [recommendation["id"] for recommendation in recommendations]
+    assert len(ids) == 3 and "exp2" not in ids
+    assert all(recommender.catalog.get(experience_id) for experience_id in ids)
+
+
+def test_fallback_prefers_the_model_then_the_static_list(recommender):
+    fallback = recommender.generate_fallback_recommendations(["exp1"], PROFILE, count=2)
+    assert fallback[0]["id"] == "exp2"
+
+    recommender.mode = "local"  # the model was already tried before the LLM
+    fallback = recommender.generate_fallback_recommendations(["exp1"], PROFILE, count=3)
+    assert [recommendation["id"] for recommendation in fallback] == ["exp4", "exp6", "exp2"]
+    assert recommender.generate_fallback_recommendations([rec["id"] for rec in server.fallback_recommendations]) == []
@@ -0,0 +1,109 @@
+"""InteractionPipeline: batched write-behind, spill to disk and replay."""
+import asyncio
+
+import pytest
+
+from interaction_pipeline import InteractionPipeline, InteractionQueueFull, SpillLog
+
+
+class Repository:
+    """Records each insert_many batch; raises while ``down`` is set."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.down = False
+        self.batches = []
+
+    async def record_many(self, interactions):
+        await asyncio.sleep(self.delay)
+        if self.down:
+            raise ConnectionError("database unavailable")
+        self.batches.append(list(interactions))
+
+    def written(self):
+        return [event["n"] for batch in self.batches for event in batch]
+
+
+async def eventually(condition, timeout: float = 5.0):
+    """Wait for ``condition()``; the first failed write imports pymongo, which takes a while."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def events(count: int, start: int = 0):
+    return [{"user_id": "u1", "experience_id": "exp1", "action": "liked", "n": n} for n in range(start, start + count)]
+
+
+@pytest.mark.asyncio
+async def test_events_are_written_in_batches_and_drained_on_close():
+    repository = Repository()
+    pipeline = InteractionPipeline(repository, batch_size=10, flush_interval=0.01)
+    for event in events(25):
+        await pipeline.submit(event)
+    await pipeline.close()
+    assert repository.written() == list(range(25))
+    assert [len(batch) for batch in repository.batches] == [10, 10, 5]
+    with pytest.raises(InteractionQueueFull):
+        await pipeline.submit(events(1)[0])
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_after_the_enqueue_timeout():
+    pipeline = InteractionPipeline(Repository(delay=0.2), max_queue=2, batch_size=1, enqueue_timeout=0.01)
+    with pytest.raises(InteractionQueueFull):
+        for event in events(5):
+            await pipeline.submit(event)
+    assert pipeline.stats["rejected"] == 1
+    await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_spilled_and_replayed(tmp_path):
+    path = str(tmp_path / "spill.ndjson")
+    repository = Repository()
+    repository.down = True
+    pipeline = InteractionPipeline(repository, flush_interval=0.01, spill_path=path, retry_interval=0.02)
+    for event in events(3):
+        await pipeline.submit(event)
+    await eventually(lambda: pipeline.stats["spilled"] == 3)
+    assert SpillLog(path).pending()  # a failing retry may have moved the log aside meanwhile
+
+    repository.down = False
+    await pipeline.submit(events(1, start=3)[0])
+    await eventually(lambda: pipeline.stats["replayed"] == 3)
+    await pipeline.close()
+    assert sorted(repository.written()) == [0, 1, 2, 3]
+    assert pipeline.stats["replayed"] == 3
+    assert not SpillLog(path).pending()
+
+
+@pytest.mark.asyncio
+async def test_spill_left_by_a_previous_process_is_replayed_on_start(tmp_path):
+    path = str(tmp_path / "spill.ndjson")
+    SpillLog(path).append(events(2))
+    repository = Repository()
+    pipeline = InteractionPipeline(repository, spill_path=path)
+    pipeline.start()
+    await pipeline.close()
+    assert repository.written() == [0, 1]
+
+
+def test_spill_log_replays_under_one_lock_and_keeps_the_remainder(tmp_path):
+    path = str(tmp_path / "spill.ndjson")
+    first, second = SpillLog(path), SpillLog(path)
+    first.append(events(3))
+    with open(path, "a") as f:
+        f.write('{"torn": ')  # a crash mid-append
+
+    documents = first.take()
+    assert [document["n"] for document in documents] == [0, 1, 2]
+    assert second.take() is None  # another process is replaying
+    second.append(events(1, start=3))  # appends continue meanwhile
+    first.keep(documents[2:])
+
+    assert [document["n"] for document in second.take()] == [2]
+    second.keep([])
+    assert [document["n"] for document in first.take()] == [3]
@@ -0,0 +1,79 @@
+"""LLMClient: deadlines, retries and the concurrency limit."""
+import asyncio
+
+import pytest
+
+from llm_client import LLMClient, LLMResult, LLMTimeoutError, RetryableLLMError
+
+
+class Provider:
+    """Answers after ``latency`` seconds, failing the first ``failures`` calls as retryable."""
+
+    available = True
+
+    def __init__(self, latency: float = 0.0, failures: int = 0):
+        self.latency = latency
+        self.failures = failures
+        self.calls = 0
+
+    async def complete(self, messages, max_tokens, temperature):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.calls <= self.failures:
+            raise RetryableLLMError("try again")
+        return LLMResult(content="ok")
+
+    async def stream(self, messages, max_tokens, temperature):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.calls <= self.failures:
+            raise RetryableLLMError("try again")
+        for delta in ("o", "k"):
+            yield delta
+
+    async def close(self):
+        pass
+
+
+async def drain(client: LLMClient, timeout: float) -> str:
+    return "".join([delta async for delta in client.stream([], timeout=timeout)])
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried():
+    client = LLMClient(Provider(failures=2), max_retries=2, backoff_base=0.001)
+    assert (await client.complete([])).content == "ok"
+    assert await drain(LLMClient(Provider(failures=1), backoff_base=0.001), timeout=1) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_after_max_retries():
+    client = LLMClient(Provider(failures=5), max_retries=1, backoff_base=0.001)
+    with pytest.raises(RetryableLLMError):
+        await client.complete([])
+
+
+@pytest.mark.asyncio
+async def test_deadline_covers_the_queue():
+    client = LLMClient(Provider(latency=0.2), max_concurrency=1)
+    holder = asyncio.create_task(client.complete([]))
+    await asyncio.sleep(0)
+    with pytest.raises(LLMTimeoutError):
+        await client.complete([], timeout=0.02)
+    with pytest.raises(LLMTimeoutError):
+        await drain(client, timeout=0.02)
+    await holder
+
+
+@pytest.mark.asyncio
+async def test_timeouts_while_queued_never_leak_permits():
+    client = LLMClient(Provider(latency=0.003), max_concurrency=2)
+    calls = []
+    for i in range(200):
+        # Deadlines land around the moment a permit is handed over
+        timeout = 0.001 + (i % 7) * 0.001
+        calls.append(drain(client, timeout) if i % 2 else client.complete([], timeout=timeout))
+    await asyncio.gather(*calls, return_exceptions=True)
+    assert client.in_flight == 0
+    assert client._semaphore._value == 2
+    assert (await client.complete([], timeout=1)).content == "ok"
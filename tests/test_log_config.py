@@ -0,0 +1,34 @@
+"""configure_logging: the queue listener keeps working in forked workers."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+SCRIPT = """
+import logging, os
+import log_config
+log_config.configure_logging("INFO")
+logger = logging.getLogger("t")
+for n in range(20):
+    logger.info("parent %d", n)
+    pid = os.fork()
+    if pid == 0:
+        logger.info("child %d", n)
+        log_config._stop_listener()
+        log_config._stop_listener()
+        os._exit(0)
+    os.waitpid(pid, 0)
+"""
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_logs_through_its_own_listener():
+    # In a subprocess: configure_logging changes the root logger for good
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=BACKEND_DIR, capture_output=True, text=True,
+                            timeout=10, env=dict(os.environ, LOG_FORMAT="text"))
+    assert result.returncode == 0, result.stderr
+    messages = [line.rsplit(": ", 1)[-1] for line in result.stderr.splitlines()]
+    assert sorted(messages) == sorted(f"{who} {n}" for n in range(20) for who in ("parent", "child"))
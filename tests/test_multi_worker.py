@@ -0,0 +1,69 @@
+"""Two app instances on one database and one shared store, standing in for two gunicorn workers."""
+import contextlib
+
+import httpx
+import pytest
+
+import server
+from repository import InMemoryBackend
+
+PROFILE = {
+    "age": 31,
+    "work_group": "Tech",
+    "work_role": "Backend Engineer",
+    "work_resume": "6 years building APIs",
+    "hobbies_interests": "climbing, chess",
+}
+
+
+@contextlib.asynccontextmanager
+async def worker(app):
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://worker") as client:
+            yield client
+
+
+@pytest.fixture
+def apps(tmp_path, monkeypatch):
+    monkeypatch.setenv("SERVER_WORKERS", "2")
+    monkeypatch.setenv("SHARED_STORE", "sqlite")
+    monkeypatch.setenv("SHARED_STORE_PATH", str(tmp_path / "shared.sqlite3"))
+    backend = InMemoryBackend()
+    return server.create_app(backend), server.create_app(backend)
+
+
+@pytest.mark.asyncio
+async def test_cards_are_not_repeated_across_workers(apps):
+    async with worker(apps[0]) as first, worker(apps[1]) as second:
+        workers = [first, second]
+        user_id = (await first.post("/api/profile", json=PROFILE)).json()["user_id"]
+
+        seen = []
+        for i in range(8):
+            # Each worker serves from its own prefetched batch; swipes land on the other one
+            response = await workers[i % 2].get(f"/api/next-recommendation/{user_id}")
+            assert response.status_code == 200
+            card = response.json()
+            if "id" not in card:
+                break
+            assert card["id"] not in seen, f"card {card['id']} repeated on worker {i % 2}"
+            seen.append(card["id"])
+            response = await workers[(i + 1) % 2].post("/api/interaction", json={
+                "user_id": user_id, "experience_id": card["id"], "action": "liked",
+            })
+            assert response.status_code == 200
+
+        assert len(seen) == 8
+
+
+@pytest.mark.asyncio
+async def test_profile_update_is_visible_on_the_other_worker(apps):
+    async with worker(apps[0]) as first, worker(apps[1]) as second:
+        user_id = (await first.post("/api/profile", json=PROFILE)).json()["user_id"]
+        assert (await second.get(f"/api/recommendations/{user_id}")).status_code == 200
+
+        response = await first.put(f"/api/profile/{user_id}", json={"hobbies_interests": "sailing"})
+        assert response.status_code == 200
+
+        profile = (await second.get(f"/api/recommendations/{user_id}")).json()["user_profile"]
+        assert profile["hobbies_interests"] == "sailing"
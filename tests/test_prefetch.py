@@ -0,0 +1,76 @@
+"""PrefetchQueue: serving the head, background refills and invalidation."""
+import asyncio
+
+import pytest
+
+from prefetch import PrefetchQueue
+
+
+class Fetcher:
+    """Hands out exp1, exp2, ... skipping excluded ids, and records each call."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+
+    async def __call__(self, exclude_ids, count):
+        self.calls.append(list(exclude_ids))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("LLM down")
+        ids = (f"exp{i}" for i in range(1, 100) if f"exp{i}" not in exclude_ids)
+        return [{"id": next(ids)} for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_head_is_served_until_shown_then_refilled_in_the_background():
+    queue = PrefetchQueue(batch_size=3, low_watermark=1)
+    fetch = Fetcher()
+
+    assert await queue.next("u1", [], fetch) == {"id": "exp1"}
+    assert await queue.next("u1", [], fetch) == {"id": "exp1"}
+    assert await queue.next("u1", ["exp1"], fetch) == {"id": "exp2"}
+    assert len(fetch.calls) == 1
+
+    # One unseen card left: a refill starts, excluding shown and queued ids
+    assert await queue.next("u1", ["exp1", "exp2"], fetch) == {"id": "exp3"}
+    await asyncio.sleep(0.01)
+    assert fetch.calls[1] == ["exp1", "exp2", "exp3"]
+    assert [item["id"] for item in queue.peek("u1")] == ["exp3", "exp4", "exp5", "exp6"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch():
+    queue = PrefetchQueue(batch_size=3, low_watermark=0)
+    fetch = Fetcher(delay=0.01)
+    cards = await asyncio.gather(*(queue.next("u1", [], fetch) for _ in range(5)))
+    assert cards == [{"id": "exp1"}] * 5
+    assert len(fetch.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_serves_nothing():
+    queue = PrefetchQueue()
+    assert await queue.next("u1", [], Fetcher(fail=True)) is None
+    assert await queue.next("u1", [], Fetcher()) == {"id": "exp1"}
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_the_queue_and_a_refill_in_flight():
+    queue = PrefetchQueue()
+    fetch = Fetcher(delay=0.05)
+    waiting = asyncio.create_task(queue.next("u1", [], fetch))
+    await asyncio.sleep(0.01)
+    queue.invalidate("u1")
+    assert await waiting is None
+    assert queue.peek("u1") == []
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_users_are_evicted():
+    queue = PrefetchQueue(max_users=2)
+    queue.offer("u1", [{"id": "exp1"}])
+    queue.offer("u2", [{"id": "exp1"}])
+    queue.offer("u3", [{"id": "exp1"}])
+    assert queue.peek("u1") == [] and queue.head("u3", []) == {"id": "exp1"}
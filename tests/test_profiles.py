@@ -0,0 +1,77 @@
+"""ProfileService: read-through caching, negative entries and cross-worker versions."""
+import asyncio
+
+import pytest
+
+from profiles import Profile, ProfileService
+from repository import InMemoryBackend, ProfileRepository
+from shared_store import SQLiteSharedStore
+
+PROFILE = {"id": "u1", "age": 31, "work_group": "Tech", "work_role": "Engineer",
+           "work_resume": "APIs", "hobbies_interests": "chess"}
+
+
+class CountingRepository(ProfileRepository):
+    def __init__(self, collection=None):
+        super().__init__(collection or InMemoryBackend().collection("profiles"))
+        self.reads = 0
+
+    async def get(self, user_id):
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        return await super().get(user_id)
+
+
+def test_profile_behaves_like_a_mapping():
+    profile = Profile.from_dict(PROFILE)
+    assert profile["work_role"] == "Engineer" and profile.get("missing", 1) == 1
+    assert profile.to_dict() == PROFILE
+    with pytest.raises(KeyError):
+        profile["missing"]
+
+
+@pytest.mark.asyncio
+async def test_reads_go_through_the_cache_and_concurrent_misses_share_one_read():
+    repository = CountingRepository()
+    await repository.create(PROFILE)
+    service = ProfileService(repository)
+    found = await asyncio.gather(*(service.get("u1") for _ in range(3)))
+    assert found == [Profile.from_dict(PROFILE)] * 3
+    assert await service.get("u1") == Profile.from_dict(PROFILE)
+    assert repository.reads == 1 and service.stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_ids_are_cached_until_the_negative_ttl_expires():
+    repository = CountingRepository()
+    service = ProfileService(repository, negative_ttl=0.05)
+    assert await service.get("u1") is None
+    await repository.create(PROFILE)  # created by another worker
+    assert await service.get("u1") is None
+    assert repository.reads == 1 and service.stats["negative_hits"] == 1
+    await asyncio.sleep(0.06)
+    assert await service.get("u1") == Profile.from_dict(PROFILE)
+
+
+@pytest.mark.asyncio
+async def test_bulk_created_profiles_replace_negative_entries():
+    service = ProfileService(CountingRepository())
+    assert await service.get("u1") is None
+    assert await service.create_many([PROFILE]) == {}
+    assert await service.get("u1") == Profile.from_dict(PROFILE)
+
+
+@pytest.mark.asyncio
+async def test_updates_through_one_worker_are_seen_by_another(tmp_path):
+    collection = InMemoryBackend().collection("profiles")
+    shared = SQLiteSharedStore(str(tmp_path / "shared.sqlite3"))
+    changed = []
+    first = ProfileService(CountingRepository(collection), shared=shared)
+    second = ProfileService(CountingRepository(collection), shared=shared, on_change=changed.append)
+
+    await first.create(PROFILE)
+    assert (await second.get("u1")).work_role == "Engineer"
+    await first.update("u1", {"work_role": "Architect"})
+    assert (await second.get("u1")).work_role == "Architect"
+    assert changed == ["u1"] and second.stats["stale"] == 1
+    await shared.close()
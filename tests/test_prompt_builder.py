@@ -0,0 +1,76 @@
+"""PromptBuilder: candidate rows, the input token budget and the legacy-prompt savings report."""
+import pytest
+
+from catalog import ExperienceCatalog
+from prompt_builder import (LEGACY_STATIC_TEXT, MESSAGE_OVERHEAD_TOKENS, REPLY_OVERHEAD_TOKENS, PromptBuilder,
+                            estimate_tokens)
+
+EXPERIENCES = [
+    {"id": f"exp{i}", "title": f"Experience {i}", "category": ["Crafts", "Dance", "Nature"][i % 3],
+     "description": f"Try something new for the {i}th time, outdoors or in a small workshop group"}
+    for i in range(1, 61)
+]
+
+PROFILE = {"id": "u1", "age": 31, "work_group": "Tech", "work_role": "Engineer",
+           "work_resume": "Built APIs and data pipelines", "hobbies_interests": "chess, climbing"}
+
+
+@pytest.fixture
+def catalog():
+    return ExperienceCatalog(EXPERIENCES)
+
+
+def prompt_tokens(plan):
+    return (sum(estimate_tokens(message["content"]) for message in plan.messages)
+            + len(plan.messages) * MESSAGE_OVERHEAD_TOKENS + REPLY_OVERHEAD_TOKENS)
+
+
+def test_prompt_lists_the_candidates_as_catalog_rows(catalog):
+    plan = PromptBuilder(catalog).build(PROFILE, EXPERIENCES[:3], count=2)
+    system, user = plan.messages
+    assert system["role"] == "system" and user["role"] == "user"
+    assert plan.candidate_ids == ["exp1", "exp2", "exp3"]
+    rows = [catalog.prompt_row(experience_id) for experience_id in plan.candidate_ids]
+    assert "\n".join(rows) in user["content"]
+    assert rows[0].startswith("exp1|Experience 1|Dance|")
+    assert "Return exactly 2 experience suggestion(s)" in user["content"]
+    assert "role Engineer" in user["content"] and "chess, climbing" in user["content"]
+
+
+@pytest.mark.parametrize("budget", [300, 500, 900])
+def test_candidates_are_dropped_to_stay_within_the_input_budget(catalog, budget):
+    plan = PromptBuilder(catalog, max_input_tokens=budget).build(PROFILE, EXPERIENCES, count=1)
+    assert 1 <= len(plan.candidate_ids) < len(EXPERIENCES)
+    assert plan.candidate_ids == [experience["id"] for experience in EXPERIENCES[:len(plan.candidate_ids)]]
+    assert prompt_tokens(plan) <= plan.report["input_tokens"] <= budget
+    assert plan.report["candidates_dropped"] == len(EXPERIENCES) - len(plan.candidate_ids)
+
+
+def test_count_candidates_are_kept_even_over_budget(catalog):
+    plan = PromptBuilder(catalog, max_input_tokens=10).build(PROFILE, EXPERIENCES, count=3)
+    assert plan.candidate_ids == ["exp1", "exp2", "exp3"]
+
+
+def test_long_free_text_fields_are_truncated(catalog):
+    profile = dict(PROFILE, work_resume="pipelines " * 500)
+    plan = PromptBuilder(catalog, max_field_tokens=20).build(profile, EXPERIENCES[:1])
+    resume = next(line for line in plan.messages[1]["content"].splitlines() if line.startswith("Resume: "))
+    assert resume.endswith("...") and estimate_tokens(resume) <= 25
+
+
+def test_output_budget_grows_with_count(catalog):
+    builder = PromptBuilder(catalog, reasoning_words=25)
+    one, three = builder.build(PROFILE, EXPERIENCES, 1).max_tokens, builder.build(PROFILE, EXPERIENCES, 3).max_tokens
+    assert 50 < one < three < 4 * one
+
+
+def test_report_compares_against_the_legacy_static_prompt(catalog):
+    candidates = EXPERIENCES[:10]
+    plan = PromptBuilder(catalog).build(PROFILE, candidates)
+    report = plan.report
+    assert report["baseline_input_tokens"] > estimate_tokens(LEGACY_STATIC_TEXT)
+    assert report["input_tokens_saved"] == report["baseline_input_tokens"] - report["input_tokens"] > 0
+    assert report["max_tokens_saved"] == report["baseline_max_tokens"] - plan.max_tokens > 0
+
+    quiet = PromptBuilder(catalog, report_savings=False).build(PROFILE, candidates).report
+    assert set(quiet) == {"input_tokens", "max_tokens", "candidates", "candidates_dropped"}
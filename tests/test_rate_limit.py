@@ -0,0 +1,105 @@
+"""Request rate limits and LLM admission control."""
+import pytest
+
+import server
+from rate_limit import LLMAdmission, RateLimited, RateLimiter, TokenBucket
+
+
+PROFILE = dict(server.mock_profiles[0], id="u1")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LLM:
+    max_concurrency = 2
+
+
+def test_bucket_refills_at_its_rate_up_to_the_burst():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, burst=4, clock=clock)
+    bucket.take(4)
+    assert bucket.wait_time() == pytest.approx(0.5)
+    clock.now += 10
+    bucket.take(4)
+    assert bucket.wait_time() == pytest.approx(0.5)
+    assert TokenBucket(rate=0, burst=0).wait_time(100) == 0
+
+
+def test_user_limit_leaves_other_users_alone():
+    clock = Clock()
+    limiter = RateLimiter(user_rate=1, user_burst=2, global_rate=0, clock=clock)
+    limiter.acquire("u1")
+    limiter.acquire("u1")
+    with pytest.raises(RateLimited) as refused:
+        limiter.acquire("u1")
+    assert refused.value.scope == "user" and refused.value.retry_after == pytest.approx(1)
+    limiter.acquire("u2")
+    clock.now += 1
+    limiter.acquire("u1")
+
+
+def test_global_refusal_does_not_charge_the_user():
+    clock = Clock()
+    limiter = RateLimiter(user_rate=1, user_burst=1, global_rate=1, global_burst=1, clock=clock)
+    limiter.acquire("u1")
+    with pytest.raises(RateLimited) as refused:
+        limiter.acquire("u2")
+    assert refused.value.scope == "global"
+    clock.now += 1
+    limiter.acquire("u2")  # u2's own bucket was not drained by the refusal
+    assert limiter.stats == {"admitted": 2, "user_limited": 0, "global_limited": 1}
+
+
+def test_admission_refuses_when_every_slot_is_taken_until_one_is_released():
+    admission = LLMAdmission(LLM(), max_queued=1)
+    assert [admission.admit(100) for _ in range(3)] == [None, None, None]
+    assert admission.admit(100) == "concurrency"
+    admission.release(100)
+    assert admission.admit(100) is None
+    assert admission.in_flight == 3
+    assert LLMAdmission(LLM(), max_queued=-1).admit(100) is None
+
+
+def test_admission_spends_the_token_budget_and_gets_unused_tokens_back():
+    clock = Clock()
+    admission = LLMAdmission(LLM(), max_queued=-1, tokens_per_minute=600, clock=clock)
+    assert admission.admit(500) is None
+    assert admission.admit(500) == "token_budget"
+    admission.release(500, used_tokens=200)  # 300 of the reservation were not billed
+    assert admission.admit(350) is None
+    assert admission.stats == {"admitted": 2, "concurrency": 0, "token_budget": 1}
+
+
+@pytest.fixture
+def recommender():
+    return server.create_app().state.recommender
+
+
+@pytest.mark.asyncio
+async def test_failed_llm_call_releases_its_admission(recommender, monkeypatch):
+    async def fail(**kwargs):
+        raise ConnectionError("provider down")
+
+    monkeypatch.setattr(recommender.llm, "complete", fail)
+    experiences = recommender.catalog.candidates(PROFILE, set())
+    recommendations = await recommender.request_ai_recommendations(PROFILE, experiences, set(), 2, "key")
+    assert recommendations  # served from the fallback
+    assert recommender.llm_admission.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_releases_its_admission(recommender, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise ConnectionError("provider down")
+        yield
+
+    monkeypatch.setattr(recommender.llm, "stream", fail)
+    events = [event async for event in recommender.stream_recommendation_events("u1", PROFILE, set())]
+    assert any("recommendation" in event for event in events)
+    assert recommender.llm_admission.in_flight == 0
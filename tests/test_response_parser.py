@@ -0,0 +1,121 @@
+"""Extracting, repairing and validating recommendations from completions."""
+import json
+
+import pytest
+
+from catalog import ExperienceCatalog
+from response_parser import IncrementalJSONParser, RecommendationParser, extract_objects, repair_json
+
+EXPERIENCES = [
+    {"id": f"exp{i}", "title": title, "description": f"About {title.lower()}", "category": "Outdoors"}
+    for i, title in enumerate(["Rock Climbing", "Sailing", "Pottery Class", "Night Hike"], start=1)
+]
+
+
+@pytest.fixture
+def parser():
+    return RecommendationParser(ExperienceCatalog(EXPERIENCES))
+
+
+def completion(*items) -> str:
+    return json.dumps([{"id": item, "reasoning": f"Because {item}"} for item in items])
+
+
+def test_catalog_fields_come_from_the_catalog(parser):
+    result = parser.parse(completion("exp1"), 1)
+    assert result.recommendations == [dict(EXPERIENCES[0], reasoning="Because exp1")]
+
+
+def test_unknown_shown_and_duplicate_ids_are_rejected(parser):
+    result = parser.parse(completion("nope", "exp2", "exp1", "exp1", "exp3"), 5, exclude_ids={"exp2"})
+    assert [rec["id"] for rec in result.recommendations] == ["exp1", "exp3"]
+    assert result.rejected == {"unknown_id": 1, "already_shown": 1, "duplicate": 1}
+
+
+def test_catalog_ids_the_prompt_did_not_offer_are_rejected(parser):
+    result = parser.parse(completion("exp1", "exp4", "exp2"), 3, candidate_ids=["exp1", "exp2"])
+    assert [rec["id"] for rec in result.recommendations] == ["exp1", "exp2"]
+    assert result.rejected == {"not_offered": 1}
+    # Titles resolve to ids before the check
+    assert parser.validate({"title": "night hike"}, candidate_ids={"exp1"}) == (None, "not_offered")
+
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('```json\n[{"id": "exp1"}]\n```', [{"id": "exp1"}]),
+    ("[{'id': 'exp1', 'reasoning': 'it\\'s fun'}]", [{"id": "exp1", "reasoning": "it's fun"}]),
+    ('[{id: "exp1", ok: True, extra: None}]', [{"id": "exp1", "ok": True, "extra": None}]),
+    ('[{"id": "exp1",}, ]', [{"id": "exp1"}]),
+    ('[{"id": "exp1" "reasoning": "a"}]', [{"id": "exp1", "reasoning": "a"}]),
+    ('[{"id": "exp1", "reasoning": "line\nbreak"}]', [{"id": "exp1", "reasoning": "line\nbreak"}]),
+    ('[{"id": "exp1"} // the best fit\n]', [{"id": "exp1"}]),
+])
+def test_repair_fixes_common_mistakes(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('[{"id": "exp1", "reasoning": "cut off', [{"id": "exp1", "reasoning": "cut off"}]),
+    ('[{"id": "exp1"}, {"id": "exp2", "reas', [{"id": "exp1"}, {"id": "exp2"}]),
+    ('{"recommendations": [{"id": "exp1", "reasoning": ["a", ', {"recommendations": [{"id": "exp1", "reasoning": ["a"]}]}),
+])
+def test_repair_closes_truncated_output(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_valid_json_is_left_unchanged():
+    text = '[{"id": "exp1", "reasoning": "a, b: [c]"}]'
+    assert repair_json(text) == text
+
+
+def test_objects_are_extracted_from_prose_and_cut_off_answers():
+    assert extract_objects('Sure! [{"id": "exp1"}] and also {"id": "exp2", "reasoning": "tr') == \
+        [{"id": "exp1"}, {"id": "exp2", "reasoning": "tr"}]
+
+
+def test_truncated_completion_still_yields_its_complete_recommendations(parser):
+    result = parser.parse('[{"id": "exp1", "reasoning": "a"}, {"id": "exp2", "reasoning": "b"}, {"id": "ex', 3)
+    assert [rec["id"] for rec in result.recommendations] == ["exp1", "exp2"]
+    assert result.rejected == {"unknown_id": 1}
+
+
+def test_answer_without_json_is_reported(parser):
+    result = parser.parse("I cannot help with that.", 1)
+    assert result.recommendations == [] and result.rejected == {"no_json": 1}
+
+def stream_events(text: str, chunk_size: int = 7):
+    incremental = IncrementalJSONParser()
+    events = []
+    for start in range(0, len(text), chunk_size):
+        events.extend(incremental.feed(text[start:start + chunk_size]))
+    return events + incremental.finish()
+
+
+def objects(events):
+    return [event[1] for event in events if event[0] == "object"]
+
+
+@pytest.mark.parametrize("text", [
+    '[{"id": "exp1", "reasoning": "r1"}, {"id": "exp2", "reasoning": "r2"}]',
+    'Sure! {"recommendations": [{"id": "exp1", "reasoning": "r1"}, {"id": "exp2", "reasoning": "r2"}]}',
+    '{"items": [{"id": "exp1", "reasoning": "r1"},\n{"id": "exp2", "reasoning": "r2"}]}',
+])
+def test_stream_reports_each_recommendation(text):
+    events = stream_events(text)
+    assert objects(events) == [{"id": "exp1", "reasoning": "r1"}, {"id": "exp2", "reasoning": "r2"}]
+    assert ("field", "id", "exp1") in events
+
+
+def test_stream_unwraps_a_single_wrapped_object():
+    events = stream_events('{"recommendation": {"id": "exp3", "reasoning": "r3"}}')
+    assert objects(events) == [{"id": "exp3", "reasoning": "r3"}]
+
+
+def test_stream_keeps_nested_values_of_a_recommendation():
+    text = '{"id": "exp1", "tags": [{"name": "outdoors"}], "reasoning": "r1"}'
+    assert objects(stream_events(text)) == [json.loads(text)]
+
+
+def test_stream_repairs_a_wrapped_object_cut_off_at_the_end():
+    events = stream_events('{"recommendations": [{"id": "exp1", "reasoning": "r1"}, {"id": "exp2", "reasoning": "cut')
+    assert objects(events) == [{"id": "exp1", "reasoning": "r1"}, {"id": "exp2", "reasoning": "cut"}]
@@ -0,0 +1,81 @@
+"""Response encoding: field projection, ETags and gzip."""
+import gzip
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+
+import server
+from serialization import GZIP_MIN_BYTES, dumps, etag, etag_matches, lean_response, parse_fields, project
+
+PAYLOAD = {
+    "user_profile": {"id": "u1", "work_role": "Engineer"},
+    "similar_profiles": [{"work_role": "Designer", "work_group": "Art", "similarity": 0.5}],
+    "recommendations": [{"id": "exp1", "title": "Sailing", "reasoning": "Because"}],
+}
+
+
+def test_projection_keeps_only_the_requested_paths():
+    paths = parse_fields("recommendations.id, similar_profiles.work_role,user_profile")
+    assert project(PAYLOAD, paths) == {
+        "recommendations": [{"id": "exp1"}],
+        "similar_profiles": [{"work_role": "Designer"}],
+        "user_profile": {"id": "u1", "work_role": "Engineer"},
+    }
+    assert project(PAYLOAD, parse_fields("")) is PAYLOAD
+    assert project(PAYLOAD, parse_fields("recommendations,recommendations.id")) == \
+        {"recommendations": PAYLOAD["recommendations"]}
+
+
+def test_etags_match_weakly_and_in_lists():
+    tag = etag(dumps(PAYLOAD))
+    assert etag_matches(tag, tag)
+    assert etag_matches(tag.removeprefix("W/"), tag)
+    assert etag_matches(f'"other", {tag}', tag)
+    assert etag_matches("*", tag)
+    assert not etag_matches('W/"other"', tag) and not etag_matches(None, tag)
+
+
+def test_matching_if_none_match_gets_an_empty_304():
+    response = lean_response(PAYLOAD, {})
+    assert response.status_code == 200 and json.loads(response.body) == PAYLOAD
+    tag = response.headers["etag"]
+
+    cached = lean_response(PAYLOAD, {"if-none-match": tag})
+    assert cached.status_code == 304 and cached.body == b"" and cached.headers["etag"] == tag
+    changed = dict(PAYLOAD, recommendations=[])
+    assert lean_response(changed, {"if-none-match": tag}).status_code == 200
+
+
+def test_large_bodies_are_gzipped_with_the_same_etag():
+    payload = dict(PAYLOAD, padding="x" * GZIP_MIN_BYTES)
+    plain = lean_response(payload, {})
+    zipped = lean_response(payload, {"accept-encoding": "gzip, br"})
+    assert "content-encoding" not in plain.headers
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(zipped.body) == plain.body
+    assert zipped.headers["etag"] == plain.headers["etag"]
+    assert "content-encoding" not in lean_response(PAYLOAD, {"accept-encoding": "gzip"}).headers
+
+
+@pytest_asyncio.fixture
+async def client():
+    app = server.create_app()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+            yield client
+
+
+@pytest.mark.asyncio
+async def test_recommendations_endpoint_answers_304_when_nothing_changed(client):
+    user_id = (await client.post("/api/profile", json={
+        "age": 31, "work_group": "Tech", "work_role": "Engineer",
+        "work_resume": "APIs", "hobbies_interests": "chess",
+    })).json()["user_id"]
+    url = f"/api/recommendations/{user_id}?fields=recommendations.id"
+    first = await client.get(url)
+    assert first.status_code == 200 and set(first.json()) == {"recommendations"}
+
+    again = await client.get(url, headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304 and again.content == b""
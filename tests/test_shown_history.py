@@ -0,0 +1,87 @@
+"""ShownHistoryStore: bitset views, write-behind, retries and the catalog bound."""
+import asyncio
+
+import pytest
+
+from repository import InMemoryBackend, ShownHistoryRepository
+from shown_history import ExperienceIdTable, ShownHistoryStore, ShownSet
+
+CATALOG = {f"exp{i}" for i in range(1, 11)}
+
+
+class FlakyRepository(ShownHistoryRepository):
+    """Fails the first ``failures`` writes and counts every write."""
+
+    def __init__(self, failures: int = 0):
+        super().__init__(InMemoryBackend().collection("shown_history"))
+        self.failures = failures
+        self.writes = []
+
+    async def add_many(self, user_id, experience_ids):
+        self.writes.append((user_id, list(experience_ids)))
+        if len(self.writes) <= self.failures:
+            raise ConnectionError("database unavailable")
+        await super().add_many(user_id, experience_ids)
+
+
+def test_shown_set_is_a_view_over_the_bits():
+    table = ExperienceIdTable()
+    shown = ShownSet(table.bits_for(["exp3", "exp1", "exp7"]), table)
+    assert "exp1" in shown and "exp2" not in shown and "never-interned" not in shown
+    assert sorted(shown) == ["exp1", "exp3", "exp7"]
+    assert len(shown) == 3
+
+
+def test_table_only_interns_catalog_ids():
+    table = ExperienceIdTable(CATALOG)
+    bits = table.bits_for(["exp1", "made-up", "exp2"])
+    assert sorted(ShownSet(bits, table)) == ["exp1", "exp2"]
+    assert len(table) == 2
+
+
+@pytest.mark.asyncio
+async def test_additions_are_visible_at_once_and_written_behind_per_user():
+    repository = FlakyRepository()
+    store = ShownHistoryStore(repository, flush_interval=0.01, catalog=CATALOG)
+    for experience_id in ("exp1", "exp2", "made-up"):
+        await store.add("u1", experience_id)
+    assert sorted(await store.get("u1")) == ["exp1", "exp2"]
+    assert repository.writes == []
+
+    await asyncio.sleep(0.05)
+    assert repository.writes == [("u1", ["exp1", "exp2"])]
+    assert sorted(await ShownHistoryRepository(repository.collection).get("u1")) == ["exp1", "exp2"]
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_retried():
+    repository = FlakyRepository(failures=2)
+    store = ShownHistoryStore(repository, flush_interval=0.01, retry_interval=0.01)
+    await store.add("u1", "exp1")
+    await asyncio.sleep(0.1)
+    assert len(repository.writes) == 3
+    assert await repository.get("u1") == ["exp1"]
+
+
+@pytest.mark.asyncio
+async def test_close_writes_what_is_still_pending():
+    repository = FlakyRepository(failures=1)
+    store = ShownHistoryStore(repository, flush_interval=0.001, retry_interval=60)
+    await store.add("u1", "exp1")
+    while not repository.writes:  # the first write fails and waits out the retry interval
+        await asyncio.sleep(0.001)
+    await store.close()
+    assert await repository.get("u1") == ["exp1"]
+
+
+@pytest.mark.asyncio
+async def test_evicted_users_are_reloaded_and_merged_with_the_database():
+    repository = FlakyRepository()
+    await repository.add_many("u1", ["exp1"])
+    store = ShownHistoryStore(repository, max_users=1, flush_interval=60)
+    await store.add("u1", "exp2")  # not loaded yet: merged with the stored copy on read
+    assert sorted(await store.get("u1")) == ["exp1", "exp2"]
+    await store.get("u2")
+    assert len(store) == 1
+    await store.flush()
+    assert sorted(await store.get("u1")) == ["exp1", "exp2"]
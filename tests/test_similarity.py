@@ -0,0 +1,75 @@
+"""SimilarityEngine: the same top-k as the original rule-based scoring, including ties and empty fields."""
+import pytest
+
+from similarity import SimilarityEngine
+
+PROFILES = [
+    {"id": "p1", "age": 33, "work_group": "Tech", "work_role": "Software Engineer", "work_resume": "", "hobbies_interests": ""},
+    {"id": "p2", "age": 33, "work_group": "Tech", "work_role": "Software Engineer", "work_resume": "", "hobbies_interests": ""},
+    {"id": "p3", "age": 50, "work_group": "Tech", "work_role": "Chef", "work_resume": "", "hobbies_interests": ""},
+    {"id": "p4", "age": 31, "work_group": "Finance", "work_role": "Accountant", "work_resume": "", "hobbies_interests": ""},
+    {"id": "p5", "age": 70, "work_group": "Arts", "work_role": "Painter", "work_resume": "", "hobbies_interests": ""},
+    {"id": "p6", "age": 32, "work_group": "Tech", "work_role": "", "work_resume": "", "hobbies_interests": ""},
+    {"id": "p7", "age": 90},
+]
+
+
+def baseline_score(stored: dict, query: dict) -> int:
+    """The scoring find_similar_profiles used before SimilarityEngine."""
+    score = 0
+    if stored.get("work_group", "").lower() == query.get("work_group", "").lower():
+        score += 3
+    if abs(stored["age"] - query.get("age", 0)) <= 5:
+        score += 2
+    if any(word in stored.get("work_role", "").lower() for word in query.get("work_role", "").lower().split()):
+        score += 2
+    return score
+
+
+def score_groups(scored):
+    """[(score, {ids})] best first, so rankings that differ only inside a tie compare equal."""
+    groups = {}
+    for score, profile in scored:
+        groups.setdefault(round(score, 4), set()).add(profile["id"])
+    return sorted(groups.items(), reverse=True)
+
+
+def baseline_search(query: dict, k: int, min_score: float):
+    scored = [(baseline_score(profile, query), profile) for profile in PROFILES if profile["id"] != query.get("id")]
+    scored = [pair for pair in scored if pair[0] >= min_score]
+    return sorted(scored, key=lambda pair: -pair[0])[:k]
+
+
+QUERIES = [
+    {"id": "q", "age": 32, "work_group": "Tech", "work_role": "Software Engineer", "work_resume": "", "hobbies_interests": ""},
+    {"id": "q", "age": 32, "work_group": "Tech"},  # no role: p1, p2 and p6 tie
+    {"id": "p1", "age": 33, "work_group": "Tech", "work_role": "Software Engineer"},  # the user's own profile
+]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("min_score", [0, 3])
+def test_same_ranking_as_the_baseline_scoring(query, min_score):
+    engine = SimilarityEngine(PROFILES)
+    engine_scored = engine.search(query, k=len(PROFILES), min_score=min_score)
+    assert score_groups(engine_scored) == score_groups(baseline_search(query, len(PROFILES), min_score))
+    assert [score for score, _ in engine_scored] == sorted((score for score, _ in engine_scored), reverse=True)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("k", [1, 2, 3, 4])
+def test_top_k_matches_the_baseline_up_to_ties(query, k):
+    engine_scored = SimilarityEngine(PROFILES).search(query, k=k)
+    expected = baseline_search(query, len(PROFILES), 0)
+    assert len(engine_scored) == k
+    cutoff = expected[k - 1][0]
+    above = {profile["id"] for score, profile in expected if score > cutoff}
+    tied = {profile["id"] for score, profile in expected if score == cutoff}
+    found = {profile["id"] for _, profile in engine_scored}
+    assert above <= found <= above | tied
+
+
+def test_profiles_without_text_fields_are_scored_on_group_and_age():
+    engine = SimilarityEngine([PROFILES[5], PROFILES[6]])
+    assert engine.top_k({"id": "q", "age": 92, "work_group": "Arts", "work_role": None}, k=2, min_score=0.1) == [PROFILES[6]]
+    assert engine.search({"id": "q"}, k=2, min_score=0.1) == []
@@ -0,0 +1,69 @@
+"""SingleFlight: one computation per key for concurrent callers."""
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+class Work:
+    def __init__(self, result=None, error=None, delay=0.02):
+        self.result, self.error, self.delay = result, error, delay
+        self.runs = 0
+
+    async def __call__(self):
+        self.runs += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_run_and_get_copies():
+    flight = SingleFlight()
+    work = Work(result=[{"id": "exp1"}])
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(4)))
+    assert work.runs == 1
+    assert results == [[{"id": "exp1"}]] * 4
+    results[1][0]["id"] = "changed"
+    assert results[2] == [{"id": "exp1"}]
+    assert flight.stats == {"leaders": 1, "coalesced": 3} and flight.coalesced_by_key["k"] == 3
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight()
+    work = Work(result=1)
+    await asyncio.gather(flight.do("a", work), flight.do("b", work))
+    await flight.do("a", work)
+    assert work.runs == 3
+
+
+@pytest.mark.asyncio
+async def test_every_caller_sees_the_failure():
+    flight = SingleFlight()
+    work = Work(error=ValueError("bad"))
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(3)), return_exceptions=True)
+    assert work.runs == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_a_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+    work = Work(result="done")
+    leader = asyncio.create_task(flight.do("k", work))
+    follower = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "done"
+    assert work.runs == 1
+
+
+def test_tracked_keys_are_bounded():
+    flight = SingleFlight(max_tracked_keys=2)
+    for key in ("a", "b", "c"):
+        flight._count(key)
+    assert list(flight.coalesced_by_key) == ["b", "c"]
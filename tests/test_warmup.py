@@ -0,0 +1,99 @@
+"""WarmupPool: job lifecycle, one job per user, failures, timeouts and the bounded queue."""
+import asyncio
+
+import pytest
+
+from warmup import WarmupPool
+
+
+async def finished(job, timeout: float = 2.0):
+    """Wait until ``job`` leaves the queued and running states."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not job.finished:
+        assert loop.time() < deadline, f"job still {job.status}"
+        await asyncio.sleep(0.005)
+    return job
+
+
+@pytest.mark.asyncio
+async def test_job_goes_from_queued_to_running_to_done():
+    pool = WarmupPool(workers=1)
+    release = asyncio.Event()
+
+    async def warm_up():
+        await release.wait()
+        return {"recommendations": 3}
+
+    job = pool.submit("u1", warm_up)
+    assert job.status == "queued" and len(pool) == 1
+    pool.start()
+    while job.status == "queued":
+        await asyncio.sleep(0.005)
+    assert job.status == "running" and pool.status("u1") is job
+    release.set()
+    await finished(job)
+    assert job.status == "done" and job.result == {"recommendations": 3}
+    assert job.to_dict()["run_seconds"] is not None and job.error is None
+    assert pool.stats["done"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_resubmitting_for_a_user_replaces_the_earlier_job():
+    pool = WarmupPool(workers=1)
+    calls = []
+
+    def warm_up(n):
+        async def fn():
+            calls.append(n)
+            return {}
+        return fn
+
+    first = pool.submit("u1", warm_up(1))
+    second = pool.submit("u1", warm_up(2))
+    assert first.status == "cancelled" and pool.status("u1") is second
+    pool.start()
+    await finished(second)
+    assert calls == [2] and second.status == "done"
+    assert pool.stats == {"submitted": 2, "done": 1, "failed": 0, "timeout": 0, "cancelled": 1, "skipped": 0}
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_failures_and_timeouts_are_reported():
+    pool = WarmupPool(workers=2, timeout=0.05)
+    pool.start()
+
+    async def fail():
+        raise ValueError("no profile")
+
+    failed = await finished(pool.submit("u1", fail))
+    slow = await finished(pool.submit("u2", lambda: asyncio.sleep(10)))
+    assert failed.status == "failed" and failed.error == "ValueError: no profile"
+    assert slow.status == "timeout"
+    assert pool.stats["failed"] == 1 and pool.stats["timeout"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_a_running_job():
+    pool = WarmupPool(workers=1)
+    pool.start()
+    job = pool.submit("u1", lambda: asyncio.sleep(10))
+    while job.status != "running":
+        await asyncio.sleep(0.005)
+    assert pool.cancel("u1") and job.status == "cancelled"
+    assert not pool.cancel("u1")
+    assert (await finished(pool.submit("u2", lambda: asyncio.sleep(0)))).status == "done"  # the worker survived
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_skipped_when_the_queue_is_full_or_warm_up_is_off():
+    pool = WarmupPool(workers=1, max_pending=1)
+    assert pool.submit("u1", lambda: asyncio.sleep(0)).status == "queued"
+    assert pool.submit("u2", lambda: asyncio.sleep(0)).status == "skipped"
+    assert WarmupPool(workers=0).submit("u3", lambda: asyncio.sleep(0)).status == "skipped"
+    assert pool.stats["skipped"] == 1
+    await pool.close()